@@ -68,3 +68,11 @@ def get_timestamps_collection():
 def get_audio_generations_collection():
     """Collection pour les générations audio"""
     return get_database().audio_generations
+
+def get_workers_collection():
+    """Collection du registre des workers vidéo (flotte multi-nœuds)"""
+    return get_database().video_workers
+
+def get_stage_checkpoints_collection():
+    """Collection des checkpoints d'étapes du pipeline (artefacts et hashes)"""
+    return get_database().stage_checkpoints
@@ -0,0 +1,82 @@
+"""
+Mesure du gain du rendu par segments en fonction du nombre de cœurs utilisés
+
+Génère un template synthétique et une piste audio sinusoïdale, puis rend la
+même vidéo avec 1, 2, 4... segments en parallèle (jusqu'au nombre de cœurs).
+
+Usage: python helpers/benchmark_segment_render.py --duration 120 --backend ffmpeg
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Ajouter le répertoire parent au chemin Python pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import TimestampItem
+from services.render_service import RenderSpec, get_ffmpeg_binary, render_in_pool, shutdown_render_executor
+
+
+def make_inputs(work_dir: str, duration: float, size: str):
+    """Template testsrc de 5s et audio sinusoïdal de `duration` secondes"""
+    template_path = os.path.join(work_dir, "template.mp4")
+    audio_path = os.path.join(work_dir, "audio.mp3")
+    subprocess.run([get_ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "lavfi",
+                    "-i", f"testsrc2=size={size}:rate=24:duration=5", "-pix_fmt", "yuv420p", template_path], check=True)
+    subprocess.run([get_ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "lavfi",
+                    "-i", f"sine=frequency=440:duration={duration}", audio_path], check=True)
+    return template_path, audio_path
+
+
+async def run_once(spec: RenderSpec, segments: int) -> float:
+    """Rendre la vidéo avec au plus `segments` segments, un process par segment"""
+    os.environ["RENDER_SEGMENTS"] = str(segments)
+    os.environ["RENDER_PROCESS_POOL_SIZE"] = str(segments)
+    shutdown_render_executor()
+    started = time.perf_counter()
+    await render_in_pool(spec)
+    elapsed = time.perf_counter() - started
+    shutdown_render_executor()
+    return elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark du rendu par segments")
+    parser.add_argument("--duration", type=float, default=120)
+    parser.add_argument("--backend", choices=["moviepy", "ffmpeg"], default="ffmpeg")
+    parser.add_argument("--size", default="1920x1080")
+    parser.add_argument("--max-segments", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    os.environ["RENDER_SEGMENT_MIN_SECONDS"] = "1"
+    counts = sorted({1, args.max_segments} | {2 ** i for i in range(1, 8) if 2 ** i < args.max_segments})
+
+    with tempfile.TemporaryDirectory(prefix="bench-segments-") as work_dir:
+        template_path, audio_path = make_inputs(work_dir, args.duration, args.size)
+        subtitles = [] if args.backend == "moviepy" else [
+            TimestampItem(text=f"Phrase {i}", start_time_ms=i * 3000, end_time_ms=i * 3000 + 2500)
+            for i in range(int(args.duration // 3))
+        ]
+        spec = RenderSpec(
+            template_path=template_path,
+            audio_path=audio_path,
+            output_path=os.path.join(work_dir, "output.mp4"),
+            subtitles=subtitles,
+            threads=1,
+            backend=args.backend
+        )
+
+        print(f"📊 {args.duration:.0f}s {args.size} ({args.backend}), {os.cpu_count()} cœur(s)")
+        baseline = None
+        for count in counts:
+            elapsed = await run_once(spec, count)
+            baseline = baseline or elapsed
+            print(f"   {count:>3} segment(s): {elapsed:7.2f}s  speedup x{baseline / elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
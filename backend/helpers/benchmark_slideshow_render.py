@@ -0,0 +1,102 @@
+"""
+Mesure du débit du diaporama Ken Burns (images générées, zoompan + xfade)
+
+Génère des images et une piste audio synthétiques, puis mesure:
+- la synthèse seule: graphe zoompan + xfade décodé vers une sortie nulle
+- le rendu complet: render_video (sous-titres libass et encodage x264 compris)
+
+Le débit est rapporté en images par seconde, à comparer aux RENDER_FPS de la vidéo.
+
+Usage: python helpers/benchmark_slideshow_render.py --duration 600 --video-type normal --preset medium
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Ajouter le répertoire parent au chemin Python pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import TimestampItem, VideoType
+from services.render_service import RenderSpec, get_ffmpeg_binary, render_video
+from services.slideshow_service import build_slideshow_graph, plan_slides
+from services.template_cache_service import TemplateCacheService
+
+
+def make_inputs(work_dir: str, duration: float, image_count: int):
+    """Images testsrc2 1536x1024 (taille des images générées) et audio sinusoïdal de `duration` secondes"""
+    images = []
+    for index in range(image_count):
+        path = os.path.join(work_dir, f"image_{index:03d}.png")
+        subprocess.run([get_ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "lavfi",
+                        "-i", "testsrc2=size=1536x1024", "-vf", f"hue=h={index * 37}", "-frames:v", "1", path], check=True)
+        images.append(path)
+    audio_path = os.path.join(work_dir, "audio.mp3")
+    subprocess.run([get_ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "lavfi",
+                    "-i", f"sine=frequency=440:duration={duration}", audio_path], check=True)
+    return images, audio_path
+
+
+def measure_synthesis(images, subtitles, duration: float, video_type: VideoType, threads: int) -> float:
+    """Secondes pour synthétiser toutes les images du diaporama, sans encodage"""
+    profile = TemplateCacheService().get_profile(video_type)
+    slides = plan_slides(images, subtitles, duration, profile["fps"])
+    graph = build_slideshow_graph(slides, profile["width"], profile["height"], profile["fps"])
+    command = [get_ffmpeg_binary(), "-y", "-hide_banner", "-loglevel", "error",
+               "-filter_complex_threads", str(threads)]
+    for slide in slides:
+        command += ["-i", slide.path]
+    command += ["-filter_complex", graph, "-map", "[slideshow]", "-t", f"{duration:.3f}", "-f", "null", "-"]
+    started = time.perf_counter()
+    subprocess.run(command, check=True)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du diaporama Ken Burns")
+    parser.add_argument("--duration", type=float, default=600)
+    parser.add_argument("--video-type", choices=["short", "normal"], default="normal")
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--preset", default="medium")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--skip-encode", action="store_true", help="Mesurer seulement la synthèse")
+    args = parser.parse_args()
+
+    video_type = VideoType(args.video_type)
+    profile = TemplateCacheService().get_profile(video_type)
+    frames = round(args.duration * profile["fps"])
+
+    with tempfile.TemporaryDirectory(prefix="bench-slideshow-") as work_dir:
+        images, audio_path = make_inputs(work_dir, args.duration, args.images)
+        subtitles = [
+            TimestampItem(text=f"Phrase numero {i} avec des mots", start_time_ms=i * 3000, end_time_ms=i * 3000 + 2500)
+            for i in range(int(args.duration // 3))
+        ]
+
+        print(f"📊 Diaporama {args.duration:.0f}s {profile['width']}x{profile['height']} @ {profile['fps']} fps, "
+              f"{args.images} images, {os.cpu_count()} cœur(s)")
+        elapsed = measure_synthesis(images, subtitles, args.duration, video_type, args.threads)
+        print(f"   Synthèse (zoompan + xfade): {elapsed:7.2f}s  {frames / elapsed:6.1f} fps")
+
+        if args.skip_encode:
+            return
+        started = time.perf_counter()
+        render_video(RenderSpec(
+            template_path="unused.mp4",
+            audio_path=audio_path,
+            output_path=os.path.join(work_dir, "output.mp4"),
+            subtitles=subtitles,
+            preset=args.preset,
+            threads=args.threads,
+            backend="ffmpeg",
+            video_type=video_type,
+            images=images
+        ))
+        elapsed = time.perf_counter() - started
+        print(f"   Rendu complet (libass + x264 {args.preset}): {elapsed:7.2f}s  {frames / elapsed:6.1f} fps")
+
+
+if __name__ == "__main__":
+    main()
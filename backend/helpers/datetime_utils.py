@@ -21,6 +21,24 @@ def now_utc() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def to_mongo_precision(dt: Optional[datetime]) -> Optional[datetime]:
+    """
+    Tronquer un datetime à la milliseconde (précision des dates BSON)
+    
+    Un objet gardé en mémoire après son insertion se compare alors
+    exactement à sa copie stockée en MongoDB.
+    
+    Args:
+        dt: Datetime à tronquer (None accepté)
+        
+    Returns:
+        datetime: Datetime sans les microsecondes sous la milliseconde
+    """
+    if dt is None:
+        return None
+    return dt.replace(microsecond=dt.microsecond // 1000 * 1000)
+
+
 def parse_iso_date(date_string: str) -> datetime:
     """
     Parser une date ISO en datetime UTC
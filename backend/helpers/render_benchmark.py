@@ -0,0 +1,260 @@
+"""
+Benchmark du rendu vidéo sur des médias synthétiques
+
+Génère des templates (testsrc2, 16:9 et 9:16) et des pistes audio sinusoïdales,
+puis exécute VideoService.generate_video pour chaque combinaison moteur ×
+VideoType × durée × sous-titres. Chaque cas tourne dans un process séparé pour
+mesurer son pic de RSS (process de rendu et ffmpeg compris).
+
+Les collections MongoDB utilisées par le rendu sont remplacées par des
+collections en mémoire: le benchmark ne dépend d'aucune base.
+
+Usage:
+    python helpers/render_benchmark.py --output bench.json
+    python helpers/render_benchmark.py --durations 30 --backends ffmpeg --compare bench.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from unittest.mock import patch
+
+# Ajouter le répertoire parent au chemin Python pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RESULT_PREFIX = "BENCHMARK_RESULT "
+
+TEMPLATES = {
+    "landscape.mp4": "1920x1080",
+    "portrait.mp4": "1080x1920",
+}
+
+
+class MemoryCollection:
+    """Collection en mémoire couvrant les appels faits par le rendu (find_one, insert_one, update_one)"""
+
+    def __init__(self, documents: Optional[List[Dict]] = None):
+        self.documents = list(documents or [])
+
+    def _matches(self, document: Dict, query: Dict) -> bool:
+        return all(document.get(key) == value for key, value in query.items())
+
+    async def find_one(self, query: Dict, projection: Optional[Dict] = None, sort=None) -> Optional[Dict]:
+        matches = [document for document in self.documents if self._matches(document, query)]
+        for key, direction in reversed(sort or []):
+            matches.sort(key=lambda document: document.get(key), reverse=direction < 0)
+        return dict(matches[0]) if matches else None
+
+    async def insert_one(self, document: Dict):
+        self.documents.append(dict(document))
+
+    async def update_one(self, query: Dict, update: Dict):
+        for document in self.documents:
+            if self._matches(document, query):
+                document.update(update.get("$set", {}))
+                return
+
+
+def make_media(resources_dir: str):
+    """Templates synthétiques de 10s (avec le bruit de testsrc2, plus réaliste qu'un aplat)"""
+    from services.render_service import get_ffmpeg_binary
+
+    template_dir = os.path.join(resources_dir, "video-template")
+    os.makedirs(template_dir, exist_ok=True)
+    for name, size in TEMPLATES.items():
+        path = os.path.join(template_dir, name)
+        if not os.path.exists(path):
+            subprocess.run([get_ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "lavfi",
+                            "-i", f"testsrc2=size={size}:rate=30:duration=10",
+                            "-pix_fmt", "yuv420p", path], check=True)
+
+
+def make_audio(path: str, duration: float):
+    """Piste audio sinusoïdale de `duration` secondes"""
+    from services.render_service import get_ffmpeg_binary
+
+    subprocess.run([get_ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "lavfi",
+                    "-i", f"sine=frequency=220:duration={duration}", "-b:a", "128k", path], check=True)
+
+
+def make_phrases(duration: float) -> List[Dict]:
+    """Une phrase de 2,5s toutes les 3s, comme une narration"""
+    return [
+        {"text": f"Phrase de narration numéro {i}", "start_time_ms": i * 3000, "end_time_ms": i * 3000 + 2500}
+        for i in range(int(duration // 3))
+    ]
+
+
+async def run_case(case: Dict) -> Dict:
+    """Exécuter generate_video pour un cas (dans le process courant)"""
+    from models import VideoType
+    from services.render_service import shutdown_render_executor
+    from services.video_service import VideoService
+
+    video_type = VideoType(case["video_type"])
+    idea_id = f"bench-{case['backend']}-{video_type.value}-{case['duration']}-{int(case['subtitles'])}"
+    title = idea_id
+
+    # Template de l'orientation de la cible: on mesure le rendu, pas le recadrage
+    service = VideoService()
+    template = "portrait.mp4" if video_type == VideoType.SHORT else "landscape.mp4"
+    service._select_random_template = lambda video_type: os.path.join(service.resource_config.get_template_dir(), template)
+
+    audio_dir = service.resource_config.get_idea_directories(idea_id, title)["audio_directory"]
+    make_audio(os.path.join(audio_dir, "combined_audio.mp3"), case["duration"])
+
+    ideas = MemoryCollection([{"id": idea_id, "title": title, "video_type": video_type.value}])
+    scripts = MemoryCollection([{"id": idea_id, "idea_id": idea_id, "youtube_description": title}])
+    timestamps = MemoryCollection([{"idea_id": idea_id, "timestamps": make_phrases(case["duration"])}])
+    videos = MemoryCollection()
+
+    with patch("database.get_ideas_collection", return_value=ideas), \
+            patch("database.get_scripts_collection", return_value=scripts), \
+            patch("services.video_service.get_videos_collection", return_value=videos), \
+            patch("services.subtitle_service.get_timestamps_collection", return_value=timestamps):
+        started = time.perf_counter()
+        try:
+            video = await service.generate_video(script_id=idea_id)
+        finally:
+            elapsed = time.perf_counter() - started
+            # Process de rendu terminés et attendus: leur pic de RSS est compté dans RUSAGE_CHILDREN
+            shutdown_render_executor(wait=True)
+
+    frames = case["duration"] * int(os.getenv("RENDER_FPS", "24"))
+    return {
+        "wall_seconds": round(elapsed, 3),
+        "frames_per_second": round(frames / elapsed, 2),
+        "output_bytes": os.path.getsize(video.video_relative_path),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Pic de RSS du process et de ses descendants terminés (ru_maxrss en Ko sous Linux)"""
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(peak / 1024, 1)
+
+
+def run_case_subprocess(case: Dict, resources_dir: str) -> Dict:
+    """Lancer un cas dans un process dédié avec son environnement de rendu"""
+    env = dict(os.environ)
+    env.update({
+        "RESOURCES_DIR": resources_dir,
+        "RENDER_BACKEND": case["backend"],
+        "SUBTITLES_ENABLED": "true" if case["subtitles"] else "false",
+    })
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run-case", json.dumps(case)],
+        env=env, capture_output=True, text=True
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    return {**case, "error": (result.stderr.strip() or result.stdout.strip())[-500:]}
+
+
+def git_commit() -> Optional[str]:
+    """Commit courant, pour comparer les résultats entre versions"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def case_key(result: Dict) -> tuple:
+    return (result["backend"], result["video_type"], result["duration"], result["subtitles"])
+
+
+def compare(results: List[Dict], previous_path: str):
+    """Afficher l'écart de temps de rendu avec un fichier de résultats précédent"""
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)
+    previous_results = {case_key(result): result for result in previous["results"] if "error" not in result}
+    print(f"\n📈 Comparaison avec {previous.get('commit') or previous_path}")
+    for result in results:
+        before = previous_results.get(case_key(result))
+        if before and "error" not in result:
+            change = (result["wall_seconds"] - before["wall_seconds"]) / before["wall_seconds"] * 100
+            print(f"   {'/'.join(str(part) for part in case_key(result)):<36} "
+                  f"{before['wall_seconds']:>8.2f}s → {result['wall_seconds']:>8.2f}s ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du rendu vidéo")
+    parser.add_argument("--durations", default="30,120,600", help="Durées en secondes, séparées par des virgules")
+    parser.add_argument("--backends", default="moviepy,ffmpeg")
+    parser.add_argument("--video-types", default="short,normal")
+    parser.add_argument("--subtitles", default="on,off")
+    parser.add_argument("--output", default="render_benchmark.json")
+    parser.add_argument("--compare", help="Fichier JSON d'un benchmark précédent")
+    parser.add_argument("--resources-dir", help="Répertoire de travail (par défaut temporaire)")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        case = json.loads(args.run_case)
+        metrics = asyncio.run(run_case(case))
+        print(RESULT_PREFIX + json.dumps({**case, **metrics, "peak_rss_mb": peak_rss_mb()}))
+        return
+
+    # Rendus finaux à froid: pas d'aperçu ni de fond en cache d'un cas à l'autre
+    os.environ.setdefault("RENDER_PREVIEW_ENABLED", "false")
+    os.environ.setdefault("BACKGROUND_CACHE_ENABLED", "false")
+
+    cases = [
+        {"backend": backend, "video_type": video_type, "duration": float(duration), "subtitles": subtitles == "on"}
+        for backend, video_type, duration, subtitles in itertools.product(
+            args.backends.split(","), args.video_types.split(","), args.durations.split(","), args.subtitles.split(",")
+        )
+    ]
+
+    with tempfile.TemporaryDirectory(prefix="render-benchmark-") as temp_dir:
+        resources_dir = args.resources_dir or temp_dir
+        os.environ["RESOURCES_DIR"] = resources_dir
+        make_media(resources_dir)
+
+        # Templates normalisés avant les mesures, comme au démarrage du worker
+        from services.render_service import ingest_templates
+        ingest_templates()
+
+        results = []
+        for case in cases:
+            result = run_case_subprocess(case, resources_dir)
+            results.append(result)
+            if "error" in result:
+                print(f"❌ {'/'.join(str(part) for part in case_key(result))}: {result['error'][-200:]}")
+            else:
+                print(f"✅ {'/'.join(str(part) for part in case_key(result)):<36} {result['wall_seconds']:>8.2f}s "
+                      f"{result['frames_per_second']:>7.1f} img/s {result['peak_rss_mb']:>8.1f} Mo "
+                      f"{result['output_bytes'] / 1024 / 1024:>7.1f} Mio")
+
+    from services.pipeline_stages import get_total_memory_mb
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now().isoformat(),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "memory_total_mb": get_total_memory_mb(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
 from enum import Enum
 import uuid
@@ -89,6 +89,11 @@ class Video(BaseModel):
     upload_attempts: int = Field(default=0, description="Nombre de tentatives d'upload sur YouTube")
     created_at: datetime = Field(default_factory=datetime.now)
     youtube_description: Optional[str] = None
+    template_path: Optional[str] = None  # Template source, réutilisé par les régénérations (fond en cache)
+    render_quality: str = "final"  # preview (rendu rapide pour relecture) ou final
+    approved: bool = False  # Validée après relecture: déclenche le rendu final
+    subtitle_srt_path: Optional[str] = None  # Sous-titres exportés (.srt envoyé à YouTube comme piste de légendes)
+    subtitle_ass_path: Optional[str] = None
 
 class VideoJob(BaseModel):
     """Job de génération vidéo dans la queue"""
@@ -96,14 +101,66 @@ class VideoJob(BaseModel):
     idea_id: str
     status: JobStatus = JobStatus.QUEUED
     start_from: str = "script"
+    stage: Optional[str] = None  # Étape en attente ou en cours (script, adapt, audio, video)
+    end_stage: Optional[str] = None  # Dernière étape à exécuter (déduite de start_from si absente)
     priority: int = 0
     created_at: datetime = Field(default_factory=datetime.now)
+    queued_at: Optional[datetime] = None  # Dernière mise en queue (création ou passage à l'étape suivante)
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     error_message: Optional[str] = None
     retry_count: int = 0
     max_retries: int = 1
     is_regeneration: bool = False # Nouveau champ pour indiquer si c'est une régénération d'étape
+    queue_latency_ms: Optional[int] = None  # Délai entre la mise en queue et le démarrage
+    worker_id: Optional[str] = None  # Worker détenant le bail du job
+    lease_expires_at: Optional[datetime] = None  # Expiration du bail, prolongée par le heartbeat
+    lease_expirations: int = 0  # Nombre de fois où le job a été récupéré après la mort de son worker
+    deadline: Optional[datetime] = None  # Date de publication prévue de la vidéo
+    schedule_key: Optional[datetime] = None  # Date de démarrage au plus tard (tri EDF)
+    estimated_seconds: Optional[float] = None  # Durée estimée des étapes restantes
+
+class StageCheckpoint(BaseModel):
+    """Sortie vérifiable d'une étape du pipeline pour une idée"""
+    idea_id: str
+    stage: str  # script, adapt, audio, video
+    job_id: Optional[str] = None
+    artifacts: Dict[str, str] = {}  # Nom → chemin des fichiers produits
+    hashes: Dict[str, str] = {}  # Nom → sha256 (fichiers et contenus stockés en base)
+    upstream_hash: Optional[str] = None  # Empreinte du checkpoint de l'étape précédente (None: ancien checkpoint)
+    completed_at: datetime = Field(default_factory=datetime.now)
+    duration_seconds: Optional[float] = None
+
+class BatchPipelineItem(BaseModel):
+    """Idée à mettre en production avec sa priorité"""
+    idea_id: str
+    priority: int = 0
+
+class BatchPipelineRequest(BaseModel):
+    """Mise en queue de plusieurs idées en une requête"""
+    items: List[BatchPipelineItem] = Field(..., min_length=1, max_length=500)
+
+class QueuePositionsRequest(BaseModel):
+    """Idées dont on veut le statut de job et la position dans la queue"""
+    idea_ids: List[str] = Field(..., max_length=500)
+
+class WorkerNode(BaseModel):
+    """Worker vidéo enregistré dans le registre de la flotte"""
+    worker_id: str
+    hostname: str
+    pid: int
+    cpu_count: int
+    memory_total_mb: Optional[int] = None
+    memory_available_mb: Optional[int] = None  # Mise à jour à chaque heartbeat
+    lanes: List[str] = []  # Lanes activées sur ce nœud
+    capacity: Dict[str, int] = {}  # Slots par lane
+    in_flight: Dict[str, int] = {}  # Étapes en cours par lane
+    stages_completed: Dict[str, int] = {}  # Étapes terminées par étape du pipeline
+    stages_failed: Dict[str, int] = {}
+    stage_seconds: Dict[str, float] = {}  # Temps cumulé passé dans chaque étape
+    started_at: datetime = Field(default_factory=datetime.now)
+    last_heartbeat_at: datetime = Field(default_factory=datetime.now)
+    stopped_at: Optional[datetime] = None
 
 class YouTubeConfig(BaseModel):
     client_id: Optional[str] = None
@@ -185,6 +242,8 @@ class TimestampItem(BaseModel):
     start_time_ms: int
     end_time_ms: int
     confidence: Optional[float] = None
+    # Mots de la phrase: (texte, début ms, fin ms), stockés en tableaux sans clés pour rester compacts
+    words: List[Tuple[str, int, int]] = []
 
 class Timestamp(BaseModel):
     """Représente tous les timestamps d'une idée dans un seul document"""
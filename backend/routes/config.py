@@ -105,3 +105,18 @@ async def get_youtube_stats():
             detail=f"Error fetching YouTube stats: {str(e)}"
         )
 
+
+@router.get("/captions/cache-stats")
+async def get_caption_cache_stats():
+    """
+    Récupérer les statistiques du cache des légendes rastérisées
+    """
+    try:
+        from services.caption_cache_service import CaptionCacheService
+        return CaptionCacheService().get_totals()
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching caption cache stats: {str(e)}"
+        )
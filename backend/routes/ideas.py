@@ -109,6 +109,7 @@ async def batch_action(idea_ids: List[str], action: str):
             "failed": [],
             "total": len(idea_ids)
         }
+        to_generate = []  # Mises en queue groupées en une seule opération après la boucle
         
         for idea_id in idea_ids:
             try:
@@ -137,9 +138,7 @@ async def batch_action(idea_ids: List[str], action: str):
                         })
                         continue
                     
-                    queue_service = QueueService()
-                    await queue_service.add_job(idea_id, start_from="script")
-                    results["success"].append(idea_id)
+                    to_generate.append(idea_id)
                     
                 else:
                     results["failed"].append({
@@ -153,6 +152,11 @@ async def batch_action(idea_ids: List[str], action: str):
                     "reason": str(e)
                 })
         
+        if to_generate:
+            queue_service = QueueService()
+            queued = await queue_service.add_jobs([(idea_id, 0) for idea_id in to_generate])
+            results["success"].extend(queued["created"] + queued["existing"])
+        
         return {
             "success": True,
             "message": f"Batch action '{action}' completed",
@@ -1,5 +1,7 @@
+from datetime import datetime
+from typing import Optional
 from fastapi import APIRouter, HTTPException, status
-from models import IdeaStatus
+from models import IdeaStatus, BatchPipelineRequest
 from database import get_ideas_collection, get_scripts_collection
 from services.queue_service import QueueService
 from services.audio_service import AudioService
@@ -8,10 +10,11 @@ import traceback
 router = APIRouter()
 
 @router.post("/generate/{idea_id}")
-async def start_pipeline(idea_id: str, start_from: str = "script"):
+async def start_pipeline(idea_id: str, start_from: str = "script", deadline: Optional[datetime] = None):
     """
     Ajouter une génération à la queue
     start_from: 'script', 'adapt', 'audio', 'video'
+    deadline: échéance de la vidéo (par défaut sa date de publication programmée)
     """
     try:
         ideas_collection = get_ideas_collection()
@@ -25,10 +28,10 @@ async def start_pipeline(idea_id: str, start_from: str = "script"):
         
         # Ajouter à la queue au lieu de lancer en background
         queue_service = QueueService()
-        job = await queue_service.add_job(idea_id, start_from, is_regeneration=False) # is_regeneration=False pour le pipeline complet
+        job = await queue_service.add_job(idea_id, start_from, is_regeneration=False, deadline=deadline) # is_regeneration=False pour le pipeline complet
         
         # Obtenir la position dans la queue
-        position = await queue_service.get_queue_position(idea_id)
+        position = await queue_service.get_queue_position(idea_id, job=job)
         
         return {
             "success": True,
@@ -47,6 +50,39 @@ async def start_pipeline(idea_id: str, start_from: str = "script"):
             detail=f"Error adding to queue: {str(e)}"
         )
         
+@router.post("/generate-batch")
+async def start_pipeline_batch(request: BatchPipelineRequest):
+    """
+    Ajouter plusieurs idées à la queue en une requête
+    Chaque idée démarre à l'étape correspondant à son statut; une idée déjà en queue garde son job
+    """
+    try:
+        queue_service = QueueService()
+        result = await queue_service.add_jobs([(item.idea_id, item.priority) for item in request.items])
+        
+        return {
+            "success": True,
+            "message": f"{len(result['created'])} job(s) added to queue",
+            "created": result["created"],
+            "existing": result["existing"],
+            "not_found": result["not_found"],
+            "jobs": {
+                idea_id: {
+                    "job_id": job.job_id,
+                    "start_from": job.start_from,
+                    "status": job.status,
+                    "queue_position": result["positions"].get(idea_id)
+                }
+                for idea_id, job in result["jobs"].items()
+            }
+        }
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error adding batch to queue: {str(e)}"
+        )
+
 @router.post("/regenerate/script/{idea_id}")
 async def regenerate_script(idea_id: str):
     """Régénérer uniquement le script"""
@@ -57,7 +93,7 @@ async def regenerate_script(idea_id: str):
         "message": "Script regeneration job added to queue",
         "job_id": job.job_id,
         "idea_id": idea_id,
-        "queue_position": await queue_service.get_queue_position(idea_id),
+        "queue_position": await queue_service.get_queue_position(idea_id, job=job),
         "start_from": "script"
     }
 
@@ -71,7 +107,7 @@ async def regenerate_audio(idea_id: str):
         "message": "Audio regeneration job added to queue",
         "job_id": job.job_id,
         "idea_id": idea_id,
-        "queue_position": await queue_service.get_queue_position(idea_id),
+        "queue_position": await queue_service.get_queue_position(idea_id, job=job),
         "start_from": "audio"
     }
 
@@ -85,7 +121,7 @@ async def regenerate_video(idea_id: str):
         "message": "Video regeneration job added to queue",
         "job_id": job.job_id,
         "idea_id": idea_id,
-        "queue_position": await queue_service.get_queue_position(idea_id),
+        "queue_position": await queue_service.get_queue_position(idea_id, job=job),
         "start_from": "video"
     }
 
@@ -3,12 +3,27 @@ Routes pour la gestion de la queue de jobs
 """
 from typing import Optional
 from fastapi import APIRouter, HTTPException, status
-from models import JobStatus
+from models import JobStatus, VideoJob, QueuePositionsRequest
 from services.queue_service import QueueService
+from services.worker_registry_service import WorkerRegistryService
 from database import get_ideas_collection
 
 router = APIRouter()
 
+def _job_status(job: VideoJob, position: Optional[int]) -> dict:
+    """Réponse de statut d'un job (commune aux routes unitaire et batch)"""
+    return {
+        "has_job": True,
+        "job_id": job.job_id,
+        "idea_id": job.idea_id,
+        "status": job.status,
+        "queue_position": position,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "error_message": job.error_message,
+        "retry_count": job.retry_count
+    }
+
 @router.get("/stats")
 async def get_queue_stats():
     """
@@ -24,6 +39,26 @@ async def get_queue_stats():
             detail=f"Error getting queue stats: {str(e)}"
         )
 
+@router.get("/workers")
+async def get_workers():
+    """
+    Lister les workers de la flotte avec leur capacité, leurs étapes en cours et leur débit
+    """
+    try:
+        registry = WorkerRegistryService()
+        workers = await registry.list_workers()
+        alive = [worker for worker in workers if worker["alive"]]
+        return {
+            "workers": workers,
+            "alive_count": len(alive),
+            "videos_per_hour": round(sum(worker["throughput"]["videos_per_hour"] for worker in alive), 2)
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error getting workers: {str(e)}"
+        )
+
 @router.get("/jobs")
 async def get_all_jobs(status: Optional[JobStatus] = None):
     queue_service = QueueService()
@@ -50,19 +85,9 @@ async def get_job_status(idea_id: str):
         # Obtenir la position dans la queue si en attente
         position = None
         if job.status == "queued":
-            position = await queue_service.get_queue_position(idea_id)
+            position = await queue_service.get_queue_position(idea_id, job=job)
         
-        return {
-            "has_job": True,
-            "job_id": job.job_id,
-            "idea_id": idea_id,
-            "status": job.status,
-            "queue_position": position,
-            "created_at": job.created_at.isoformat() if job.created_at else None,
-            "started_at": job.started_at.isoformat() if job.started_at else None,
-            "error_message": job.error_message,
-            "retry_count": job.retry_count
-        }
+        return _job_status(job, position)
         
     except Exception as e:
         raise HTTPException(
@@ -70,6 +95,32 @@ async def get_job_status(idea_id: str):
             detail=f"Error getting job status: {str(e)}"
         )
 
+@router.post("/positions")
+async def get_jobs_status(request: QueuePositionsRequest):
+    """
+    Obtenir le statut et la position dans la queue de plusieurs idées en une requête
+    (utilisé par la page des idées au lieu d'un appel par carte)
+    """
+    try:
+        queue_service = QueueService()
+        jobs = await queue_service.get_jobs_by_ideas(request.idea_ids)
+        positions = await queue_service.get_queue_positions(list(jobs.values()))
+        
+        statuses = {}
+        for idea_id in request.idea_ids:
+            job = jobs.get(idea_id)
+            if job:
+                statuses[idea_id] = _job_status(job, positions.get(idea_id))
+            else:
+                statuses[idea_id] = {"has_job": False, "idea_id": idea_id}
+        return statuses
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error getting jobs status: {str(e)}"
+        )
+
 @router.post("/cancel/{idea_id}")
 async def cancel_job(idea_id: str):
     """
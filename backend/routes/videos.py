@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, status, BackgroundTasks
 from models import Video, UpdateVideoRequest
 from database import get_videos_collection, get_scripts_collection, get_ideas_collection
 from services.video_service import VideoService
+from services.queue_service import QueueService
 from datetime import datetime
 import os
 
@@ -120,6 +121,10 @@ async def get_video_details(video_id: str):
             "youtube_url": video.get("youtube_url"),
             "uploaded_at": video.get("uploaded_at"),
             
+            # Rendu (aperçu en attente d'approbation ou final)
+            "render_quality": video.get("render_quality", "final"),
+            "approved": video.get("approved", False),
+            
             # Planification
             "is_scheduled": video.get("is_scheduled", False),
             "scheduled_publish_date": video.get("scheduled_publish_date"),
@@ -157,6 +162,46 @@ async def get_video_details(video_id: str):
             detail=f"Error fetching video details: {str(e)}"
         )
 
+@router.post("/{video_id}/approve")
+async def approve_video(video_id: str):
+    """
+    Approuver une vidéo après relecture de son aperçu
+    
+    Met en queue le rendu final (qualité complète) qui remplacera l'aperçu.
+    """
+    try:
+        videos_collection = get_videos_collection()
+        video = await videos_collection.find_one({"id": video_id}, {"_id": 0})
+        
+        if not video:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Video {video_id} not found"
+            )
+        
+        await videos_collection.update_one({"id": video_id}, {"$set": {"approved": True}})
+        print(f"✅ Vidéo {video_id} approuvée")
+        
+        job = None
+        if video.get("render_quality") == "preview":
+            job = await QueueService().request_final_render(video["idea_id"])
+        
+        return {
+            "success": True,
+            "video_id": video_id,
+            "approved": True,
+            "render_quality": video.get("render_quality", "final"),
+            "job_id": job.job_id if job else None
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error approving video: {str(e)}"
+        )
+
 @router.get("/{video_id}", response_model=Video)
 async def get_video(video_id: str):
     """
@@ -250,6 +295,14 @@ async def update_video(video_id: str, update_data: UpdateVideoRequest):
         
         print(f"✅ Vidéo {video_id} mise à jour: {list(update_fields.keys())}")
         
+        # Une vidéo planifiée encore en aperçu doit être rendue en qualité finale
+        if result and result.get("is_scheduled") and result.get("render_quality") == "preview":
+            await QueueService().request_final_render(result["idea_id"])
+        
+        # Une nouvelle date de publication change l'échéance d'un job en attente pour cette idée
+        if result and "scheduled_publish_date" in update_fields:
+            await QueueService().refresh_job_deadline(result["idea_id"])
+        
         return result
         
     except HTTPException:
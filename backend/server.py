@@ -20,6 +20,7 @@ from routes import ideas, scripts, audio, videos, youtube_routes, config, pipeli
 # Import helpers and workers
 from helpers.environment import is_local
 from workers.video_worker import main as video_worker_main
+from services.queue_service import QueueService
 
 # Créer le dossier resources s'il n'existe pas
 RESOURCES_DIR = os.getenv("RESOURCES_DIR", "/app/ressources")
@@ -31,6 +32,7 @@ async def lifespan(app: FastAPI):
     # Startup
     await connect_to_mongo()
     print("✅ Connected to MongoDB Atlas")
+    await QueueService().ensure_indexes()
     if is_local():
         asyncio.create_task(video_worker_main())
         print("✅ Video worker started in local environment")
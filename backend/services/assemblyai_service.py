@@ -1,4 +1,5 @@
 import os
+import asyncio
 import assemblyai as aai
 from typing import Optional
 from models import Timestamp, TimestampItem
@@ -28,9 +29,9 @@ class AssemblyAIService:
             print(transcript.error)
         else:
             if generate_subtitles:
-                f = open(srt_path, "a", encoding="UTF8")
-                f.write(transcript.export_subtitles_srt(chars_per_caption=nb_caracter_per_caption))
-                f.close()
+                # "w": une nouvelle transcription remplace le fichier au lieu d'y ajouter des légendes en double
+                with open(srt_path, "w", encoding="UTF8") as f:
+                    f.write(transcript.export_subtitles_srt(chars_per_caption=nb_caracter_per_caption))
         return transcript,srt_path
     
     async def transcribe_and_get_timestamps(self, audio_path: str, idea_id: str) -> Optional[Timestamp]:
@@ -47,8 +48,8 @@ class AssemblyAIService:
         try:
             print(f"🎯 Transcription AssemblyAI pour l'idée {idea_id}")
             
-            # Utiliser AssemblyAI pour transcrire
-            (transcript, srt) = self._transcribe(audio_path)
+            # Utiliser AssemblyAI pour transcrire (appel bloquant, exécuté dans un thread)
+            (transcript, srt) = await asyncio.to_thread(self._transcribe, audio_path)
             
             # Extraire les timestamps du transcript et les transformer en objets TimestampItem
             timestamp_items = []
@@ -59,7 +60,9 @@ class AssemblyAIService:
                     text=utterance.text,
                     start_time_ms=int(utterance.start),
                     end_time_ms=int(utterance.end),
-                    confidence=utterance.confidence
+                    confidence=utterance.confidence,
+                    # Horodatage de chaque mot (sous-titres mot à mot)
+                    words=[(word.text, int(word.start), int(word.end)) for word in (utterance.words or [])]
                 )
                 timestamp_items.append(timestamp_item)
                 
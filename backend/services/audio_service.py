@@ -1,4 +1,5 @@
 import os
+import asyncio
 from typing import List
 from models import AudioGeneration, AudioPhrase, Timestamp, TimestampItem
 from services.elevenlabs_custom_service import ElevenLabsService
@@ -250,7 +251,9 @@ class AudioService:
             
             # 3. Concaténer les fichiers audio
             combined_audio_path = os.path.join(audio_generation.audio_directory, "combined_audio.mp3")
-            total_duration_ms = self._concatenate_audio_files(audio_generation.audio_directory, combined_audio_path)
+            total_duration_ms = await asyncio.to_thread(
+                self._concatenate_audio_files, audio_generation.audio_directory, combined_audio_path
+            )
             
             # 4. Vérifier si les timestamps existent déjà avant de les générer
             timestamps_collection = get_timestamps_collection()
@@ -0,0 +1,93 @@
+"""
+Cache des pistes de fond bouclées
+
+Le fond d'une vidéo (template canonique bouclé et coupé à la durée de l'audio,
+sans son) ne dépend que du template, de la durée et de la résolution. Il est
+produit une fois en copie de flux puis réutilisé par les régénérations:
+sans sous-titres, seule la nouvelle piste audio est multiplexée; avec
+sous-titres, seule la couche de légendes est composée par-dessus.
+"""
+import os
+import subprocess
+from typing import List
+from services.resource_config_service import ResourceConfigService
+from services.template_cache_service import TemplateCacheService
+
+
+class BackgroundTrackService:
+    """Création, réutilisation et éviction LRU des pistes de fond"""
+
+    def __init__(self):
+        self.resource_config = ResourceConfigService()
+        self.template_cache = TemplateCacheService()
+        self.cache_dir = os.path.join(self.resource_config.get_template_dir(), ".cache", "backgrounds")
+        self.max_bytes = int(os.getenv("BACKGROUND_CACHE_MAX_MB", "4096")) * 1024 * 1024
+
+    def background_path(self, template_path: str, width: int, height: int, fps: int, frames: int) -> str:
+        """Chemin de la piste de fond: hash du template, résolution, fps et nombre d'images"""
+        name = f"{self.template_cache.hash_source(template_path)[:24]}-{width}x{height}-{fps}fps-{frames}f.mp4"
+        return os.path.join(self.cache_dir, name)
+
+    def ensure_background(self, template_path: str, duration: float, fps: int) -> str:
+        """
+        Retourner la piste de fond d'un template canonique pour `duration` secondes,
+        en la créant (copie de flux, sans ré-encodage) si elle n'est pas en cache
+        (appel bloquant: à exécuter dans le pool de rendu)
+        """
+        from services.media_probe_service import probe_media
+        from services.render_service import get_ffmpeg_binary
+
+        template = probe_media(template_path)
+        frames = round(duration * fps)
+        output_path = self.background_path(template_path, template["width"], template["height"], fps, frames)
+        if os.path.exists(output_path):
+            # Date d'accès pour l'éviction LRU
+            os.utime(output_path)
+            print(f"♻️ Background track reused: {os.path.basename(output_path)}")
+            return output_path
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        partial_path = f"{output_path}.{os.getpid()}.partial.mp4"
+        command = [
+            get_ffmpeg_binary(), "-y", "-hide_banner", "-loglevel", "error",
+            "-stream_loop", "-1", "-i", os.path.abspath(template_path),
+            "-t", f"{frames / fps:.3f}",
+            "-map", "0:v:0", "-an",
+            "-c:v", "copy",
+            "-movflags", "+faststart",
+            partial_path,
+        ]
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise RuntimeError(f"Background track creation failed for {template_path}: {result.stderr.strip()[-2000:]}")
+
+        os.replace(partial_path, output_path)
+        print(f"🧱 Background track cached: {os.path.basename(output_path)}")
+        self.evict(keep=output_path)
+        return output_path
+
+    def evict(self, keep: str = None) -> List[str]:
+        """Supprimer les pistes les moins récemment utilisées au-delà de BACKGROUND_CACHE_MAX_MB"""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(".mp4") and ".partial" not in name:
+                entries.append((os.path.getmtime(path), os.path.getsize(path), path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            os.remove(path)
+            total -= size
+            removed.append(path)
+        if removed:
+            print(f"🧹 {len(removed)} background track(s) evicted")
+        return removed
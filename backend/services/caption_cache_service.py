@@ -0,0 +1,235 @@
+"""
+Cache des légendes rastérisées, adressé par contenu
+
+Une légende rastérisée ne dépend que de son texte et de sa mise en forme
+(police, taille, couleurs, contour, largeur de la boîte): le hash de ces
+paramètres désigne un PNG RGBA sous RESOURCES_DIR/.cache/captions. Les phrases
+récurrentes (intros, conclusions, régénérations) ne sont rastérisées qu'une fois.
+
+Éviction LRU par taille totale (CAPTION_CACHE_MAX_MB, date d'accès = mtime).
+Les taux de succès de chaque rendu sont cumulés dans stats.json.
+"""
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from PIL import Image
+from services.resource_config_service import ResourceConfigService
+
+# Verrou de stats.json: fcntl (Linux, macOS), msvcrt (Windows), sinon aucun verrou
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# Incrémenter quand le rendu des légendes change: les anciennes entrées ne sont plus lues
+CACHE_VERSION = 1
+
+# Taille du cache estimée par ce process (répertoire → octets), recalculée à chaque éviction
+_cache_bytes: Dict[str, int] = {}
+
+
+@contextmanager
+def _locked(f):
+    """Verrou exclusif sur un fichier ouvert (entre process de rendu); sans module de verrouillage, pas de verrou"""
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+    elif msvcrt is not None:
+        # msvcrt verrouille des octets à partir de la position courante: le premier octet sert de verrou
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            f.flush()
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        yield
+
+
+class CaptionCacheService:
+    """Lecture, écriture, éviction et statistiques du cache de légendes"""
+
+    def __init__(self):
+        self.resource_config = ResourceConfigService()
+        self.cache_dir = os.path.join(self.resource_config.get_resources_dir(), ".cache", "captions")
+        self.stats_path = os.path.join(self.cache_dir, "stats.json")
+        self.enabled = os.getenv("CAPTION_CACHE_ENABLED", "true").lower() == "true"
+        self.max_bytes = int(os.getenv("CAPTION_CACHE_MAX_MB", "256")) * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text: str, box_width: int, config: dict, font_path: Optional[str] = None) -> str:
+        """Hash du texte et de tout ce qui change son rendu (la police résolue comprise)"""
+        fields = {
+            "version": CACHE_VERSION,
+            "text": text,
+            "box_width": box_width,
+            "font": config["font"],
+            "font_path": font_path,
+            "fontsize": config["fontsize"],
+            "color": config["color"],
+            "bg_color": config.get("bg_color"),
+            "stroke_color": config.get("stroke_color"),
+            "stroke_width": config.get("stroke_width"),
+            # Mode mot à mot: une image par mot surligné
+            "highlight_word": config.get("highlight_word"),
+            "highlight_color": config.get("highlight_color") if config.get("highlight_word") is not None else None,
+        }
+        return hashlib.sha256(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.png")
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Légende en cache (None si absente ou illisible)"""
+        path = self.path(key)
+        try:
+            with Image.open(path) as image:
+                rgba = np.asarray(image.convert("RGBA"))
+            # Date d'accès pour l'éviction LRU
+            os.utime(path)
+            return rgba
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Unreadable cached caption {os.path.basename(path)}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def put(self, key: str, rgba: np.ndarray):
+        """Écrire une légende (PNG compressé, renommage atomique); un échec d'écriture n'interrompt pas le rendu"""
+        path = self.path(key)
+        partial_path = f"{path}.{os.getpid()}.partial"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            Image.fromarray(rgba, "RGBA").save(partial_path, format="PNG", compress_level=6)
+            os.replace(partial_path, path)
+        except OSError as e:
+            print(f"⚠️ Caption cache write failed: {e}")
+            return
+        if self.cache_dir not in _cache_bytes:
+            _cache_bytes[self.cache_dir] = self.total_bytes()
+        else:
+            _cache_bytes[self.cache_dir] += os.path.getsize(path)
+        if _cache_bytes[self.cache_dir] > self.max_bytes:
+            self.evict(keep=path)
+
+    def get_or_render(self, text: str, box_width: int, config: dict, render: Callable[[str, int, dict], np.ndarray],
+                      font_path: Optional[str] = None) -> np.ndarray:
+        """Légende depuis le cache, sinon rastérisée puis mise en cache"""
+        if not self.enabled:
+            return render(text, box_width, config)
+        key = self.key(text, box_width, config, font_path)
+        rgba = self.get(key)
+        if rgba is not None:
+            self.hits += 1
+            return rgba
+        self.misses += 1
+        rgba = render(text, box_width, config)
+        self.put(key, rgba)
+        return rgba
+
+    def _entries(self) -> List[tuple]:
+        """(mtime, taille, chemin) de chaque légende en cache"""
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".png"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def total_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, keep: str = None) -> List[str]:
+        """Supprimer les légendes les moins récemment utilisées au-delà de CAPTION_CACHE_MAX_MB"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed.append(path)
+        _cache_bytes[self.cache_dir] = total
+        if removed:
+            print(f"🧹 {len(removed)} cached caption(s) evicted")
+        return removed
+
+    def get_stats(self) -> Dict[str, float]:
+        """Succès et échecs de cette instance (un rendu)"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def record_stats(self):
+        """Cumuler les compteurs de ce rendu dans stats.json (verrou: plusieurs process de rendu)"""
+        if not self.enabled or not (self.hits or self.misses):
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self.stats_path, "a+", encoding="utf-8") as f, _locked(f):
+                f.seek(0)
+                try:
+                    totals = json.loads(f.read() or "{}")
+                except ValueError:
+                    totals = {}
+                totals["hits"] = totals.get("hits", 0) + self.hits
+                totals["misses"] = totals.get("misses", 0) + self.misses
+                f.seek(0)
+                f.truncate()
+                json.dump(totals, f)
+        except OSError as e:
+            print(f"⚠️ Caption cache stats not recorded: {e}")
+            return
+        self.hits = self.misses = 0
+
+    def get_totals(self) -> Dict[str, float]:
+        """Statistiques cumulées de tous les rendus et occupation du cache"""
+        try:
+            with open(self.stats_path, encoding="utf-8") as f:
+                totals = json.load(f)
+        except (FileNotFoundError, ValueError):
+            totals = {}
+        hits, misses = totals.get("hits", 0), totals.get("misses", 0)
+        entries = self._entries()
+        return {
+            "enabled": self.enabled,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "entries": len(entries),
+            "size_mb": round(sum(size for _, size, _ in entries) / 1024 / 1024, 2),
+            "max_size_mb": round(self.max_bytes / 1024 / 1024, 2),
+        }
@@ -0,0 +1,135 @@
+"""
+Rastérisation des sous-titres en mémoire (Pillow + FreeType)
+
+Reproduit la mise en page des anciens TextClip(method='caption') d'ImageMagick:
+boîte de la largeur utile (largeur vidéo - margin), texte centré ligne par
+ligne, retour à la ligne au mot, hauteur de ligne de la police, fond et contour
+de la configuration. Aucun sous-process ni fichier temporaire: une légende est
+une image RGBA (tableau NumPy) produite dans le process de rendu.
+"""
+import os
+from functools import lru_cache
+from typing import List, Tuple
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+TRANSPARENT = ("transparent", "none", "")
+
+
+@lru_cache(maxsize=32)
+def get_font(font: str, size: int) -> ImageFont.FreeTypeFont:
+    """
+    Police FreeType à partir d'un nom ImageMagick ('DejaVu-Sans-Bold') ou d'un chemin .ttf/.otf
+
+    Pillow cherche les noms de fichiers dans les répertoires de polices du
+    système; à défaut, la police intégrée de Pillow est utilisée.
+    """
+    if os.path.isfile(font):
+        return ImageFont.truetype(font, size)
+    bold = font.endswith("-Bold")
+    family = (font[:-len("-Bold")] if bold else font).replace("-", "").replace(" ", "")
+    style = "Bold" if bold else ""
+    candidates = [f"{family}-{style}", f"{family}{style}", f"{family}_{style}"] if bold else [family, f"{family}-Regular"]
+    for name in candidates:
+        for extension in (".ttf", ".otf"):
+            try:
+                return ImageFont.truetype(name + extension, size)
+            except OSError:
+                continue
+    print(f"⚠️ Font {font} not found, using Pillow's default font")
+    return ImageFont.load_default(size)
+
+
+class CaptionRasterService:
+    """Légendes RGBA: retour à la ligne, fond, contour et texte centré"""
+
+    def layout(self, text: str, font: ImageFont.FreeTypeFont, max_width: int) -> List[List[Tuple[int, str]]]:
+        """
+        Retour à la ligne au mot (un mot plus large que la boîte est coupé entre deux caractères)
+
+        Returns:
+            Lignes de fragments (index du mot dans le texte, fragment affiché)
+        """
+        lines = []
+        index = 0
+        for paragraph in text.split("\n"):
+            line: List[Tuple[int, str]] = []
+            for word in paragraph.split():
+                candidate = line + [(index, word)]
+                if font.getlength(" ".join(fragment for _, fragment in candidate)) <= max_width:
+                    line = candidate
+                    index += 1
+                    continue
+                if line:
+                    lines.append(line)
+                fragment = ""
+                for char in word:
+                    if fragment and font.getlength(fragment + char) > max_width:
+                        lines.append([(index, fragment)])
+                        fragment = ""
+                    fragment += char
+                line = [(index, fragment)]
+                index += 1
+            lines.append(line)
+        return lines
+
+    def wrap(self, text: str, font: ImageFont.FreeTypeFont, max_width: int) -> List[str]:
+        """Lignes du texte après retour à la ligne"""
+        return [" ".join(fragment for _, fragment in line) for line in self.layout(text, font, max_width)]
+
+    def stroke_width(self, config: dict) -> int:
+        """Épaisseur du contour (0 si le contour est transparent)"""
+        stroke_color = config.get("stroke_color")
+        if not stroke_color or str(stroke_color).lower() in TRANSPARENT:
+            return 0
+        return int(config.get("stroke_width") or 0)
+
+    def caption_layout(self, text: str, box_width: int, config: dict) -> List[List[Tuple[int, str]]]:
+        """Lignes d'une légende dans sa boîte (même découpage pour le rendu Pillow et l'export ASS)"""
+        font = get_font(config["font"], int(config["fontsize"]))
+        return self.layout(text, font, box_width - 2 * self.stroke_width(config))
+
+    def render(self, text: str, box_width: int, config: dict) -> np.ndarray:
+        """
+        Rastériser une légende
+
+        Args:
+            text: Texte nettoyé
+            box_width: Largeur de la boîte (largeur vidéo - margin)
+            config: Configuration complète (fontsize, font, color, bg_color, stroke_color, stroke_width;
+                highlight_word/highlight_color: mot surligné en mode mot à mot)
+
+        Returns:
+            Tableau RGBA uint8 (hauteur, box_width, 4)
+        """
+        font = get_font(config["font"], int(config["fontsize"]))
+        stroke_width = self.stroke_width(config)
+        stroke_color = config.get("stroke_color")
+
+        lines = self.caption_layout(text, box_width, config)
+        ascent, descent = font.getmetrics()
+        line_height = ascent + descent
+        height = line_height * len(lines) + 2 * stroke_width
+
+        bg_color = config.get("bg_color")
+        background = (0, 0, 0, 0) if not bg_color or str(bg_color).lower() in TRANSPARENT else ImageColor.getcolor(bg_color, "RGBA")
+        image = Image.new("RGBA", (box_width, height), background)
+        draw = ImageDraw.Draw(image)
+        fill = ImageColor.getcolor(config["color"], "RGBA")
+        stroke = ImageColor.getcolor(stroke_color, "RGBA") if stroke_width else None
+        highlight_word = config.get("highlight_word")
+        highlight = ImageColor.getcolor(config.get("highlight_color") or config["color"], "RGBA")
+        for index, line in enumerate(lines):
+            text_line = " ".join(fragment for _, fragment in line)
+            x = (box_width - font.getlength(text_line)) / 2
+            y = stroke_width + index * line_height
+            if highlight_word is None or all(word_index != highlight_word for word_index, _ in line):
+                draw.text((x, y), text_line, font=font, fill=fill, stroke_width=stroke_width, stroke_fill=stroke)
+                continue
+            # Ligne du mot surligné: dessinée mot par mot (pas de surimpression, les bords restent identiques)
+            for position, (word_index, fragment) in enumerate(line):
+                prefix = " ".join(fragment for _, fragment in line[:position])
+                offset = font.getlength(prefix + " ") if prefix else 0
+                draw.text((x + offset, y), fragment, font=font, fill=highlight if word_index == highlight_word else fill,
+                          stroke_width=stroke_width, stroke_fill=stroke)
+        return np.asarray(image)
@@ -0,0 +1,166 @@
+"""
+Checkpoints des étapes du pipeline
+
+Une étape terminée enregistre ses artefacts (fichiers produits) et le sha256
+de ses sorties. Une étape dont le checkpoint est encore vérifiable (fichiers
+présents et inchangés, contenus en base identiques) n'est jamais relancée:
+un retry ne repaie ni le LLM ni ElevenLabs pour un travail déjà fait.
+
+Chaque checkpoint garde aussi l'empreinte du checkpoint de l'étape précédente:
+une étape refaite en amont (retry, régénération) invalide toutes les suivantes.
+"""
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from models import StageCheckpoint
+from database import (
+    get_stage_checkpoints_collection,
+    get_scripts_collection,
+    get_videos_collection,
+)
+from services.pipeline_stages import PIPELINE_STAGES
+
+
+def hash_file(path: str) -> str:
+    """sha256 d'un fichier, lu par blocs"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_text(text: str) -> str:
+    """sha256 d'un contenu texte"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CheckpointService:
+    """Enregistrement et vérification des sorties de chaque étape"""
+
+    def __init__(self):
+        self.checkpoints_collection = get_stage_checkpoints_collection()
+
+    async def _stage_outputs(self, idea_id: str, stage: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        Sorties actuelles d'une étape
+
+        Returns:
+            (fichiers: nom → chemin, contenus stockés en base: nom → texte)
+        """
+        files: Dict[str, str] = {}
+        contents: Dict[str, str] = {}
+
+        if stage == "video":
+            video = await get_videos_collection().find_one(
+                {"idea_id": idea_id}, {"_id": 0}, sort=[("created_at", -1)]
+            )
+            if video and video.get("video_relative_path"):
+                files["video"] = video["video_relative_path"]
+            return files, contents
+
+        script = await get_scripts_collection().find_one({"idea_id": idea_id}, {"_id": 0})
+        if not script:
+            return files, contents
+
+        if stage == "script" and script.get("original_script"):
+            contents["original_script"] = script["original_script"]
+        elif stage == "adapt" and script.get("elevenlabs_adapted_script"):
+            contents["elevenlabs_adapted_script"] = script["elevenlabs_adapted_script"]
+            contents["phrases"] = json.dumps(script.get("phrases") or [], ensure_ascii=False)
+        elif stage == "audio" and script.get("audio_phrases"):
+            for phrase in script["audio_phrases"]:
+                files[f"phrase_{phrase['phrase_index']}"] = phrase["audio_path"]
+            audio_dir = os.path.dirname(script["audio_phrases"][0]["audio_path"])
+            files["combined_audio"] = os.path.join(audio_dir, "combined_audio.mp3")
+
+        return files, contents
+
+    async def _upstream_hash(self, idea_id: str, stage: str) -> str:
+        """Empreinte des sorties enregistrées de l'étape précédente (vide pour la première étape)"""
+        index = PIPELINE_STAGES.index(stage)
+        upstream = {}
+        if index > 0:
+            upstream_data = await self.checkpoints_collection.find_one(
+                {"idea_id": idea_id, "stage": PIPELINE_STAGES[index - 1]}, {"_id": 0}
+            )
+            upstream = (upstream_data or {}).get("hashes") or {}
+        return hash_text(json.dumps(upstream, sort_keys=True))
+
+    async def save(self, idea_id: str, stage: str, job_id: Optional[str] = None, duration_seconds: Optional[float] = None) -> StageCheckpoint:
+        """Enregistrer le checkpoint d'une étape qui vient de se terminer"""
+        files, contents = await self._stage_outputs(idea_id, stage)
+        missing = [path for path in files.values() if not os.path.exists(path)]
+        if missing:
+            raise ValueError(f"Stage '{stage}' artifacts missing for idea {idea_id}: {', '.join(missing)}")
+
+        hashes = {name: hash_text(text) for name, text in contents.items()}
+        for name, path in files.items():
+            hashes[name] = await asyncio.to_thread(hash_file, path)
+
+        checkpoint = StageCheckpoint(
+            idea_id=idea_id,
+            stage=stage,
+            job_id=job_id,
+            artifacts=files,
+            hashes=hashes,
+            upstream_hash=await self._upstream_hash(idea_id, stage),
+            completed_at=datetime.now(),
+            duration_seconds=duration_seconds
+        )
+        await self.checkpoints_collection.replace_one(
+            {"idea_id": idea_id, "stage": stage},
+            checkpoint.model_dump(),
+            upsert=True
+        )
+        print(f"💾 Checkpoint saved: idea {idea_id} stage '{stage}' ({len(hashes)} output(s))")
+        return checkpoint
+
+    async def verify(self, idea_id: str, stage: str) -> bool:
+        """Vérifier que les sorties enregistrées d'une étape sont toujours présentes et intactes"""
+        checkpoint_data = await self.checkpoints_collection.find_one({"idea_id": idea_id, "stage": stage}, {"_id": 0})
+        if not checkpoint_data:
+            return False
+        checkpoint = StageCheckpoint(**checkpoint_data)
+        if not checkpoint.hashes:
+            return False
+        # Étape précédente refaite depuis: ces sorties ont été produites à partir des anciennes
+        if checkpoint.upstream_hash is not None and checkpoint.upstream_hash != await self._upstream_hash(idea_id, stage):
+            print(f"⚠️ Checkpoint '{stage}' for idea {idea_id}: upstream stage has been redone")
+            return False
+
+        for name, path in checkpoint.artifacts.items():
+            if not os.path.exists(path):
+                print(f"⚠️ Checkpoint '{stage}' for idea {idea_id}: {path} is missing")
+                return False
+            if await asyncio.to_thread(hash_file, path) != checkpoint.hashes.get(name):
+                print(f"⚠️ Checkpoint '{stage}' for idea {idea_id}: {path} has changed")
+                return False
+
+        _, contents = await self._stage_outputs(idea_id, stage)
+        stored_names = set(checkpoint.hashes) - set(checkpoint.artifacts)
+        if set(contents) != stored_names:
+            return False
+        for name, text in contents.items():
+            if hash_text(text) != checkpoint.hashes[name]:
+                print(f"⚠️ Checkpoint '{stage}' for idea {idea_id}: '{name}' has changed")
+                return False
+
+        return True
+
+    async def first_incomplete_stage(self, idea_id: str, stages: List[str]) -> Optional[str]:
+        """Première étape de `stages` sans checkpoint vérifié (None si toutes sont faites)"""
+        for stage in stages:
+            if not await self.verify(idea_id, stage):
+                return stage
+        return None
+
+    async def invalidate(self, idea_id: str, from_stage: str):
+        """Supprimer les checkpoints d'une étape et des étapes suivantes (régénération)"""
+        stages = PIPELINE_STAGES[PIPELINE_STAGES.index(from_stage):]
+        result = await self.checkpoints_collection.delete_many({"idea_id": idea_id, "stage": {"$in": stages}})
+        if result.deleted_count:
+            print(f"🗑️ Invalidated {result.deleted_count} checkpoint(s) for idea {idea_id} from stage '{from_stage}'")
@@ -2,11 +2,13 @@ import os
 import elevenlabs
 from elevenlabs.client import ElevenLabs
 from elevenlabs import save
-from typing import List, Tuple, Set
+from typing import Dict, List, Tuple, Set
 import asyncio
+import itertools
 from functools import lru_cache
 import time
 import json
+from services.media_probe_service import get_duration_ms
 
 class ElevenLabsService:
     """
@@ -14,9 +16,15 @@ class ElevenLabsService:
     et gestion des erreurs de crédits
     """
     
+    # Partagés entre toutes les instances du process: plusieurs jobs audio tournent en parallèle
+    _key_semaphores: Dict[str, asyncio.Semaphore] = {}
+    _start_index = itertools.count()
+    
     def __init__(self):
         self.api_keys = self._load_api_keys()
-        self.current_key_index = 0
+        # Chaque instance commence sur une clé différente pour répartir les jobs concurrents
+        self.current_key_index = next(ElevenLabsService._start_index) % len(self.api_keys)
+        self.concurrency_per_key = int(os.getenv("TTS_CONCURRENCY_PER_KEY", "1"))
         #t8BrjWUT5Z23DLLBzbuY voix feminine
         #Bj9UqZbhQsanLzgalpEG austin
         self.voice_id = os.getenv("ELEVENLABS_VOICE_ID", "NOpBlnGInO9m6vDvFkFC")
@@ -81,6 +89,14 @@ class ElevenLabsService:
         print(f"🔑 Using ElevenLabs key #{self.current_key_index + 1}/{len(available_keys)} (total: {len(self.api_keys)}, exhausted: {len(self.exhausted_keys)})")
         return ElevenLabs(api_key=api_key)
     
+    def _get_key_semaphore(self, api_key: str) -> asyncio.Semaphore:
+        """Sémaphore limitant les requêtes simultanées sur une même clé API"""
+        semaphore = ElevenLabsService._key_semaphores.get(api_key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.concurrency_per_key)
+            ElevenLabsService._key_semaphores[api_key] = semaphore
+        return semaphore
+    
     def _is_credit_error(self, error_message: str) -> bool:
         """
         Détecter si l'erreur est liée aux crédits épuisés
@@ -135,6 +151,40 @@ class ElevenLabsService:
         # aide Eleven à “chanter” la narration
         return cleaned
 
+    def _synthesize_to_file(self, client: ElevenLabs, text: str, output_path: str) -> int:
+        """
+        Synthétiser le texte, sauvegarder le MP3 et retourner sa durée en millisecondes
+        (appel synchrone, à exécuter dans un thread)
+        """
+        # Générer l'audio
+        ssml = f"""
+            <speak>
+            <prosody rate="105%" pitch="-1%" volume="soft">
+                {self._prepare_text(text)}
+            </prosody>
+            </speak>
+            """
+        #brian: nPczCjzI2devNBz1zQrb
+        audio = client.text_to_speech.convert(
+            text=ssml,
+            voice_id="nPczCjzI2devNBz1zQrb",
+            model_id="eleven_multilingual_v2",
+            output_format="mp3_44100_128",
+            voice_settings={
+                "stability": 0.25,
+                "similarity_boost": 0.85,
+                "style": 0.70,
+                "use_speaker_boost": True,
+            }
+        )
+        print("✅ Audio generated successfully. Next step: saving audio")
+        
+        # Sauvegarder l'audio
+        save(audio, output_path)
+        
+        # Durée lue dans les en-têtes de trames MP3, sans décoder l'audio
+        return get_duration_ms(output_path)
+    
     async def generate_audio(self, text: str, output_path: str, max_retries: int = 3) -> Tuple[str, int]:
         """
         Générer l'audio pour un texte donné avec retry automatique en cas d'erreur de crédits
@@ -154,36 +204,9 @@ class ElevenLabsService:
                 current_api_key = available_keys[(self.current_key_index - 1) % len(available_keys)]
                 
                 try:
-                    # Générer l'audio
-                    ssml = f"""
-                        <speak>
-                        <prosody rate="105%" pitch="-1%" volume="soft">
-                            {self._prepare_text(text)}
-                        </prosody>
-                        </speak>
-                        """
-                    #brian: nPczCjzI2devNBz1zQrb
-                    audio = client.text_to_speech.convert(
-                        text=ssml,
-                        voice_id="nPczCjzI2devNBz1zQrb",
-                        model_id="eleven_multilingual_v2",
-                        output_format="mp3_44100_128",
-                        voice_settings={
-                            "stability": 0.25,
-                            "similarity_boost": 0.85,
-                            "style": 0.70,
-                            "use_speaker_boost": True,
-                        }
-                    )
-                    print("✅ Audio generated successfully. Next step: saving audio")
-                    
-                    # Sauvegarder l'audio
-                    save(audio, output_path)
-                    
-                    # Calculer la durée avec pydub
-                    from pydub import AudioSegment
-                    audio_segment = AudioSegment.from_mp3(output_path)
-                    duration_ms = len(audio_segment)
+                    # Appel bloquant exécuté hors de la boucle asyncio, limité par clé
+                    async with self._get_key_semaphore(current_api_key):
+                        duration_ms = await asyncio.to_thread(self._synthesize_to_file, client, text, output_path)
                     
                     print(f"✅ Generated audio: {output_path} ({duration_ms}ms)")
                     return output_path, duration_ms
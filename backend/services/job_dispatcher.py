@@ -0,0 +1,123 @@
+"""
+Réveil du worker vidéo lorsqu'un job arrive dans la queue
+
+Utilise un change stream MongoDB sur `video_queue` quand il est disponible
+(replica set / Atlas). Sur un mongod standalone, on retombe sur un polling
+avec backoff exponentiel.
+"""
+import asyncio
+import os
+from typing import Dict, Optional, Set
+from pymongo.errors import OperationFailure, PyMongoError
+from models import JobStatus
+from services.pipeline_stages import LANES
+
+# Code renvoyé par un mongod standalone: "$changeStream is only supported on replica sets"
+CHANGE_STREAM_NOT_SUPPORTED = 40573
+
+# Dispatchers actifs dans ce process (worker lancé dans l'API en local)
+_local_dispatchers: Set["JobDispatcher"] = set()
+
+
+def notify_local_dispatchers():
+    """Réveiller immédiatement les dispatchers du process courant"""
+    for dispatcher in list(_local_dispatchers):
+        dispatcher.notify()
+
+
+class JobDispatcher:
+    """Attend l'arrivée de nouveaux jobs sans interroger la base en boucle"""
+
+    def __init__(self, queue_collection):
+        self.queue_collection = queue_collection
+        self.min_poll_interval = float(os.getenv("QUEUE_POLL_MIN_INTERVAL", "0.5"))
+        self.max_poll_interval = float(os.getenv("QUEUE_POLL_MAX_INTERVAL", "30"))
+        self.change_streams_available: Optional[bool] = None
+        self._poll_intervals: Dict[Optional[str], float] = {}  # Intervalle courant par lane
+        # Un signal par lane, créé d'avance: une notification reçue avant la première attente n'est pas perdue
+        self._wake_events: Dict[Optional[str], asyncio.Event] = {lane: asyncio.Event() for lane in [None, *LANES]}
+        self._watch_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Démarrer l'écoute du change stream"""
+        _local_dispatchers.add(self)
+        self._watch_task = asyncio.create_task(self._watch_queue(), name="video-queue-change-stream")
+
+    async def stop(self):
+        """Arrêter l'écoute du change stream"""
+        _local_dispatchers.discard(self)
+        if self._watch_task:
+            self._watch_task.cancel()
+            await asyncio.gather(self._watch_task, return_exceptions=True)
+            self._watch_task = None
+
+    def notify(self):
+        """Signaler à toutes les lanes qu'un job est peut-être disponible"""
+        for event in self._wake_events.values():
+            event.set()
+
+    def reset_backoff(self, lane: Optional[str] = None):
+        """Un job a été trouvé: revenir à l'intervalle de polling minimal"""
+        self._poll_intervals[lane] = self.min_poll_interval
+
+    def poll_interval(self, lane: Optional[str] = None) -> float:
+        """Intervalle de polling courant d'une lane"""
+        return self._poll_intervals.get(lane, self.min_poll_interval)
+
+    async def wait_for_work(self, lane: Optional[str] = None):
+        """
+        Attendre qu'un job soit potentiellement disponible.
+
+        Avec un change stream, on attend le prochain insert (avec un timeout de
+        sécurité). Sinon, on attend l'intervalle courant de la lane puis on le double.
+        """
+        if self.change_streams_available:
+            timeout = self.max_poll_interval
+        else:
+            timeout = self.poll_interval(lane)
+            self._poll_intervals[lane] = min(timeout * 2, self.max_poll_interval)
+
+        event = self._wake_events.setdefault(lane, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        event.clear()
+
+    async def _watch_queue(self):
+        """Écouter les jobs insérés ou remis en queue"""
+        pipeline = [{
+            "$match": {
+                "$or": [
+                    {"operationType": "insert"},
+                    {
+                        "operationType": "update",
+                        "updateDescription.updatedFields.status": JobStatus.QUEUED.value
+                    }
+                ]
+            }
+        }]
+
+        while True:
+            try:
+                async with self.queue_collection.watch(pipeline) as stream:
+                    if not self.change_streams_available:
+                        print("📡 Queue dispatcher: listening to video_queue change stream")
+                    self.change_streams_available = True
+                    async for _ in stream:
+                        self.notify()
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_NOT_SUPPORTED:
+                    print("⚠️ Change streams unavailable (standalone MongoDB), falling back to backoff polling")
+                    self.change_streams_available = False
+                    return
+                print(f"⚠️ Change stream error: {e}")
+            except PyMongoError as e:
+                print(f"⚠️ Change stream interrupted: {e}")
+
+            # Stream interrompu: polling en attendant de pouvoir le rouvrir
+            self.change_streams_available = False
+            self.notify()
+            await asyncio.sleep(self.max_poll_interval)
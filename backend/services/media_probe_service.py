@@ -0,0 +1,217 @@
+"""
+Sonde des médias sans décodage
+
+- MP3: en-têtes de trames MPEG lus directement dans le fichier (en-tête
+  Xing/Info et tag LAME si présents, sinon parcours des en-têtes de trames):
+  durée exacte à l'échantillon près, sans décoder l'audio
+- autres conteneurs: en-têtes lus par `ffmpeg -i` (sans décodage)
+
+Les résultats sont mémorisés par (chemin, mtime, taille): un fichier inchangé
+n'est jamais relu, qu'il soit sondé par l'audio, le rendu ou les templates.
+"""
+import mmap
+import os
+import re
+import struct
+import subprocess
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Résultats des sondes de ce process: (chemin, mtime_ns, taille) → métadonnées
+_probe_cache: "OrderedDict[Tuple[str, int, int], Dict[str, Any]]" = OrderedDict()
+PROBE_CACHE_SIZE = 1024
+
+# Débits (kbit/s) par (version MPEG 1 ou 2, couche) — MPEG 2.5 utilise les tables MPEG 2
+BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 25: [11025, 12000, 8000]}
+
+
+def _parse_frame_header(data, offset: int) -> Optional[Dict[str, int]]:
+    """En-tête de trame MPEG audio à `offset` (None si ce n'est pas un en-tête valide)"""
+    if offset + 4 > len(data):
+        return None
+    header = struct.unpack(">I", data[offset:offset + 4])[0]
+    if header >> 21 != 0x7FF:
+        return None
+    version_bits = (header >> 19) & 0x3
+    layer_bits = (header >> 17) & 0x3
+    bitrate_index = (header >> 12) & 0xF
+    sample_rate_index = (header >> 10) & 0x3
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    version = {3: 1, 2: 2, 0: 25}[version_bits]
+    layer = 4 - layer_bits
+    bitrate = BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = SAMPLE_RATES[version][sample_rate_index]
+    padding = (header >> 9) & 0x1
+    channels = 1 if (header >> 6) & 0x3 == 3 else 2
+
+    if layer == 1:
+        samples, length = 384, (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or version == 1:
+        samples, length = 1152, 144 * bitrate // sample_rate + padding
+    else:
+        samples, length = 576, 72 * bitrate // sample_rate + padding
+    return {
+        "version": version, "layer": layer, "bitrate": bitrate, "sample_rate": sample_rate,
+        "channels": channels, "samples": samples, "length": length,
+    }
+
+
+def _id3v2_size(data) -> int:
+    """Taille du tag ID3v2 en tête de fichier (0 s'il n'y en a pas)"""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _parse_xing(data, offset: int, frame: Dict[str, int]) -> Optional[Dict[str, int]]:
+    """En-tête Xing/Info (et tag LAME) d'une première trame: nombre de trames, délai et remplissage"""
+    side_info = (32 if frame["channels"] == 2 else 17) if frame["version"] == 1 else (17 if frame["channels"] == 2 else 9)
+    position = offset + 4 + side_info
+    if data[position:position + 4] not in (b"Xing", b"Info"):
+        return None
+    flags = struct.unpack(">I", data[position + 4:position + 8])[0]
+    position += 8
+    frames = None
+    if flags & 0x1:
+        frames = struct.unpack(">I", data[position:position + 4])[0]
+        position += 4
+    if flags & 0x2:
+        position += 4
+    if flags & 0x4:
+        position += 100
+    if flags & 0x8:
+        position += 4
+
+    delay = padding = 0
+    # Tag LAME: version (9), révision (1), passe-bas (1), replay gain (8), drapeaux (1), débit (1), délai/remplissage (3)
+    if data[position:position + 4] in (b"LAME", b"Lavf", b"Lavc"):
+        delay_padding = data[position + 21:position + 24]
+        if len(delay_padding) == 3:
+            delay = (delay_padding[0] << 4) | (delay_padding[1] >> 4)
+            padding = ((delay_padding[1] & 0x0F) << 8) | delay_padding[2]
+    return {"frames": frames, "delay": delay, "padding": padding}
+
+
+def probe_mp3(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Durée d'un MP3 lue dans les en-têtes de trames (None si le fichier n'est pas un MP3)
+
+    Avec un en-tête Xing/Info, le nombre de trames y est lu directement et le
+    délai/remplissage du tag LAME est retiré (durée identique au décodage).
+    Sinon, les en-têtes de trames sont parcourus de trame en trame.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offset = _id3v2_size(data)
+            first = _parse_frame_header(data, offset)
+            # Une trame valide est suivie d'une autre trame (ou de la fin du fichier)
+            if first is None or (
+                offset + first["length"] < len(data) - 128
+                and _parse_frame_header(data, offset + first["length"]) is None
+            ):
+                return None
+
+            xing = _parse_xing(data, offset, first)
+            delay = padding = 0
+            if xing:
+                delay, padding = xing["delay"], xing["padding"]
+                offset += first["length"]  # La trame Xing/Info ne contient pas d'audio
+            if xing and xing["frames"] is not None:
+                frames = xing["frames"]
+            else:
+                frames = 0
+                while True:
+                    frame = _parse_frame_header(data, offset)
+                    if frame is None or frame["length"] <= 0:
+                        break
+                    frames += 1
+                    offset += frame["length"]
+
+    samples = frames * first["samples"]
+    if xing:
+        # Convention LAME: le délai et le remplissage incluent déjà le retard du décodeur
+        samples = max(0, samples - delay - padding)
+    return {
+        "duration": samples / first["sample_rate"],
+        "width": None,
+        "height": None,
+        "fps": None,
+        "codec": None,
+        "audio_codec": "mp3",
+        "sample_rate": first["sample_rate"],
+    }
+
+
+def _probe_ffmpeg(path: str) -> Dict[str, Any]:
+    """Durée et flux lus dans la sortie de `ffmpeg -i` (en-têtes du conteneur, sans décodage)"""
+    from services.render_service import get_ffmpeg_binary
+
+    result = subprocess.run(
+        [get_ffmpeg_binary(), "-hide_banner", "-i", path],
+        capture_output=True, text=True
+    )
+    duration = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", result.stderr)
+    if not duration:
+        raise ValueError(f"Could not read media duration: {path}")
+    hours, minutes, seconds = duration.groups()
+    size = re.search(r"Stream #.*Video:.*?, (\d{2,5})x(\d{2,5})", result.stderr)
+    fps = re.search(r"Stream #.*Video:.*?, (\d+(?:\.\d+)?) fps", result.stderr)
+    codec = re.search(r"Stream #.*Video: (\w+)", result.stderr)
+    audio = re.search(r"Stream #.*Audio: (\w+).*?, (\d+) Hz", result.stderr)
+    return {
+        "duration": int(hours) * 3600 + int(minutes) * 60 + float(seconds),
+        "width": int(size.group(1)) if size else None,
+        "height": int(size.group(2)) if size else None,
+        "fps": float(fps.group(1)) if fps else None,
+        "codec": codec.group(1) if codec else None,
+        "audio_codec": audio.group(1) if audio else None,
+        "sample_rate": int(audio.group(2)) if audio else None,
+    }
+
+
+def probe_media(path: str) -> Dict[str, Any]:
+    """
+    Durée (secondes) et flux d'un fichier, mémorisés par (chemin, mtime, taille)
+
+    Returns:
+        {"duration": float, "width": int | None, "height": int | None,
+         "fps": float | None, "codec": str | None,
+         "audio_codec": str | None, "sample_rate": int | None}
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if key in _probe_cache:
+        _probe_cache.move_to_end(key)
+        return dict(_probe_cache[key])
+
+    info = None
+    if path.lower().endswith(".mp3"):
+        info = probe_mp3(path)
+    if info is None:
+        info = _probe_ffmpeg(path)
+
+    _probe_cache[key] = info
+    while len(_probe_cache) > PROBE_CACHE_SIZE:
+        _probe_cache.popitem(last=False)
+    return dict(info)
+
+
+def get_duration_ms(path: str) -> int:
+    """Durée d'un fichier en millisecondes"""
+    return round(probe_media(path)["duration"] * 1000)
@@ -0,0 +1,203 @@
+"""
+Étapes du pipeline de génération vidéo et lanes d'exécution
+
+Chaque étape d'un job est exécutée dans une lane dont la concurrence est
+limitée par sa ressource goulot: appels LLM, clés ElevenLabs ou cœurs CPU.
+"""
+import os
+from typing import Dict, List, Optional, Tuple
+
+# Ordre d'exécution des étapes d'un job
+PIPELINE_STAGES = ["script", "adapt", "audio", "video"]
+
+# Lane dans laquelle chaque étape est exécutée
+STAGE_LANES = {
+    "script": "llm",
+    "adapt": "llm",
+    "audio": "tts",
+    "video": "render",
+}
+
+LANES = ["llm", "tts", "render"]
+
+# start_from → (première étape, dernière étape) pour une régénération
+REGENERATION_STAGES = {
+    "script": ("script", "script"),
+    "adapt": ("adapt", "audio"),
+    "audio": ("adapt", "audio"),  # L'audio est toujours régénéré à partir d'un script ré-adapté
+    "video": ("video", "video"),
+}
+
+# start_from → première étape pour le pipeline complet
+PIPELINE_START_STAGES = {
+    "script": "script",
+    "adapt": "adapt",
+    "audio": "adapt",
+    "video": "video",
+}
+
+
+def resolve_stages(start_from: str, is_regeneration: bool = False) -> Tuple[str, str]:
+    """Retourne (première étape, dernière étape) à exécuter pour un job"""
+    if is_regeneration:
+        if start_from not in REGENERATION_STAGES:
+            raise ValueError(f"Unsupported regeneration step: {start_from}")
+        return REGENERATION_STAGES[start_from]
+
+    return PIPELINE_START_STAGES.get(start_from, "script"), PIPELINE_STAGES[-1]
+
+
+def next_stage(stage: str, end_stage: str) -> Optional[str]:
+    """Étape suivante d'un job, None si `stage` était la dernière"""
+    if stage == end_stage:
+        return None
+    index = PIPELINE_STAGES.index(stage)
+    if index + 1 >= len(PIPELINE_STAGES):
+        return None
+    return PIPELINE_STAGES[index + 1]
+
+
+def stage_range(first_stage: str, last_stage: str) -> List[str]:
+    """Étapes de `first_stage` à `last_stage` incluses, dans l'ordre du pipeline"""
+    start = PIPELINE_STAGES.index(first_stage)
+    end = PIPELINE_STAGES.index(last_stage)
+    return PIPELINE_STAGES[start:end + 1]
+
+
+def lane_stages(lane: str) -> List[str]:
+    """Étapes traitées par une lane"""
+    return [stage for stage in PIPELINE_STAGES if STAGE_LANES[stage] == lane]
+
+
+def count_elevenlabs_keys() -> int:
+    """Nombre de clés ElevenLabs configurées (ELEVENLABS_API_KEY1..5)"""
+    return sum(
+        1 for i in range(1, 6)
+        if (os.getenv(f"ELEVENLABS_API_KEY{i}") or "").startswith("sk_")
+    )
+
+
+def get_enabled_lanes() -> List[str]:
+    """
+    Lanes traitées par ce nœud (WORKER_LANES, ex: "render" pour une machine de rendu)
+    Par défaut toutes les lanes.
+    """
+    configured = os.getenv("WORKER_LANES", "")
+    lanes = [lane.strip() for lane in configured.split(",") if lane.strip()]
+    unknown = [lane for lane in lanes if lane not in LANES]
+    if unknown:
+        raise ValueError(f"Unknown worker lanes: {', '.join(unknown)}")
+    return lanes or list(LANES)
+
+
+def get_available_memory_mb() -> Optional[int]:
+    """RAM disponible sur la machine en Mo (None si non mesurable sur cette plateforme)"""
+    try:
+        return int(os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024))
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def get_total_memory_mb() -> Optional[int]:
+    """RAM totale de la machine en Mo (None si non mesurable sur cette plateforme)"""
+    try:
+        return int(os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024))
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def get_memory_limit_mb() -> Optional[int]:
+    """Limite mémoire du conteneur (cgroup v2 puis v1), sinon RAM totale de la machine"""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        # "max" (v2) ou valeur géante (v1): pas de limite
+        if value.isdigit() and int(value) < 2 ** 60:
+            return int(value) // (1024 * 1024)
+    return get_total_memory_mb()
+
+
+def get_descendant_pids(pid: Optional[int] = None) -> Optional[List[int]]:
+    """
+    Descendants d'un process (enfants, petits-enfants...), du plus proche au plus lointain
+    None si /proc n'est pas disponible
+    """
+    pid = pid or os.getpid()
+    try:
+        entries = [int(entry) for entry in os.listdir("/proc") if entry.isdigit()]
+    except OSError:
+        return None
+
+    children: Dict[int, List[int]] = {}
+    for entry in entries:
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Le nom du process (entre parenthèses) peut contenir des espaces
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(entry)
+
+    descendants = []
+    pending = list(children.get(pid, []))
+    while pending:
+        current = pending.pop(0)
+        descendants.append(current)
+        pending.extend(children.get(current, []))
+    return descendants
+
+
+def get_process_tree_rss_mb(pid: Optional[int] = None) -> Optional[int]:
+    """
+    RSS cumulée d'un process et de tous ses descendants en Mo (process de rendu et ffmpeg compris)
+    None si /proc n'est pas disponible
+    """
+    pid = pid or os.getpid()
+    descendants = get_descendant_pids(pid)
+    if descendants is None:
+        return None
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    for current in [pid, *descendants]:
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            pass
+    return total // (1024 * 1024)
+
+
+def get_render_slots() -> int:
+    """Process de rendu simultanés supportés par la machine: un par cœur CPU, dans la limite de la RAM libre"""
+    slots = os.cpu_count() or 1
+    available_mb = get_available_memory_mb()
+    if available_mb is not None:
+        render_memory_mb = int(os.getenv("RENDER_MEMORY_MB", "1500"))
+        slots = max(1, min(slots, available_mb // render_memory_mb))
+    return slots
+
+
+def get_lane_limits() -> Dict[str, int]:
+    """
+    Concurrence maximale de chaque lane sur ce nœud
+
+    - llm: appels réseau, beaucoup en parallèle (LLM_LANE_CONCURRENCY)
+    - tts: TTS_CONCURRENCY_PER_KEY jobs par clé ElevenLabs (ou TTS_LANE_CONCURRENCY)
+    - render: un rendu par cœur CPU, dans la limite de la RAM libre
+      (RENDER_MEMORY_MB par rendu), ou RENDER_LANE_CONCURRENCY
+    - 0 pour les lanes désactivées par WORKER_LANES
+    """
+    per_key = int(os.getenv("TTS_CONCURRENCY_PER_KEY", "1"))
+    tts_default = max(1, count_elevenlabs_keys() * per_key)
+
+    limits = {
+        "llm": int(os.getenv("LLM_LANE_CONCURRENCY", "8")),
+        "tts": int(os.getenv("TTS_LANE_CONCURRENCY", str(tts_default))),
+        "render": int(os.getenv("RENDER_LANE_CONCURRENCY", str(get_render_slots()))),
+    }
+    enabled = get_enabled_lanes()
+    return {lane: (limit if lane in enabled else 0) for lane, limit in limits.items()}
@@ -33,7 +33,8 @@ class PublicationService:
                     {"youtube_video_id": ""}                   # champ vide
                 ],
                 "scheduled_publish_date": {"$lte": current_time},
-                "upload_attempts": {"$lt": 5}  # Ignorer les vidéos avec 5 tentatives ou plus
+                "upload_attempts": {"$lt": 5},  # Ignorer les vidéos avec 5 tentatives ou plus
+                "render_quality": {"$ne": "preview"}  # Attendre la fin du rendu final
             }).to_list(length=100)
         
         return scheduled_videos
@@ -1,23 +1,144 @@
 """
 Service de gestion de la queue de génération vidéo
 """
-from datetime import datetime
-from typing import Optional, List
+import asyncio
+from datetime import datetime, timedelta
+from bisect import bisect_left
+from typing import Dict, Optional, List, Tuple
+from pymongo import ASCENDING, DESCENDING
 from models import VideoJob, JobStatus, IdeaStatus
-from database import get_queue_collection, get_ideas_collection
+from database import get_queue_collection, get_ideas_collection, get_videos_collection, get_stage_checkpoints_collection
+from services.job_dispatcher import notify_local_dispatchers
+from services.pipeline_stages import LANES, STAGE_LANES, resolve_stages, stage_range
+from services.checkpoint_service import CheckpointService
+from services.worker_registry_service import WorkerRegistryService
+from helpers.datetime_utils import to_mongo_precision
 import os
 
+# Durée par défaut d'une étape (secondes) tant qu'aucun historique n'existe
+DEFAULT_STAGE_SECONDS = {
+    "script": 60,
+    "adapt": 30,
+    "audio": 180,
+    "video": 300,
+}
+
+
+class LeaseLostError(Exception):
+    """Le bail du job a été perdu (job repris par un autre worker): ses résultats ne doivent pas être publiés"""
+
+
+# Statut de l'idée → étape de départ d'un job de pipeline complet
+STATUS_START_FROM = {
+    IdeaStatus.PENDING: "script",
+    IdeaStatus.QUEUED: "script",
+    IdeaStatus.SCRIPT_GENERATING: "script",
+    IdeaStatus.SCRIPT_GENERATED: "audio",
+    IdeaStatus.AUDIO_GENERATING: "audio",
+    IdeaStatus.AUDIO_GENERATED: "video",
+    IdeaStatus.VIDEO_GENERATING: "video",
+    IdeaStatus.VIDEO_GENERATED: "video",  # Déjà généré, mais pourrait être pour re-génération
+    IdeaStatus.ERROR: "script",  # En cas d'erreur, recommencer depuis le début
+}
+
 class QueueService:
     """Gestionnaire de queue pour les jobs de génération vidéo"""
     
     def __init__(self):
         self.max_concurrent = int(os.getenv("MAX_CONCURRENT_VIDEO_JOBS", "2"))
+        self.lease_seconds = int(os.getenv("JOB_LEASE_SECONDS", "120"))
+        self.max_lease_expirations = int(os.getenv("JOB_MAX_LEASE_EXPIRATIONS", "3"))
+        # "priority" (priorité puis ancienneté) ou "edf" (échéance la plus proche d'abord)
+        self.scheduling_mode = os.getenv("QUEUE_SCHEDULING_MODE", "priority")
+        self.aging_hours = float(os.getenv("QUEUE_AGING_HOURS", "24"))
+        self.priority_boost_minutes = float(os.getenv("QUEUE_PRIORITY_BOOST_MINUTES", "60"))
+        # Positions de plusieurs jobs: un comptage par job jusqu'à ce seuil, une lecture de la queue au-delà
+        self.position_count_max_jobs = int(os.getenv("QUEUE_POSITION_COUNT_MAX_JOBS", "10"))
         self.queue_collection = get_queue_collection()
         self.ideas_collection = get_ideas_collection()
     
-    async def add_job(self, idea_id: str, start_from: str = "script", priority: int = 0, is_regeneration: bool = False) -> VideoJob:
+    async def ensure_indexes(self):
+        """
+        Index de la queue (idempotent)
+        
+        - (status, priority, created_at) et (status, schedule_key, created_at):
+          claim, positions et comptages par statut en parcours d'index
+        - (idea_id, created_at): dernier job d'une idée
+        - started_at / completed_at: statistiques du jour
+        """
+        await self.queue_collection.create_index(
+            [("status", ASCENDING), ("priority", DESCENDING), ("created_at", ASCENDING)],
+            name="status_priority_created_at"
+        )
+        await self.queue_collection.create_index(
+            [("status", ASCENDING), ("schedule_key", ASCENDING), ("created_at", ASCENDING)],
+            name="status_schedule_key_created_at"
+        )
+        await self.queue_collection.create_index([("idea_id", ASCENDING), ("created_at", DESCENDING)], name="idea_created_at")
+        await self.queue_collection.create_index([("started_at", ASCENDING)], name="started_at")
+        await self.queue_collection.create_index([("completed_at", ASCENDING)], name="completed_at")
+    
+    def _queue_sort(self) -> List[Tuple[str, int]]:
+        """Ordre de traitement des jobs selon le mode d'ordonnancement"""
+        if self.scheduling_mode == "edf":
+            return [("schedule_key", 1), ("created_at", 1)]
+        return [("priority", -1), ("created_at", 1)]
+    
+    async def estimate_stage_seconds(self) -> Dict[str, float]:
+        """Durée moyenne de chaque étape d'après les checkpoints des 7 derniers jours"""
+        estimates = dict(DEFAULT_STAGE_SECONDS)
+        cursor = get_stage_checkpoints_collection().aggregate([
+            {"$match": {
+                "completed_at": {"$gte": datetime.now() - timedelta(days=7)},
+                "duration_seconds": {"$ne": None}
+            }},
+            {"$group": {"_id": "$stage", "avg_seconds": {"$avg": "$duration_seconds"}}}
+        ])
+        async for row in cursor:
+            if row["_id"] in estimates:
+                estimates[row["_id"]] = row["avg_seconds"]
+        return estimates
+    
+    async def get_idea_deadline(self, idea_id: str) -> Optional[datetime]:
+        """Date de publication programmée de la vidéo liée à l'idée"""
+        video = await get_videos_collection().find_one(
+            {"idea_id": idea_id, "scheduled_publish_date": {"$type": "date"}},
+            {"_id": 0, "scheduled_publish_date": 1},
+            sort=[("created_at", -1)]
+        )
+        return video["scheduled_publish_date"] if video else None
+    
+    def compute_schedule_key(self, deadline: Optional[datetime], queued_at: datetime, priority: int, estimated_seconds: float) -> datetime:
+        """
+        Clé de tri EDF: date de démarrage au plus tard
+        
+        - avec échéance: échéance - durée estimée des étapes restantes
+        - sans échéance: mise en queue + QUEUE_AGING_HOURS, de sorte qu'un job
+          ancien finisse par passer devant des échéances lointaines (vieillissement)
+        - chaque point de priorité avance la clé de QUEUE_PRIORITY_BOOST_MINUTES
+        """
+        if deadline:
+            key = deadline - timedelta(seconds=estimated_seconds)
+        else:
+            key = queued_at + timedelta(hours=self.aging_hours)
+        # Précision MongoDB: la clé gardée en mémoire est identique à la clé stockée
+        return to_mongo_precision(key - timedelta(minutes=priority * self.priority_boost_minutes))
+    
+    async def _schedule_fields(self, deadline: Optional[datetime], queued_at: datetime, priority: int, stage: str, end_stage: str, estimates: Optional[Dict[str, float]] = None) -> dict:
+        """Champs d'ordonnancement d'un job mis en queue à `stage`"""
+        estimates = estimates or await self.estimate_stage_seconds()
+        estimated_seconds = sum(estimates[s] for s in stage_range(stage, end_stage))
+        return {
+            "estimated_seconds": estimated_seconds,
+            "schedule_key": self.compute_schedule_key(deadline, queued_at, priority, estimated_seconds)
+        }
+    
+    async def add_job(self, idea_id: str, start_from: str = "script", priority: int = 0, is_regeneration: bool = False, deadline: Optional[datetime] = None) -> VideoJob:
         """
         Ajouter un job à la queue
+        
+        Args:
+            deadline: Échéance du job (par défaut la date de publication programmée de la vidéo)
         """
         # Vérifier si un job existe déjà pour cette idée
         existing_job = await self.queue_collection.find_one({
@@ -37,35 +158,39 @@ class QueueService:
         idea = await self.ideas_collection.find_one({"id": idea_id}, {"_id": 0})
         current_idea_status = idea.get("status") if idea else None
         
-        # Mapper le statut de l'idée vers l'étape de départ appropriée
-        status_to_start_from_map = {
-            IdeaStatus.PENDING: "script",
-            IdeaStatus.QUEUED: "script",
-            IdeaStatus.SCRIPT_GENERATING: "script",
-            IdeaStatus.SCRIPT_GENERATED: "audio",
-            IdeaStatus.AUDIO_GENERATING: "audio",
-            IdeaStatus.AUDIO_GENERATED: "video",
-            IdeaStatus.VIDEO_GENERATING: "video",
-            IdeaStatus.VIDEO_GENERATED: "video",  # Déjà généré, mais pourrait être pour re-génération
-            IdeaStatus.ERROR: "script",  # En cas d'erreur, recommencer depuis le début
-        }
-        
         # Utiliser le statut de l'idée pour déterminer l'étape de départ, sauf si spécifié explicitement OU si c'est une régénération
         if not is_regeneration and start_from == "script" and current_idea_status:
-            calculated_start_from = status_to_start_from_map.get(current_idea_status, "script")
+            calculated_start_from = STATUS_START_FROM.get(current_idea_status, "script")
             print(f"📍 Détermination automatique de l'étape de départ: '{current_idea_status}' -> '{calculated_start_from}'")
             start_from = calculated_start_from
         
+        # Étapes du pipeline couvertes par ce job
+        stage, end_stage = resolve_stages(start_from, is_regeneration)
+        
+        # Une régénération rend obsolètes les sorties de ses étapes et de celles qui en dépendent
+        if is_regeneration:
+            await CheckpointService().invalidate(idea_id, stage)
+        
         # Créer un nouveau job
         job = VideoJob(
             idea_id=idea_id,
             start_from=start_from,
+            stage=stage,
+            end_stage=end_stage,
             priority=priority,
             status=JobStatus.QUEUED,
-            is_regeneration=is_regeneration # Passer le nouveau champ
+            is_regeneration=is_regeneration, # Passer le nouveau champ
+            deadline=deadline or await self.get_idea_deadline(idea_id)
         )
+        # MongoDB stocke les dates à la milliseconde: le job retourné (utilisé pour sa position) doit trier comme sa copie stockée
+        job.created_at = to_mongo_precision(job.created_at)
+        job.queued_at = job.created_at
+        schedule = await self._schedule_fields(job.deadline, job.queued_at, priority, stage, end_stage)
+        job.estimated_seconds = schedule["estimated_seconds"]
+        job.schedule_key = schedule["schedule_key"]
         
         await self.queue_collection.insert_one(job.model_dump())
+        notify_local_dispatchers()
         
         # Mettre à jour le statut de l'idée
         new_idea_status = IdeaStatus.QUEUED
@@ -92,37 +217,136 @@ class QueueService:
         print(f"✅ Job added to queue: {job.job_id} for idea {idea_id} (start_from: {start_from}, regeneration: {is_regeneration})")
         return job
     
+    async def get_idea_deadlines(self, idea_ids: List[str]) -> Dict[str, datetime]:
+        """Date de publication programmée de la dernière vidéo de chaque idée, en une requête"""
+        cursor = get_videos_collection().aggregate([
+            {"$match": {"idea_id": {"$in": idea_ids}, "scheduled_publish_date": {"$type": "date"}}},
+            {"$sort": {"created_at": -1}},
+            {"$group": {"_id": "$idea_id", "deadline": {"$first": "$scheduled_publish_date"}}}
+        ])
+        return {row["_id"]: row["deadline"] async for row in cursor}
+    
+    async def add_jobs(self, items: List[Tuple[str, int]]) -> dict:
+        """
+        Ajouter en une fois les jobs de pipeline complet de plusieurs idées
+        
+        Une requête $in pour les idées et une pour les jobs existants,
+        un insert_many, un update_many, puis les positions en batch.
+        
+        Args:
+            items: (idea_id, priority) pour chaque idée
+            
+        Returns:
+            {"jobs": idea_id → VideoJob (nouveau ou existant),
+             "created": idea_ids mis en queue, "existing": idea_ids déjà en queue,
+             "not_found": idea_ids inconnus, "positions": idea_id → position}
+        """
+        priorities = dict(items)  # Une idée répétée ne donne qu'un job (dernière priorité)
+        idea_ids = list(priorities)
+        
+        ideas = {
+            idea["id"]: idea
+            async for idea in self.ideas_collection.find({"id": {"$in": idea_ids}}, {"_id": 0, "id": 1, "status": 1})
+        }
+        existing_jobs = {
+            job_data["idea_id"]: VideoJob(**job_data)
+            async for job_data in self.queue_collection.find({
+                "idea_id": {"$in": idea_ids},
+                "status": {"$in": [JobStatus.QUEUED, JobStatus.PROCESSING]}
+            })
+        }
+        
+        to_create = [idea_id for idea_id in idea_ids if idea_id in ideas and idea_id not in existing_jobs]
+        deadlines = await self.get_idea_deadlines(to_create) if to_create else {}
+        estimates = await self.estimate_stage_seconds()
+        
+        new_jobs = []
+        for idea_id in to_create:
+            start_from = STATUS_START_FROM.get(ideas[idea_id].get("status"), "script")
+            stage, end_stage = resolve_stages(start_from)
+            job = VideoJob(
+                idea_id=idea_id,
+                start_from=start_from,
+                stage=stage,
+                end_stage=end_stage,
+                priority=priorities[idea_id],
+                status=JobStatus.QUEUED,
+                deadline=deadlines.get(idea_id)
+            )
+            # Même précision que la copie stockée: la position du job ne le compte pas lui-même
+            job.created_at = to_mongo_precision(job.created_at)
+            job.queued_at = job.created_at
+            schedule = await self._schedule_fields(job.deadline, job.queued_at, job.priority, stage, end_stage, estimates)
+            job.estimated_seconds = schedule["estimated_seconds"]
+            job.schedule_key = schedule["schedule_key"]
+            new_jobs.append(job)
+        
+        if new_jobs:
+            await self.queue_collection.insert_many([job.model_dump() for job in new_jobs])
+            await self.ideas_collection.update_many(
+                {"id": {"$in": to_create}},
+                {"$set": {
+                    "status": IdeaStatus.QUEUED,
+                    "current_step": "En attente dans la queue"
+                }}
+            )
+            notify_local_dispatchers()
+            print(f"✅ {len(new_jobs)} jobs added to queue in batch")
+        
+        jobs = {**existing_jobs, **{job.idea_id: job for job in new_jobs}}
+        return {
+            "jobs": jobs,
+            "created": to_create,
+            "existing": [idea_id for idea_id in idea_ids if idea_id in existing_jobs],
+            "not_found": [idea_id for idea_id in idea_ids if idea_id not in ideas],
+            "positions": await self.get_queue_positions(list(jobs.values()))
+        }
+    
     async def list_all_jobs(self, status: Optional[JobStatus] = None,) -> List[VideoJob]:
         """
         Lister tous les jobs
-        Triés par: priority DESC, created_at ASC
+        Triés par: priority DESC, created_at ASC (ou échéance en mode EDF)
         """
         query = {}
         if status:
             query["status"] = status
             
         jobs = []
-        cursor = self.queue_collection.find(query).sort([("priority", -1), ("created_at", 1)])
+        cursor = self.queue_collection.find(query).sort(self._queue_sort())
         
         async for job_data in cursor:
             jobs.append(VideoJob(**job_data))
         
         return jobs
 
-    async def get_next_job(self) -> Optional[VideoJob]:
+    async def get_next_job(self, stages: Optional[List[str]] = None, worker_id: Optional[str] = None) -> Optional[VideoJob]:
         """
-        Récupérer le prochain job à traiter
+        Récupérer le prochain job à traiter et prendre un bail dessus
         Priorise par: priority DESC, created_at ASC
+        (mode EDF: schedule_key ASC, c'est-à-dire le démarrage au plus tard le plus proche)
+        Enregistre aussi le délai d'attente en queue (queue_latency_ms)
+        
+        Args:
+            stages: Étapes acceptées (lane du worker). None = toutes les étapes
+            worker_id: Identifiant du worker qui réclame le job
         """
+        query = {"status": JobStatus.QUEUED}
+        if stages:
+            query["stage"] = {"$in": stages}
+        
+        now = datetime.now()
         job_data = await self.queue_collection.find_one_and_update(
-            {"status": JobStatus.QUEUED},
-            {
+            query,
+            [{
                 "$set": {
-                    "status": JobStatus.PROCESSING,
-                    "started_at": datetime.now()
+                    "status": JobStatus.PROCESSING.value,
+                    "started_at": now,
+                    "worker_id": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                    "queue_latency_ms": {"$subtract": [now, {"$ifNull": ["$queued_at", "$created_at"]}]}
                 }
-            },
-            sort=[("priority", -1), ("created_at", 1)],
+            }],
+            sort=self._queue_sort(),
             return_document=True
         )
         
@@ -137,11 +361,6 @@ class QueueService:
         })
         return count
     
-    async def can_process_more(self) -> bool:
-        """Vérifier si on peut traiter plus de jobs"""
-        processing_count = await self.get_processing_count()
-        return processing_count < self.max_concurrent
-    
     async def complete_job(self, job_id: str):
         """Marquer un job comme complété"""
         await self.queue_collection.update_one(
@@ -149,19 +368,157 @@ class QueueService:
             {
                 "$set": {
                     "status": JobStatus.COMPLETED,
-                    "completed_at": datetime.now()
+                    "completed_at": datetime.now(),
+                    "lease_expires_at": None
                 }
             }
         )
         print(f"✅ Job completed: {job_id}")
     
+    async def advance_job(self, job_id: str, stage: str):
+        """Remettre un job en queue pour son étape suivante"""
+        job_data = await self.queue_collection.find_one({"job_id": job_id})
+        if not job_data:
+            return
+        job = VideoJob(**job_data)
+        now = datetime.now()
+        # Moins d'étapes restantes: le démarrage au plus tard recule (sans échéance, l'âge du job est conservé)
+        schedule = await self._schedule_fields(
+            job.deadline, job.created_at, job.priority, stage, job.end_stage or resolve_stages(job.start_from, job.is_regeneration)[1]
+        )
+        await self.queue_collection.update_one(
+            {"job_id": job_id},
+            {
+                "$set": {
+                    "status": JobStatus.QUEUED,
+                    "stage": stage,
+                    "started_at": None,
+                    "worker_id": None,
+                    "lease_expires_at": None,
+                    "queued_at": now,
+                    **schedule
+                }
+            }
+        )
+        notify_local_dispatchers()
+        print(f"➡️ Job {job_id} moved to stage '{stage}'")
+    
+    async def renew_lease(self, job_id: str, worker_id: str) -> bool:
+        """
+        Prolonger le bail d'un job en cours (heartbeat)
+        Retourne False si le job n'appartient plus à ce worker (bail expiré et job repris)
+        """
+        result = await self.queue_collection.update_one(
+            {"job_id": job_id, "worker_id": worker_id, "status": JobStatus.PROCESSING},
+            {"$set": {"lease_expires_at": datetime.now() + timedelta(seconds=self.lease_seconds)}}
+        )
+        return result.matched_count == 1
+    
+    async def requeue_expired_leases(self) -> int:
+        """
+        Remettre en queue, à leur étape courante, les jobs dont le worker a disparu
+        
+        Un job dont le bail a expiré trop souvent (worker tué à chaque tentative,
+        par exemple par l'OOM killer) est marqué comme échoué.
+        Les jobs PROCESSING antérieurs aux baux sont repris après JOB_LEASE_SECONDS.
+        """
+        now = datetime.now()
+        cursor = self.queue_collection.find({
+            "status": JobStatus.PROCESSING,
+            "$or": [
+                {"lease_expires_at": {"$lt": now}},
+                {"lease_expires_at": None, "started_at": {"$lt": now - timedelta(seconds=self.lease_seconds)}}
+            ]
+        })
+        
+        reclaimed = 0
+        async for job_data in cursor:
+            job = VideoJob(**job_data)
+            # Ne toucher au job que s'il est toujours dans l'état observé (autre reaper, heartbeat tardif)
+            guard = {
+                "job_id": job.job_id,
+                "status": JobStatus.PROCESSING,
+                "lease_expires_at": job_data.get("lease_expires_at")
+            }
+            error_message = f"Lease expired on worker {job.worker_id or 'unknown'} during stage '{job.stage}'"
+            
+            if job.lease_expirations + 1 < self.max_lease_expirations:
+                result = await self.queue_collection.update_one(guard, {
+                    "$set": {
+                        "status": JobStatus.QUEUED,
+                        "started_at": None,
+                        "worker_id": None,
+                        "lease_expires_at": None,
+                        "queued_at": now,
+                        "error_message": error_message
+                    },
+                    "$inc": {"lease_expirations": 1}
+                })
+                if result.modified_count:
+                    reclaimed += 1
+                    print(f"♻️ {error_message}: job {job.job_id} requeued")
+            else:
+                result = await self.queue_collection.update_one(guard, {
+                    "$set": {
+                        "status": JobStatus.FAILED,
+                        "completed_at": now,
+                        "lease_expires_at": None,
+                        "error_message": error_message
+                    },
+                    "$inc": {"lease_expirations": 1}
+                })
+                if result.modified_count:
+                    reclaimed += 1
+                    await self.ideas_collection.update_one(
+                        {"id": job.idea_id},
+                        {"$set": {"status": IdeaStatus.ERROR, "error_message": error_message}}
+                    )
+                    print(f"❌ {error_message}: job {job.job_id} failed after {job.lease_expirations + 1} lost leases")
+        
+        if reclaimed:
+            notify_local_dispatchers()
+        return reclaimed
+    
+    async def backfill_job_stages(self):
+        """Renseigner l'étape et la clé d'ordonnancement des jobs en attente créés avant leur introduction"""
+        cursor = self.queue_collection.find({
+            "status": JobStatus.QUEUED,
+            "$or": [{"stage": {"$exists": False}}, {"schedule_key": None}]
+        })
+        async for job_data in cursor:
+            job = VideoJob(**job_data)
+            stage, end_stage = resolve_stages(job.start_from, job.is_regeneration)
+            stage = job.stage or stage
+            end_stage = job.end_stage or end_stage
+            deadline = job.deadline or await self.get_idea_deadline(job.idea_id)
+            schedule = await self._schedule_fields(deadline, job.created_at, job.priority, stage, end_stage)
+            await self.queue_collection.update_one(
+                {"job_id": job.job_id},
+                {"$set": {"stage": stage, "end_stage": end_stage, "deadline": deadline, **schedule}}
+            )
+    
+    async def refresh_job_deadline(self, idea_id: str):
+        """Recalculer l'échéance du job en attente d'une idée après (dé)programmation de sa vidéo"""
+        job_data = await self.queue_collection.find_one({"idea_id": idea_id, "status": JobStatus.QUEUED})
+        if not job_data:
+            return
+        job = VideoJob(**job_data)
+        deadline = await self.get_idea_deadline(idea_id)
+        stage = job.stage or resolve_stages(job.start_from, job.is_regeneration)[0]
+        end_stage = job.end_stage or resolve_stages(job.start_from, job.is_regeneration)[1]
+        schedule = await self._schedule_fields(deadline, job.created_at, job.priority, stage, end_stage)
+        await self.queue_collection.update_one(
+            {"job_id": job.job_id, "status": JobStatus.QUEUED},
+            {"$set": {"deadline": deadline, **schedule}}
+        )
+    
     async def fail_job(self, job_id: str, error_message: str):
         """
         Marquer un job comme échoué avec reprise intelligente
         
-        Si le job peut être retenté, il sera remis en queue avec un start_from
-        correspondant à la dernière étape réussie, évitant ainsi de refaire
-        tout le pipeline depuis le début.
+        Si le job peut être retenté, il est remis en queue à sa première étape
+        sans checkpoint vérifié: les étapes dont les sorties sont intactes
+        (script, adaptation, audio) ne sont pas refaites.
         """
         job_data = await self.queue_collection.find_one({"job_id": job_id})
         
@@ -171,21 +528,14 @@ class QueueService:
         job = VideoJob(**job_data)
         retry_count = job.retry_count + 1
         
-        # Récupérer la dernière étape réussie de l'idée
-        idea = await self.ideas_collection.find_one({"id": job.idea_id}, {"_id": 0})
-        last_successful = idea.get("last_successful_step") if idea else None
-        
-        # Mapper la dernière étape réussie vers l'étape de démarrage pour le retry
-        next_step_map = {
-            "script_generated": "adapt",
-            "script_adapted": "audio",
-            "audio_generated": "video",
-            None: "script"  # Aucune étape réussie, recommencer depuis le début
-        }
-        
-        next_step = next_step_map.get(last_successful, "script")
+        # Étapes du job jusqu'à celle qui a échoué
+        first_stage, _ = resolve_stages(job.start_from, job.is_regeneration)
+        failed_stage = job.stage or first_stage
+        resume_stage = await CheckpointService().first_incomplete_stage(
+            job.idea_id, stage_range(first_stage, failed_stage)
+        ) or failed_stage
         
-        # Si on peut retry, remettre en queue avec la bonne étape
+        # Si on peut retry, remettre en queue à la première étape incomplète
         if retry_count < job.max_retries:
             await self.queue_collection.update_one(
                 {"job_id": job_id},
@@ -195,12 +545,16 @@ class QueueService:
                         "retry_count": retry_count,
                         "error_message": error_message,
                         "started_at": None,
-                        "start_from": next_step  # ✨ REPRISE INTELLIGENTE
+                        "worker_id": None,
+                        "lease_expires_at": None,
+                        "queued_at": datetime.now(),
+                        "stage": resume_stage  # ✨ REPRISE INTELLIGENTE
                     }
                 }
             )
+            notify_local_dispatchers()
             print(f"⚠️ Job {job_id} failed, retry {retry_count}/{job.max_retries}")
-            print(f"📍 Will resume from step: '{next_step}' (last successful: '{last_successful}')")
+            print(f"📍 Will resume from stage: '{resume_stage}' (failed at: '{failed_stage}')")
         else:
             # Max retries atteint
             await self.queue_collection.update_one(
@@ -209,7 +563,8 @@ class QueueService:
                     "$set": {
                         "status": JobStatus.FAILED,
                         "completed_at": datetime.now(),
-                        "error_message": error_message
+                        "error_message": error_message,
+                        "lease_expires_at": None
                     }
                 }
             )
@@ -228,6 +583,23 @@ class QueueService:
         )
         print(f"⚠️ Job cancelled: {job_id}")
     
+    async def request_final_render(self, idea_id: str) -> VideoJob:
+        """
+        Mettre en queue le rendu final d'une vidéo approuvée ou planifiée
+        
+        Un job déjà actif pour l'idée est conservé: son étape video produira
+        directement le rendu final.
+        """
+        existing_job = await self.queue_collection.find_one({
+            "idea_id": idea_id,
+            "status": {"$in": [JobStatus.QUEUED, JobStatus.PROCESSING]}
+        })
+        if existing_job:
+            return VideoJob(**existing_job)
+        
+        print(f"🎞️ Final render requested for idea {idea_id}")
+        return await self.add_job(idea_id, start_from="video", is_regeneration=True)
+    
     async def get_job_by_idea(self, idea_id: str) -> Optional[VideoJob]:
         """Récupérer le job d'une idée"""
         job_data = await self.queue_collection.find_one(
@@ -239,43 +611,172 @@ class QueueService:
             return VideoJob(**job_data)
         return None
     
-    async def get_queue_position(self, idea_id: str) -> Optional[int]:
+    def _queue_order_key(self, job_data: dict) -> tuple:
+        """Clé de tri d'un job en attente, cohérente avec _queue_sort"""
+        if self.scheduling_mode == "edf":
+            return (job_data.get("schedule_key") or datetime.min, job_data["created_at"])
+        return (-job_data.get("priority", 0), job_data["created_at"])
+    
+    async def get_queue_position(self, idea_id: str, job: Optional[VideoJob] = None) -> Optional[int]:
         """
         Obtenir la position d'un job dans la queue
         Retourne None si pas en queue, sinon la position (1-indexed)
+        
+        Args:
+            job: Job de l'idée s'il a déjà été chargé (évite une requête)
         """
-        job = await self.get_job_by_idea(idea_id)
+        job = job or await self.get_job_by_idea(idea_id)
         
         if not job or job.status != JobStatus.QUEUED:
             return None
         
-        # Compter combien de jobs sont avant celui-ci
-        count = await self.queue_collection.count_documents({
-            "status": JobStatus.QUEUED,
-            "$or": [
+        # Compter combien de jobs sont avant celui-ci (parcours de l'index status + clé de tri)
+        if self.scheduling_mode == "edf":
+            ahead = [
+                {"schedule_key": {"$lt": job.schedule_key}},
+                {"schedule_key": job.schedule_key, "created_at": {"$lt": job.created_at}}
+            ]
+        else:
+            ahead = [
                 {"priority": {"$gt": job.priority}},
                 {
                     "priority": job.priority,
                     "created_at": {"$lt": job.created_at}
                 }
             ]
+        count = await self.queue_collection.count_documents({
+            "status": JobStatus.QUEUED,
+            "$or": ahead
         })
         
         return count + 1
     
+    async def get_jobs_by_ideas(self, idea_ids: List[str]) -> Dict[str, VideoJob]:
+        """Dernier job de chaque idée, en une seule requête"""
+        cursor = self.queue_collection.aggregate([
+            {"$match": {"idea_id": {"$in": idea_ids}}},
+            {"$sort": {"idea_id": 1, "created_at": -1}},
+            {"$group": {"_id": "$idea_id", "job": {"$first": "$$ROOT"}}}
+        ])
+        jobs = {}
+        async for row in cursor:
+            jobs[row["_id"]] = VideoJob(**row["job"])
+        return jobs
+    
+    async def get_queue_positions(self, jobs: List[VideoJob]) -> Dict[str, int]:
+        """
+        Positions dans la queue de plusieurs jobs en attente (idea_id → position 1-indexed)
+        
+        Jusqu'à QUEUE_POSITION_COUNT_MAX_JOBS jobs: un count_documents par job, en
+        parallèle (parcours de l'index status + clé de tri jusqu'au job, comme
+        get_queue_position). Au-delà: une seule lecture des clés de tri de TOUS les
+        jobs en attente (O(taille de la queue), couverte par l'index), puis une
+        recherche dichotomique par job.
+        """
+        queued_jobs = [job for job in jobs if job.status == JobStatus.QUEUED]
+        if not queued_jobs:
+            return {}
+        
+        if len(queued_jobs) <= self.position_count_max_jobs:
+            positions = await asyncio.gather(*(self.get_queue_position(job.idea_id, job) for job in queued_jobs))
+            return {job.idea_id: position for job, position in zip(queued_jobs, positions)}
+        
+        projection = {"_id": 0, "priority": 1, "schedule_key": 1, "created_at": 1}
+        cursor = self.queue_collection.find({"status": JobStatus.QUEUED}, projection).sort(self._queue_sort())
+        order_keys = [self._queue_order_key(job_data) async for job_data in cursor]
+        
+        return {
+            job.idea_id: bisect_left(order_keys, self._queue_order_key(job.model_dump())) + 1
+            for job in queued_jobs
+        }
+    
     async def get_queue_stats(self) -> dict:
-        """Statistiques de la queue"""
-        queued = await self.queue_collection.count_documents({"status": JobStatus.QUEUED})
-        processing = await self.queue_collection.count_documents({"status": JobStatus.PROCESSING})
-        completed_today = await self.queue_collection.count_documents({
-            "status": JobStatus.COMPLETED,
-            "completed_at": {"$gte": datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)}
-        })
+        """
+        Statistiques de la queue (une seule agrégation $facet)
+        
+        Capacité et slots libres par lane (jobs en cours regroupés par étape);
+        max_concurrent et available_slots (champs historiques) ne portent que sur la lane render.
+        """
+        now = datetime.now()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        cursor = self.queue_collection.aggregate([
+            # Ne lire que les jobs utiles aux statistiques (index status / started_at / completed_at)
+            {"$match": {"$or": [
+                {"status": {"$in": [JobStatus.QUEUED.value, JobStatus.PROCESSING.value]}},
+                {"started_at": {"$gte": today}},
+                {"completed_at": {"$gte": today}}
+            ]}},
+            {"$facet": {
+                "by_status": [
+                    {"$match": {"status": {"$in": [JobStatus.QUEUED.value, JobStatus.PROCESSING.value]}}},
+                    {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+                ],
+                "processing_by_stage": [
+                    {"$match": {"status": JobStatus.PROCESSING.value}},
+                    {"$group": {"_id": "$stage", "count": {"$sum": 1}}}
+                ],
+                "completed_today": [
+                    {"$match": {"status": JobStatus.COMPLETED.value, "completed_at": {"$gte": today}}},
+                    {"$count": "count"}
+                ],
+                "latency": [
+                    {"$match": {"started_at": {"$gte": today}, "queue_latency_ms": {"$ne": None}}},
+                    {"$group": {
+                        "_id": None,
+                        "count": {"$sum": 1},
+                        "avg_ms": {"$avg": "$queue_latency_ms"},
+                        "max_ms": {"$max": "$queue_latency_ms"}
+                    }}
+                ],
+                # Jobs à échéance qui auraient déjà dû démarrer pour être prêts à temps
+                "deadlines_at_risk": [
+                    {"$match": {"status": JobStatus.QUEUED.value, "deadline": {"$ne": None}, "schedule_key": {"$lt": now}}},
+                    {"$count": "count"}
+                ]
+            }}
+        ])
+        facets = (await cursor.to_list(length=1))[0]
+        
+        by_status = {row["_id"]: row["count"] for row in facets["by_status"]}
+        processing = by_status.get(JobStatus.PROCESSING.value, 0)
+        completed_today = facets["completed_today"][0]["count"] if facets["completed_today"] else 0
+        deadlines_at_risk = facets["deadlines_at_risk"][0]["count"] if facets["deadlines_at_risk"] else 0
+        
+        latency = {"count": 0, "avg_ms": None, "max_ms": None}
+        if facets["latency"]:
+            row = facets["latency"][0]
+            latency = {
+                "count": row["count"],
+                "avg_ms": round(row["avg_ms"]) if row["avg_ms"] is not None else None,
+                "max_ms": row["max_ms"]
+            }
+        
+        # Capacité réelle: slots des workers vivants par lane (MAX_CONCURRENT_VIDEO_JOBS en render si aucun n'est enregistré)
+        fleet_capacity = await WorkerRegistryService().get_fleet_capacity()
+        if not sum(fleet_capacity.values()):
+            fleet_capacity = {**fleet_capacity, "render": self.max_concurrent}
+        processing_by_lane = {lane: 0 for lane in LANES}
+        for row in facets.get("processing_by_stage", []):
+            if row["_id"] in STAGE_LANES:
+                processing_by_lane[STAGE_LANES[row["_id"]]] += row["count"]
+        lanes = {
+            lane: {
+                "capacity": fleet_capacity.get(lane, 0),
+                "processing": processing_by_lane[lane],
+                "available_slots": max(0, fleet_capacity.get(lane, 0) - processing_by_lane[lane])
+            }
+            for lane in LANES
+        }
         
         return {
-            "queued": queued,
+            "queued": by_status.get(JobStatus.QUEUED.value, 0),
             "processing": processing,
             "completed_today": completed_today,
-            "max_concurrent": self.max_concurrent,
-            "available_slots": max(0, self.max_concurrent - processing)
+            "max_concurrent": lanes["render"]["capacity"],
+            "available_slots": lanes["render"]["available_slots"],
+            "fleet_capacity": fleet_capacity,
+            "lanes": lanes,
+            "scheduling_mode": self.scheduling_mode,
+            "deadlines_at_risk": deadlines_at_risk,
+            "queue_latency": latency
         }
@@ -0,0 +1,851 @@
+"""
+Rendu vidéo exécuté dans un pool de processus
+
+Le rendu est purement CPU: l'exécuter sur la boucle asyncio bloquerait l'API
+(le worker tourne dans le process de l'API en local). Seuls des chemins et
+une RenderSpec traversent la frontière de process.
+
+Trois moteurs (RENDER_BACKEND):
+- moviepy: composition image par image en Python (légendes rastérisées par Pillow)
+- ffmpeg: une seule commande ffmpeg (template bouclé, sous-titres ASS via libass)
+- stream: images décodées par ffmpeg, légendes incrustées en NumPy et ré-encodées
+  par ffmpeg, à travers un tampon borné: mémoire constante quelle que soit la durée
+
+Avec des images générées (RenderSpec.images), le template est remplacé par un
+diaporama Ken Burns synthétisé par ffmpeg (voir slideshow_service).
+
+Avec RENDER_SEGMENTS ≥ 2, les vidéos longues sont découpées en segments
+(plages d'images) rendus en parallèle dans le pool, sans audio, puis assemblés
+par le demuxer concat d'ffmpeg sans ré-encodage; la piste audio complète est
+multiplexée une seule fois.
+"""
+import asyncio
+import multiprocessing
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel
+from models import TimestampItem, VideoType
+from services.media_probe_service import probe_media
+from services.slideshow_service import Slide, build_slideshow_graph, plan_slides
+from services.pipeline_stages import get_descendant_pids, get_lane_limits, get_memory_limit_mb, get_process_tree_rss_mb
+
+_render_executor: Optional[ProcessPoolExecutor] = None
+_memory_governor: Optional["RenderMemoryGovernor"] = None
+
+RENDER_BACKENDS = ("moviepy", "ffmpeg", "stream")
+
+
+class RenderSpec(BaseModel):
+    """Tout ce dont un process de rendu a besoin pour produire la vidéo"""
+    template_path: str
+    audio_path: str
+    output_path: str
+    subtitles: List[TimestampItem] = []
+    subtitle_config: Optional[Dict[str, Any]] = None
+    fps: int = 24
+    codec: str = "libx264"
+    audio_codec: str = "aac"
+    preset: str = "medium"
+    threads: int = 1
+    backend: str = "moviepy"
+    video_type: Optional[VideoType] = None  # Renseigné: le template est remplacé par sa version canonique
+    template_canonical: bool = False  # Template déjà à la taille/fps cibles, GOP fermé, sans audio
+    max_height: Optional[int] = None  # Rendu d'aperçu: image réduite à cette hauteur
+    background_cache: bool = False  # Réutiliser la piste de fond bouclée en cache (template canonique)
+    segment_start_frame: Optional[int] = None  # Segment: première image de la plage (vidéo seule)
+    segment_frames: Optional[int] = None  # Segment: nombre exact d'images à produire
+    images: List[str] = []  # Images générées: diaporama Ken Burns à la place du template
+    slides: List[Slide] = []  # Diaporama planifié (images existantes calées sur les phrases)
+
+
+class RenderPlan(BaseModel):
+    """Découpage d'un rendu: spec résolue et segments à rendre en parallèle (vide: rendu d'un seul tenant)"""
+    spec: RenderSpec
+    duration: float
+    segments: List[RenderSpec] = []
+    segments_dir: Optional[str] = None
+
+
+class RenderMemoryGovernor:
+    """
+    Admission des rendus sous un plafond de RSS (RENDER_RSS_CEILING_MB)
+    
+    Avant chaque rendu (ou segment), la RSS du process et de ses descendants
+    (pool de rendu, ffmpeg) plus RENDER_MEMORY_MB doit tenir sous le plafond;
+    sinon le rendu attend qu'un autre se termine au lieu de déclencher l'OOM killer.
+    Un rendu est toujours admis quand aucun autre n'est en cours.
+    """
+
+    def __init__(self):
+        limit_mb = get_memory_limit_mb()
+        default_ceiling = int(limit_mb * 0.9) if limit_mb else 0
+        self.ceiling_mb = int(os.getenv("RENDER_RSS_CEILING_MB", str(default_ceiling)))
+        self.render_memory_mb = int(os.getenv("RENDER_MEMORY_MB", "1500"))
+        # Délai avant que la mémoire d'un rendu qui démarre soit visible dans la RSS
+        self.settle_seconds = float(os.getenv("RENDER_RSS_SETTLE_SECONDS", "10"))
+        self.poll_interval = 0.5
+        self.active = 0
+        self.throttled = 0  # Rendus mis en attente par le plafond
+        self._recent_starts: List[float] = []
+
+    def _pending_mb(self) -> int:
+        """Mémoire réservée pour les rendus trop récents pour apparaître dans la RSS"""
+        now = time.monotonic()
+        self._recent_starts = [started for started in self._recent_starts if now - started < self.settle_seconds]
+        return len(self._recent_starts) * self.render_memory_mb
+
+    def can_start(self) -> bool:
+        if not self.ceiling_mb or self.active == 0:
+            return True
+        rss_mb = get_process_tree_rss_mb()
+        if rss_mb is None:
+            return True
+        return rss_mb + self._pending_mb() + self.render_memory_mb <= self.ceiling_mb
+
+    @asynccontextmanager
+    async def slot(self):
+        """Attendre que le plafond permette un rendu de plus, puis le compter pendant son exécution"""
+        if not self.can_start():
+            self.throttled += 1
+            print(f"🧯 RSS ceiling ({self.ceiling_mb} MB) reached: render waiting for memory")
+            while not self.can_start():
+                await asyncio.sleep(self.poll_interval)
+        self.active += 1
+        self._recent_starts.append(time.monotonic())
+        try:
+            yield
+        finally:
+            self.active -= 1
+
+
+def get_memory_governor() -> RenderMemoryGovernor:
+    """Gouverneur mémoire des rendus de ce process"""
+    global _memory_governor
+    if _memory_governor is None:
+        _memory_governor = RenderMemoryGovernor()
+    return _memory_governor
+
+
+def get_render_backend() -> str:
+    """Moteur de rendu configuré (RENDER_BACKEND: moviepy ou ffmpeg)"""
+    backend = os.getenv("RENDER_BACKEND", "moviepy").lower()
+    if backend not in RENDER_BACKENDS:
+        raise ValueError(f"Unknown render backend: {backend} (expected one of {', '.join(RENDER_BACKENDS)})")
+    return backend
+
+
+def get_ffmpeg_binary() -> str:
+    """Binaire ffmpeg: FFMPEG_BINARY, sinon celui fourni par imageio-ffmpeg (utilisé aussi par MoviePy)"""
+    configured = os.getenv("FFMPEG_BINARY")
+    if configured and configured != "auto-detect":
+        return configured
+    import imageio_ffmpeg
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def get_render_segments() -> int:
+    """
+    Nombre maximal de segments rendus en parallèle pour une vidéo (RENDER_SEGMENTS)
+    Par défaut 1 (rendu d'un seul tenant): la lane render occupe déjà un cœur par
+    rendu, le découpage n'accélère que si des cœurs restent libres (voir
+    helpers/benchmark_segment_render.py).
+    """
+    return max(1, int(os.getenv("RENDER_SEGMENTS", "1")))
+
+
+def get_segment_min_seconds() -> float:
+    """Durée minimale d'un segment: en dessous, le découpage coûte plus qu'il ne rapporte"""
+    return float(os.getenv("RENDER_SEGMENT_MIN_SECONDS", "30"))
+
+
+def get_render_pool_size() -> int:
+    """Nombre de process de rendu (RENDER_PROCESS_POOL_SIZE, par défaut lane render × segments)"""
+    default = max(1, get_lane_limits()["render"]) * get_render_segments()
+    return max(1, int(os.getenv("RENDER_PROCESS_POOL_SIZE", str(default))))
+
+
+def get_encoder_threads() -> int:
+    """Threads libx264 par rendu: les cœurs sont répartis entre les rendus simultanés (puis entre ses segments)"""
+    default = max(1, (os.cpu_count() or 1) // max(1, get_lane_limits()["render"]))
+    return max(1, int(os.getenv("RENDER_ENCODER_THREADS", str(default))))
+
+
+def get_render_executor() -> ProcessPoolExecutor:
+    """Pool de process de rendu, créé à la première utilisation"""
+    global _render_executor
+    if _render_executor is None:
+        # spawn: ne pas hériter de la boucle asyncio ni des threads du client MongoDB
+        _render_executor = ProcessPoolExecutor(
+            max_workers=get_render_pool_size(),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        print(f"🏭 Render process pool started ({get_render_pool_size()} process, {get_encoder_threads()} encoder thread(s) each)")
+    return _render_executor
+
+
+def shutdown_render_executor(wait: bool = False):
+    """Arrêter le pool de rendu (wait: attendre la fin des process)"""
+    global _render_executor
+    if _render_executor is not None:
+        _render_executor.shutdown(wait=wait, cancel_futures=True)
+        _render_executor = None
+
+
+def _resolve_template(spec: RenderSpec) -> RenderSpec:
+    """Remplacer le template par sa version canonique pour le VideoType (si le cache est actif)"""
+    if spec.video_type is None or spec.template_canonical:
+        return spec
+    from services.template_cache_service import TemplateCacheService
+    template_cache = TemplateCacheService()
+    template_path = template_cache.resolve(spec.template_path, spec.video_type)
+    if template_path == spec.template_path:
+        return spec
+    return spec.model_copy(update={
+        "template_path": template_path,
+        "template_canonical": True,
+        # Un aperçu garde son fps réduit
+        "fps": spec.fps if spec.max_height else template_cache.get_profile(spec.video_type)["fps"]
+    })
+
+
+def _resolve_background(spec: RenderSpec, duration: float) -> RenderSpec:
+    """Remplacer le template canonique par sa piste de fond bouclée à la durée de l'audio (en cache)"""
+    if not spec.background_cache or not spec.template_canonical or spec.max_height:
+        return spec
+    from services.background_track_service import BackgroundTrackService
+    background_path = BackgroundTrackService().ensure_background(spec.template_path, duration, spec.fps)
+    return spec.model_copy(update={"template_path": background_path, "background_cache": False})
+
+
+def _resolve_slides(spec: RenderSpec, duration: float) -> RenderSpec:
+    """Planifier le diaporama des images générées (retour au template si aucune image n'est lisible)"""
+    if spec.slides or not spec.images:
+        return spec
+    fps = spec.fps
+    if spec.video_type is not None and not spec.max_height:
+        from services.template_cache_service import TemplateCacheService
+        fps = TemplateCacheService().get_profile(spec.video_type)["fps"]
+    images = [path for path in spec.images if os.path.exists(path)]
+    slides = plan_slides(images, spec.subtitles, duration, fps)
+    if not slides:
+        print("⚠️ No generated image available, falling back to the video template")
+        return spec.model_copy(update={"images": []})
+    return spec.model_copy(update={"slides": slides, "fps": fps})
+
+
+def _is_stream_copy(spec: RenderSpec) -> bool:
+    """Rien à incruster sur un template canonique: la vidéo est un simple multiplexage"""
+    return spec.template_canonical and not spec.subtitles and not spec.max_height
+
+
+def render_video(spec: RenderSpec) -> float:
+    """
+    Assembler template bouclé + audio + sous-titres et exporter la vidéo
+    (exécuté dans un process du pool)
+
+    Returns:
+        Durée de la vidéo en secondes
+    """
+    if spec.images:
+        spec = _resolve_slides(spec, probe_media(spec.audio_path)["duration"])
+    if spec.slides:
+        return render_video_slideshow(spec)
+
+    spec = _resolve_template(spec)
+    if spec.background_cache:
+        spec = _resolve_background(spec, probe_media(spec.audio_path)["duration"])
+
+    # Sans incrustation, tous les moteurs se réduisent au multiplexage en copie de flux d'ffmpeg
+    if spec.backend == "ffmpeg" or _is_stream_copy(spec):
+        return render_video_ffmpeg(spec)
+    if spec.backend == "stream":
+        return render_video_stream(spec)
+    return render_video_moviepy(spec)
+
+
+def ingest_templates() -> int:
+    """Normaliser tous les templates (exécuté dans le pool de rendu au démarrage du worker)"""
+    from services.template_cache_service import TemplateCacheService
+    return len(TemplateCacheService().ingest_all())
+
+
+def _ffmpeg_video_filters(spec: RenderSpec, template: Dict[str, Any], work_dir: str) -> List[str]:
+    """Chaîne -vf du rendu ffmpeg: incrustation ASS puis réduction d'aperçu (le fichier .ass est écrit dans work_dir)"""
+    from services.subtitle_service import SubtitleService
+
+    filters = []
+    ass_content = None
+    if spec.subtitles and template["width"] and template["height"]:
+        ass_content = SubtitleService().build_ass(
+            spec.subtitles, template["width"], template["height"], spec.subtitle_config
+        )
+    if ass_content:
+        # Chemin relatif au répertoire de travail: pas d'échappement de chemin dans le filtergraph
+        with open(os.path.join(work_dir, "subtitles.ass"), "w", encoding="utf-8") as f:
+            f.write(ass_content)
+        filters.append("ass=subtitles.ass")
+        print(f"📝 {len(spec.subtitles)} sous-titres incrustés via libass")
+    if spec.max_height:
+        # Réduction après l'incrustation: même mise en page que le rendu final
+        filters.append(f"scale=-2:{spec.max_height}")
+    return filters
+
+
+def _ffmpeg_encoder_args(spec: RenderSpec) -> List[str]:
+    """Paramètres d'encodage vidéo communs au rendu complet et aux segments"""
+    return [
+        "-r", str(spec.fps),
+        "-c:v", spec.codec, "-preset", spec.preset, "-threads", str(spec.threads),
+        "-pix_fmt", "yuv420p",
+    ]
+
+
+def render_video_ffmpeg(spec: RenderSpec) -> float:
+    """
+    Rendu en une seule commande ffmpeg: même mise en page que le rendu MoviePy,
+    sans faire passer chaque image par Python
+
+    Returns:
+        Durée de la vidéo en secondes
+    """
+    audio_duration_sec = probe_media(spec.audio_path)["duration"]
+    template = probe_media(spec.template_path)
+    print(f"✅ Audio concaténé utilisé: {audio_duration_sec:.2f}s")
+
+    with tempfile.TemporaryDirectory(prefix="render-") as work_dir:
+        command = [
+            get_ffmpeg_binary(), "-y", "-hide_banner", "-loglevel", "error",
+            # Template bouclé indéfiniment, coupé à la durée de l'audio
+            "-stream_loop", "-1", "-i", os.path.abspath(spec.template_path),
+            "-i", os.path.abspath(spec.audio_path),
+            "-t", f"{audio_duration_sec:.3f}",
+            "-map", "0:v:0", "-map", "1:a:0",
+        ]
+
+        filters = _ffmpeg_video_filters(spec, template, work_dir)
+        if filters:
+            command += ["-vf", ",".join(filters)]
+
+        if spec.template_canonical and not filters:
+            # Template canonique sans filtre: boucle et coupe en copie de flux, sans ré-encodage
+            print("⚡ Canonical template without subtitles: stream copy")
+            command += ["-c:v", "copy"]
+        else:
+            command += _ffmpeg_encoder_args(spec)
+        command += [
+            "-c:a", spec.audio_codec,
+            "-movflags", "+faststart",
+            os.path.abspath(spec.output_path),
+        ]
+
+        print("⏳ Exportation de la vidéo avec ffmpeg...")
+        print(f"   Codec: {spec.codec} | Audio: {spec.audio_codec} | FPS: {spec.fps} | Preset: {spec.preset} | Threads: {spec.threads}")
+        result = subprocess.run(command, cwd=work_dir, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg render failed ({result.returncode}): {result.stderr.strip()[-2000:]}")
+
+    return audio_duration_sec
+
+
+def render_video_slideshow(spec: RenderSpec) -> float:
+    """
+    Rendu du diaporama Ken Burns en une seule commande ffmpeg (zoompan + xfade, sous-titres libass)
+
+    Un aperçu est synthétisé directement à sa taille réduite; les sous-titres
+    gardent la mise en page du rendu final (PlayRes à la taille finale, libass
+    met à l'échelle).
+
+    Returns:
+        Durée de la vidéo en secondes
+    """
+    from services.template_cache_service import TemplateCacheService
+
+    duration = probe_media(spec.audio_path)["duration"]
+    profile = TemplateCacheService().get_profile(spec.video_type or VideoType.NORMAL)
+    width, height = profile["width"], profile["height"]
+    if spec.max_height:
+        width, height = round(width * spec.max_height / height / 2) * 2, spec.max_height
+    print(f"✅ Audio concaténé utilisé: {duration:.2f}s")
+
+    with tempfile.TemporaryDirectory(prefix="render-") as work_dir:
+        full_size = {"width": profile["width"], "height": profile["height"]}
+        filters = _ffmpeg_video_filters(spec.model_copy(update={"max_height": None}), full_size, work_dir)
+        graph = build_slideshow_graph(spec.slides, width, height, spec.fps, filters)
+
+        command = [get_ffmpeg_binary(), "-y", "-hide_banner", "-loglevel", "error",
+                   "-filter_complex_threads", str(spec.threads)]
+        for slide in spec.slides:
+            command += ["-i", os.path.abspath(slide.path)]
+        command += [
+            "-i", os.path.abspath(spec.audio_path),
+            "-filter_complex", graph,
+            "-map", "[slideshow]", "-map", f"{len(spec.slides)}:a:0",
+            "-t", f"{duration:.3f}",
+        ]
+        command += _ffmpeg_encoder_args(spec)
+        command += [
+            "-c:a", spec.audio_codec,
+            "-movflags", "+faststart",
+            os.path.abspath(spec.output_path),
+        ]
+
+        print(f"⏳ Exportation du diaporama ({len(spec.slides)} images, {width}x{height})...")
+        print(f"   Codec: {spec.codec} | Audio: {spec.audio_codec} | FPS: {spec.fps} | Preset: {spec.preset} | Threads: {spec.threads}")
+        result = subprocess.run(command, cwd=work_dir, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg slideshow render failed ({result.returncode}): {result.stderr.strip()[-2000:]}")
+
+    return duration
+
+
+def get_stream_buffer_frames() -> int:
+    """Images décodées en avance dans le rendu stream (borne la mémoire du pipeline)"""
+    return max(1, int(os.getenv("RENDER_STREAM_BUFFER_FRAMES", "8")))
+
+
+def render_video_stream(spec: RenderSpec) -> float:
+    """
+    Rendu en flux: décodeur ffmpeg → incrustation des légendes actives → encodeur ffmpeg
+    
+    Au plus RENDER_STREAM_BUFFER_FRAMES images sont en mémoire, et seules les
+    légendes affichées sont rastérisées. Rend aussi un segment (vidéo seule).
+
+    Returns:
+        Durée de la vidéo en secondes
+    """
+    import numpy as np
+    from services.subtitle_service import CaptionTrack
+
+    template = probe_media(spec.template_path)
+    width, height = template["width"], template["height"]
+    is_segment = spec.segment_frames is not None
+    duration = None if is_segment else probe_media(spec.audio_path)["duration"]
+    total_frames = spec.segment_frames if is_segment else round(duration * spec.fps)
+    frame_size = width * height * 3
+    if not is_segment:
+        print(f"✅ Audio concaténé utilisé: {duration:.2f}s")
+
+    decoder_command = [get_ffmpeg_binary(), "-hide_banner", "-loglevel", "error"]
+    decoder_command += _looped_template_args(spec.template_path, _template_offset(spec, template), [])
+    decoder_command += ["-r", str(spec.fps), "-frames:v", str(total_frames), "-f", "rawvideo", "-pix_fmt", "rgb24", "-"]
+
+    encoder_command = [
+        get_ffmpeg_binary(), "-y", "-hide_banner", "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(spec.fps), "-i", "-",
+    ]
+    if is_segment:
+        encoder_command += ["-an"]
+    else:
+        encoder_command += [
+            "-i", os.path.abspath(spec.audio_path), "-map", "0:v:0", "-map", "1:a:0",
+            "-t", f"{duration:.3f}", "-c:a", spec.audio_codec, "-movflags", "+faststart",
+        ]
+    if spec.max_height:
+        encoder_command += ["-vf", f"scale=-2:{spec.max_height}"]
+    encoder_command += _ffmpeg_encoder_args(spec) + [os.path.abspath(spec.output_path)]
+
+    captions = CaptionTrack(spec.subtitles, width, height, spec.subtitle_config)
+    frames: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=get_stream_buffer_frames())
+
+    print(f"⏳ Exportation de la vidéo en flux ({total_frames} images, tampon de {get_stream_buffer_frames()})...")
+    print(f"   Codec: {spec.codec} | Audio: {spec.audio_codec} | FPS: {spec.fps} | Preset: {spec.preset} | Threads: {spec.threads}")
+    with tempfile.TemporaryFile() as decoder_log, tempfile.TemporaryFile() as encoder_log:
+        decoder = subprocess.Popen(decoder_command, stdout=subprocess.PIPE, stderr=decoder_log)
+        encoder = subprocess.Popen(encoder_command, stdin=subprocess.PIPE, stderr=encoder_log)
+
+        def read_frames():
+            # Le put bloquant applique la contre-pression: le décodeur attend l'encodeur
+            try:
+                while True:
+                    raw = decoder.stdout.read(frame_size)
+                    if len(raw) < frame_size:
+                        break
+                    frames.put(raw)
+            finally:
+                frames.put(None)
+
+        reader = threading.Thread(target=read_frames, name="stream-render-decoder", daemon=True)
+        reader.start()
+        written = 0
+        try:
+            while True:
+                raw = frames.get()
+                if raw is None:
+                    break
+                frame = np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 3)
+                frame = captions.composite(frame, written / spec.fps)
+                encoder.stdin.write(frame.data)
+                written += 1
+        except BrokenPipeError:
+            pass
+        finally:
+            try:
+                encoder.stdin.close()
+            except BrokenPipeError:
+                pass  # Encodeur déjà arrêté: son code de retour est vérifié plus bas
+            if decoder.poll() is None:
+                decoder.kill()
+            # Libérer un put() bloqué sur le tampon plein, que le décodeur soit arrêté ou non
+            # (il peut avoir fini alors que le lecteur attend encore une place dans la file)
+            while reader.is_alive():
+                try:
+                    frames.get_nowait()
+                except queue.Empty:
+                    time.sleep(0.01)
+            reader.join()
+            decoder.wait()
+            encoder.wait()
+
+        if encoder.returncode != 0:
+            encoder_log.seek(0)
+            raise RuntimeError(f"ffmpeg stream encoder failed ({encoder.returncode}): {encoder_log.read().decode(errors='replace').strip()[-2000:]}")
+        if written < total_frames:
+            decoder_log.seek(0)
+            raise RuntimeError(f"ffmpeg stream decoder stopped at frame {written}/{total_frames}: {decoder_log.read().decode(errors='replace').strip()[-2000:]}")
+
+    print(f"📝 {captions.materialized} sous-titres rastérisés à la volée")
+    captions.subtitle_service.report_caption_cache()
+    return total_frames / spec.fps if is_segment else duration
+
+
+def render_video_moviepy(spec: RenderSpec) -> float:
+    """
+    Rendu MoviePy: composition des légendes image par image
+
+    Returns:
+        Durée de la vidéo en secondes
+    """
+    from moviepy.editor import VideoFileClip, AudioFileClip
+    from services.subtitle_service import SubtitleService
+
+    # Charger l'audio
+    audio_clip = AudioFileClip(spec.audio_path)
+    audio_duration_sec = audio_clip.duration
+    print(f"✅ Audio concaténé utilisé: {audio_duration_sec:.2f}s")
+
+    # Charger le template vidéo
+    print("📽️ Chargement du template vidéo...")
+    video_clip = VideoFileClip(spec.template_path)
+
+    # Boucler la vidéo pour correspondre à la durée audio
+    if video_clip.duration < audio_duration_sec:
+        print(f"🔄 Bouclage de la vidéo (durée template: {video_clip.duration:.2f}s → {audio_duration_sec:.2f}s)")
+        n_loops = int(audio_duration_sec / video_clip.duration) + 1
+        video_clip = video_clip.loop(n=n_loops)
+
+    # Couper à la durée exacte
+    video_clip = video_clip.subclip(0, audio_duration_sec)
+
+    # Ajouter l'audio à la vidéo
+    print("🎧 Ajout de l'audio à la vidéo...")
+    final_video = video_clip.set_audio(audio_clip)
+
+    # Ajouter les sous-titres
+    subtitle_service = SubtitleService()
+    final_video = subtitle_service.apply_subtitles(final_video, spec.subtitles, spec.subtitle_config)
+
+    # Aperçu: réduction par ffmpeg à l'encodage (le resize MoviePy dépend de PIL.ANTIALIAS)
+    ffmpeg_params = ["-vf", f"scale=-2:{spec.max_height}"] if spec.max_height else None
+
+    # Exporter la vidéo
+    print("⏳ Exportation de la vidéo (cela peut prendre plusieurs minutes)...")
+    print(f"   Codec: {spec.codec} | Audio: {spec.audio_codec} | FPS: {spec.fps} | Preset: {spec.preset} | Threads: {spec.threads}")
+    final_video.write_videofile(
+        spec.output_path,
+        codec=spec.codec,
+        audio_codec=spec.audio_codec,
+        fps=spec.fps,
+        preset=spec.preset,
+        threads=spec.threads,
+        ffmpeg_params=ffmpeg_params,
+        logger=None
+    )
+
+    subtitle_service.report_caption_cache()
+
+    # Fermer les clips
+    final_video.close()
+    audio_clip.close()
+
+    return audio_duration_sec
+
+
+def segment_subtitles(subtitles: List[TimestampItem], start_ms: int, end_ms: int) -> List[TimestampItem]:
+    """
+    Sous-titres visibles dans [start_ms, end_ms), coupés à la plage et recalés sur son début
+    (les mots sont tous gardés et recalés: la légende affiche le même texte de part et d'autre d'une jonction)
+    """
+    subset = []
+    for item in subtitles:
+        if item.end_time_ms <= start_ms or item.start_time_ms >= end_ms:
+            continue
+        subset.append(item.model_copy(update={
+            "start_time_ms": max(item.start_time_ms, start_ms) - start_ms,
+            "end_time_ms": min(item.end_time_ms, end_ms) - start_ms,
+            "words": [(text, start - start_ms, end - start_ms) for text, start, end in item.words],
+        }))
+    return subset
+
+
+def segment_bounds(total_frames: int, count: int) -> List[Tuple[int, int]]:
+    """Découper [0, total_frames) en `count` plages d'images contiguës (première image, nombre d'images)"""
+    edges = [total_frames * i // count for i in range(count + 1)]
+    return [(edges[i], edges[i + 1] - edges[i]) for i in range(count)]
+
+
+def plan_render(spec: RenderSpec) -> RenderPlan:
+    """
+    Décider du découpage d'un rendu (exécuté dans le pool: sonde les médias)
+    
+    Les bornes tombent sur des images entières: chaque segment produit un nombre
+    exact d'images et leur concaténation a la durée du rendu d'un seul tenant.
+    """
+    duration = probe_media(spec.audio_path)["duration"]
+    spec = _resolve_slides(spec, duration)
+    if spec.slides:
+        # Diaporama d'un seul tenant: les fondus traversent les bornes de segments,
+        # le parallélisme vient des threads du graphe de filtres et de l'encodeur
+        return RenderPlan(spec=spec, duration=duration)
+    spec = _resolve_template(spec)
+    spec = _resolve_background(spec, duration)
+
+    count = min(get_render_segments(), int(duration // get_segment_min_seconds()))
+    if count < 2 or _is_stream_copy(spec):
+        return RenderPlan(spec=spec, duration=duration)
+
+    output_dir = os.path.dirname(os.path.abspath(spec.output_path))
+    segments_dir = tempfile.mkdtemp(prefix=".segments-", dir=output_dir)
+    total_frames = round(duration * spec.fps)
+    segments = []
+    for index, (start_frame, frames) in enumerate(segment_bounds(total_frames, count)):
+        start_ms = start_frame * 1000 // spec.fps
+        end_ms = (start_frame + frames) * 1000 // spec.fps
+        segments.append(spec.model_copy(update={
+            "output_path": os.path.join(segments_dir, f"segment_{index:03d}.mp4"),
+            "subtitles": segment_subtitles(spec.subtitles, start_ms, end_ms),
+            "threads": max(1, spec.threads // count),
+            "segment_start_frame": start_frame,
+            "segment_frames": frames,
+        }))
+    print(f"🧩 Rendu découpé en {count} segments ({total_frames} images, {duration:.2f}s)")
+    return RenderPlan(spec=spec, duration=duration, segments=segments, segments_dir=segments_dir)
+
+
+def render_segment(spec: RenderSpec) -> str:
+    """Rendre la plage d'images d'un segment, sans audio (exécuté dans un process du pool)"""
+    if spec.backend == "ffmpeg":
+        render_segment_ffmpeg(spec)
+    elif spec.backend == "stream":
+        render_video_stream(spec)
+    else:
+        render_segment_moviepy(spec)
+    return spec.output_path
+
+
+def _looped_template_args(template_path: str, offset: float, filters: List[str]) -> List[str]:
+    """
+    Entrées et mapping ffmpeg du template bouclé à partir de `offset` secondes, filtres appliqués
+    
+    -ss avec -stream_loop ne reprend pas la boucle à la bonne phase: la fin du template
+    (seek précis sur une entrée non bouclée) est concaténée au template bouclé.
+    """
+    template_path = os.path.abspath(template_path)
+    if offset > 0:
+        graph = "[0:v][1:v]concat=n=2:v=1:a=0" + "".join(f",{f}" for f in filters) + "[v]"
+        return [
+            "-ss", f"{offset:.6f}", "-i", template_path,
+            "-stream_loop", "-1", "-i", template_path,
+            "-filter_complex", graph, "-map", "[v]",
+        ]
+    args = ["-stream_loop", "-1", "-i", template_path, "-map", "0:v:0"]
+    if filters:
+        args += ["-vf", ",".join(filters)]
+    return args
+
+
+def _template_offset(spec: RenderSpec, template: Dict[str, Any]) -> float:
+    """Phase du template bouclé à la première image du segment (0 pour un rendu complet)"""
+    start_sec = (spec.segment_start_frame or 0) / spec.fps
+    return start_sec % template["duration"] if template["duration"] else 0
+
+
+def render_segment_ffmpeg(spec: RenderSpec):
+    """Segment ffmpeg: le template bouclé démarre à la phase correspondant à la première image du segment"""
+    template = probe_media(spec.template_path)
+
+    with tempfile.TemporaryDirectory(prefix="render-") as work_dir:
+        filters = _ffmpeg_video_filters(spec, template, work_dir)
+        command = [get_ffmpeg_binary(), "-y", "-hide_banner", "-loglevel", "error"]
+        command += _looped_template_args(spec.template_path, _template_offset(spec, template), filters)
+        command += ["-an", "-frames:v", str(spec.segment_frames)]
+        command += _ffmpeg_encoder_args(spec)
+        command += [os.path.abspath(spec.output_path)]
+
+        result = subprocess.run(command, cwd=work_dir, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg segment render failed ({result.returncode}): {result.stderr.strip()[-2000:]}")
+
+
+def render_segment_moviepy(spec: RenderSpec):
+    """Segment MoviePy: sous-clip du template bouclé, sous-titres du segment uniquement"""
+    from moviepy.editor import VideoFileClip
+    from services.subtitle_service import SubtitleService
+
+    start_sec = spec.segment_start_frame / spec.fps
+    end_sec = (spec.segment_start_frame + spec.segment_frames) / spec.fps
+
+    video_clip = VideoFileClip(spec.template_path, audio=False)
+    if video_clip.duration < end_sec:
+        video_clip = video_clip.loop(n=int(end_sec / video_clip.duration) + 1)
+    segment_clip = video_clip.subclip(start_sec, end_sec)
+    subtitle_service = SubtitleService()
+    segment_clip = subtitle_service.apply_subtitles(segment_clip, spec.subtitles, spec.subtitle_config)
+
+    # -frames:v: MoviePy peut produire une image de trop (arrondi flottant de la durée)
+    ffmpeg_params = ["-frames:v", str(spec.segment_frames)]
+    if spec.max_height:
+        ffmpeg_params += ["-vf", f"scale=-2:{spec.max_height}"]
+    segment_clip.write_videofile(
+        spec.output_path,
+        codec=spec.codec,
+        fps=spec.fps,
+        preset=spec.preset,
+        threads=spec.threads,
+        audio=False,
+        ffmpeg_params=ffmpeg_params,
+        logger=None
+    )
+    subtitle_service.report_caption_cache()
+    segment_clip.close()
+    video_clip.close()
+
+
+def concat_segments(plan: RenderPlan) -> float:
+    """
+    Assembler les segments avec le demuxer concat (copie de flux) et multiplexer
+    la piste audio complète: aucune coupure audio aux jonctions
+
+    Returns:
+        Durée de la vidéo en secondes
+    """
+    list_path = os.path.join(plan.segments_dir, "segments.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        for segment in plan.segments:
+            f.write(f"file '{os.path.basename(segment.output_path)}'\n")
+
+    command = [
+        get_ffmpeg_binary(), "-y", "-hide_banner", "-loglevel", "error",
+        "-f", "concat", "-safe", "0", "-i", list_path,
+        "-i", os.path.abspath(plan.spec.audio_path),
+        "-map", "0:v:0", "-map", "1:a:0",
+        "-t", f"{plan.duration:.3f}",
+        "-c:v", "copy", "-c:a", plan.spec.audio_codec,
+        "-movflags", "+faststart",
+        os.path.abspath(plan.spec.output_path),
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg segment concat failed ({result.returncode}): {result.stderr.strip()[-2000:]}")
+    print(f"🔗 {len(plan.segments)} segments assemblés sans ré-encodage")
+    return plan.duration
+
+
+def _run_tracked(func, arg, pid_path: str):
+    """Exécuter une tâche dans un process du pool en publiant son pid (pour l'arrêter à l'annulation)"""
+    with open(pid_path, "w") as f:
+        f.write(str(os.getpid()))
+    return func(arg)
+
+
+def _stop_render_processes(pid_path: str) -> bool:
+    """
+    Tuer les sous-process (ffmpeg) de la tâche de rendu: elle échoue aussitôt et
+    libère son process du pool. Le process du pool lui-même est conservé.
+    Retourne False si la tâche n'a pas encore démarré.
+    """
+    try:
+        with open(pid_path) as f:
+            pid = int(f.read() or 0)
+    except (OSError, ValueError):
+        pid = 0
+    if not pid:
+        return False
+    if pid == os.getpid():
+        # Exécuteur de threads (tests): rien à tuer sans tuer ce process
+        return True
+    descendants = get_descendant_pids(pid)
+    if descendants is None:
+        print("⚠️ Render cancelled but its processes cannot be listed on this platform: it runs to completion")
+        return True
+    for child in descendants:
+        try:
+            os.kill(child, getattr(signal, "SIGKILL", signal.SIGTERM))
+        except OSError:
+            pass
+    print(f"🛑 Render cancelled: {len(descendants)} render process(es) stopped")
+    return True
+
+
+async def _run_in_pool(func, arg):
+    """
+    Exécuter une tâche de rendu dans le pool; si la coroutine est annulée (bail
+    perdu, arrêt du worker), le rendu est arrêté au lieu de continuer à écrire
+    sa sortie et à occuper la mémoire
+    """
+    loop = asyncio.get_running_loop()
+    fd, pid_path = tempfile.mkstemp(prefix="render-", suffix=".pid")
+    os.close(fd)
+    future = loop.run_in_executor(get_render_executor(), _run_tracked, func, arg, pid_path)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        if not _stop_render_processes(pid_path):
+            future.cancel()
+        # Le slot mémoire reste compté jusqu'à la fin effective de la tâche
+        await asyncio.wait({future}, timeout=float(os.getenv("RENDER_CANCEL_GRACE_SECONDS", "10")))
+        raise
+    finally:
+        try:
+            os.remove(pid_path)
+        except OSError:
+            pass
+
+
+async def render_in_pool(spec: RenderSpec) -> float:
+    """
+    Exécuter le rendu dans le pool de process sans bloquer la boucle asyncio
+    
+    Une vidéo assez longue est rendue par segments en parallèle puis assemblée.
+    Chaque rendu attend que le plafond de RSS le permette, comme sa préparation
+    (normalisation du template, piste de fond) qui transcode elle aussi.
+    Annulé, le rendu arrête ses process ffmpeg.
+    """
+    governor = get_memory_governor()
+    async with governor.slot():
+        plan = await _run_in_pool(plan_render, spec)
+    if not plan.segments:
+        async with governor.slot():
+            return await _run_in_pool(render_video, plan.spec)
+
+    async def run_segment(segment: RenderSpec) -> str:
+        async with governor.slot():
+            return await _run_in_pool(render_segment, segment)
+
+    try:
+        # Attendre tous les segments avant de nettoyer leur répertoire, même en cas d'échec
+        results = await asyncio.gather(*[run_segment(segment) for segment in plan.segments], return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            raise errors[0]
+        return await _run_in_pool(concat_segments, plan)
+    finally:
+        shutil.rmtree(plan.segments_dir, ignore_errors=True)
@@ -0,0 +1,134 @@
+"""
+Diaporama Ken Burns à partir des images générées d'une idée
+
+Chaque image reste à l'écran pendant un groupe de phrases de la narration
+(les images suivent l'ordre du script), avec un zoom et un panoramique lents
+et un fondu enchaîné centré sur le changement d'image.
+
+La piste vidéo est un seul graphe de filtres ffmpeg: chaque image est décodée
+une fois, recadrée au format de la vidéo, puis animée par `zoompan` (une image
+source → toutes les images de sa plage) et enchaînée à la suivante par `xfade`.
+Aucun clip MoviePy par image, aucune image ne traverse Python.
+"""
+import os
+from typing import List, Optional, Tuple
+from pydantic import BaseModel
+from models import TimestampItem
+
+# Directions de panoramique, parcourues dans l'ordre des images
+PAN_DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, -1)]
+
+
+class Slide(BaseModel):
+    """Une image du diaporama et sa plage d'images, fondus exclus ([start_frame, end_frame))"""
+    path: str
+    start_frame: int
+    end_frame: int
+
+
+def get_ken_burns_zoom() -> float:
+    """Amplitude du zoom Ken Burns (0.15: la fenêtre varie de 100% à 1/1.15 de l'image)"""
+    return max(0.0, float(os.getenv("KEN_BURNS_ZOOM", "0.15")))
+
+
+def get_crossfade_seconds() -> float:
+    """Durée des fondus enchaînés entre deux images"""
+    return max(0.0, float(os.getenv("SLIDESHOW_CROSSFADE_SECONDS", "0.8")))
+
+
+def plan_slides(images: List[str], phrases: List[TimestampItem], duration: float, fps: int) -> List[Slide]:
+    """
+    Répartir les images sur la durée de la vidéo
+
+    Avec au moins une phrase par image, les phrases sont réparties en groupes
+    contigus (un par image) et chaque changement d'image tombe au début d'une
+    phrase. Sinon, les images se partagent la durée à parts égales.
+    Une image qui ne couvrirait aucune image de la vidéo est ignorée.
+    """
+    total_frames = round(duration * fps)
+    if not images or total_frames <= 0:
+        return []
+    phrases = sorted(phrases, key=lambda phrase: phrase.start_time_ms)
+    count = len(images)
+    if len(phrases) >= count:
+        boundaries = [phrases[len(phrases) * i // count].start_time_ms * fps / 1000 for i in range(1, count)]
+    else:
+        boundaries = [total_frames * i / count for i in range(1, count)]
+    edges = [0] + [min(max(round(boundary), 0), total_frames) for boundary in boundaries] + [total_frames]
+
+    slides = []
+    for i, path in enumerate(images):
+        if edges[i + 1] <= edges[i]:
+            continue
+        if slides and slides[-1].end_frame != edges[i]:
+            # Image précédente ignorée: la suivante reprend sa plage
+            edges[i] = slides[-1].end_frame
+        slides.append(Slide(path=path, start_frame=edges[i], end_frame=edges[i + 1]))
+    return slides
+
+
+def slide_spans(slides: List[Slide], fps: int, crossfade: Optional[float] = None) -> List[Tuple[int, int]]:
+    """
+    Plage d'images de chaque image, fondus compris: (première image, nombre d'images)
+
+    Le fondu est centré sur le changement d'image et limité à la moitié de la
+    plus courte des deux images.
+    """
+    crossfade = get_crossfade_seconds() if crossfade is None else crossfade
+    fades = [
+        min(round(crossfade * fps),
+            (slides[i].end_frame - slides[i].start_frame) // 2,
+            (slides[i + 1].end_frame - slides[i + 1].start_frame) // 2)
+        for i in range(len(slides) - 1)
+    ]
+    spans = []
+    for i, slide in enumerate(slides):
+        start = slide.start_frame - (fades[i - 1] - fades[i - 1] // 2 if i > 0 else 0)
+        end = slide.end_frame + (fades[i] // 2 if i < len(fades) else 0)
+        spans.append((start, end - start))
+    return spans
+
+
+def build_slideshow_graph(slides: List[Slide], width: int, height: int, fps: int, filters: Optional[List[str]] = None,
+                          zoom: Optional[float] = None, crossfade: Optional[float] = None) -> str:
+    """
+    Graphe -filter_complex du diaporama (entrée i = image i), `filters` appliqués
+    au résultat, sortie étiquetée [slideshow]
+
+    L'image est préparée à (1 + zoom) fois la taille de sortie: la fenêtre la plus
+    serrée reste à la résolution de la vidéo. Le zoom alterne avant/arrière et le
+    panoramique progresse avec lui, sans jamais sortir de l'image.
+    """
+    zoom = get_ken_burns_zoom() if zoom is None else zoom
+    source_width = round(width * (1 + zoom) / 2) * 2
+    source_height = round(height * (1 + zoom) / 2) * 2
+    spans = slide_spans(slides, fps, crossfade)
+
+    chains = []
+    for i, (_, frames) in enumerate(spans):
+        progress = f"on/{max(frames - 1, 1)}"
+        amount = progress if i % 2 == 0 else f"(1-{progress})"
+        dx, dy = PAN_DIRECTIONS[i % len(PAN_DIRECTIONS)]
+        chains.append(
+            f"[{i}:v]scale={source_width}:{source_height}:force_original_aspect_ratio=increase,"
+            f"crop={source_width}:{source_height},setsar=1,"
+            f"zoompan=z='1+{zoom}*{amount}'"
+            f":x='iw/2-iw/zoom/2{dx:+d}*(iw-iw/zoom)/2*{amount}'"
+            f":y='ih/2-ih/zoom/2{dy:+d}*(ih-ih/zoom)/2*{amount}'"
+            f":d={frames}:s={width}x{height}:fps={fps},format=yuv420p[s{i}]"
+        )
+
+    # Fondus enchaînés: xfade se cale sur la chronologie du flux déjà assemblé
+    current = "s0"
+    for i in range(1, len(slides)):
+        start, _ = spans[i]
+        previous_start, previous_frames = spans[i - 1]
+        fade = previous_start + previous_frames - start
+        output = f"x{i}"
+        if fade > 0:
+            chains.append(f"[{current}][s{i}]xfade=transition=fade:duration={fade / fps:.6f}:offset={start / fps:.6f}[{output}]")
+        else:
+            chains.append(f"[{current}][s{i}]concat=n=2:v=1:a=0[{output}]")
+        current = output
+    chains.append(f"[{current}]{','.join(filters or []) or 'null'}[slideshow]")
+    return ";".join(chains)
@@ -4,20 +4,18 @@ Facilite la maintenance et les évolutions futures
 """
 import re
 import os
-from moviepy.editor import TextClip
-from typing import List, Dict, Optional
-from models import TimestampItem
+from bisect import bisect_right
+import numpy as np
+from moviepy.editor import VideoClip
+from typing import List, Dict, Optional, Tuple
+from models import TimestampItem, VideoType
 from database import get_timestamps_collection
 from services.assemblyai_service import AssemblyAIService
+from services.caption_cache_service import CaptionCacheService
+from services.caption_raster_service import CaptionRasterService, get_font
 
-# Configurer MoviePy pour ImageMagick
-try:
-    from config.moviepy_config import configure_moviepy
-    configure_moviepy()
-except Exception as e:
-    print(f"⚠️  MoviePy config import failed: {e}")
-    # Fallback: configuration directe
-    os.environ['IMAGEMAGICK_BINARY'] = os.getenv('IMAGEMAGICK_BINARY', '/usr/bin/convert')
+# Rapport hauteur de ligne / taille d'em des polices sans-serif (taille ASS vs pointsize ImageMagick)
+ASS_FONT_SCALE = 1.16
 
 class SubtitleService:
     """Service de génération et gestion des sous-titres"""
@@ -45,12 +43,22 @@ class SubtitleService:
             'margin': 60,  # Marge horizontale augmentée
             'bottom_offset': 120,  # Distance du bas de l'écran
             'stroke_color': 'black',
-            'stroke_width': 2
+            'stroke_width': 2,
+            'caption_mode': 'phrase',  # phrase ou words (mot courant surligné, si les mots sont horodatés)
+            'highlight_color': 'yellow'
+        }
+        
+        # Mode des légendes par type de vidéo
+        self.caption_modes = {
+            VideoType.SHORT: os.getenv("SHORT_CAPTION_MODE", "phrase").lower(),
+            VideoType.NORMAL: os.getenv("NORMAL_CAPTION_MODE", "phrase").lower(),
         }
         
         # Variable d'environnement pour désactiver le traitement des sous-titres
         self.subtitles_enabled = os.getenv("SUBTITLES_ENABLED", "true").lower() == "true"
         self.assemblyai_service = AssemblyAIService()
+        self.rasterizer = CaptionRasterService()  # Légendes rastérisées en mémoire (Pillow)
+        self.caption_cache = CaptionCacheService()  # Légendes déjà rastérisées (PNG sous RESOURCES_DIR)
         
         print(f"🎨 Subtitle Service initialized with font: {selected_font}")
         print(f"📝 Subtitles enabled: {self.subtitles_enabled}")
@@ -73,142 +81,290 @@ class SubtitleService:
         
         return clean_text
     
-    def create_subtitle_clip(
-        self, 
-        text: str, 
-        start_time_ms: float, 
-        duration_ms: float,
-        video_width: int,
-        video_height: int,
-        config: dict = None
-    ) -> TextClip:
+    def get_caption_config(self, video_type: VideoType) -> dict:
+        """Configuration des légendes d'un type de vidéo (SHORT_CAPTION_MODE / NORMAL_CAPTION_MODE)"""
+        return {'caption_mode': self.caption_modes.get(video_type, self.default_config['caption_mode'])}
+    
+    def caption_words(self, phrase: TimestampItem) -> List[Tuple[str, int, int]]:
+        """Mots horodatés d'une phrase, nettoyés (les marqueurs seuls sont retirés)"""
+        words = []
+        for text, start, end in phrase.words:
+            clean_word = self.clean_text(text)
+            if clean_word:
+                words.append((clean_word, start, end))
+        return words
+    
+    def prepare_caption_phrases(self, phrases: List[TimestampItem], config: dict = None) -> List[TimestampItem]:
         """
-        Créer un clip de sous-titre pour une phrase
+        Phrases à afficher, triées et nettoyées
+        
+        En mode mot à mot, le texte d'une phrase est celui de ses mots (l'index
+        d'un mot est alors sa position dans le texte); une phrase sans mots
+        horodatés reste affichée en entier.
+        """
+        cfg = {**self.default_config, **(config or {})}
+        word_mode = cfg['caption_mode'] == 'words'
+        prepared = []
+        for phrase in sorted(phrases, key=lambda phrase: phrase.start_time_ms):
+            words = self.caption_words(phrase) if word_mode else []
+            text = " ".join(word for word, _, _ in words) if words else self.clean_text(phrase.text)
+            if text:
+                prepared.append(phrase.model_copy(update={"text": text, "words": words}))
+        return prepared
+    
+    def rasterize_caption(self, text: str, video_width: int, config: dict = None, highlight: Optional[int] = None) -> np.ndarray:
+        """
+        Rastériser une légende en mémoire: image RGBA de largeur video_width - margin
         
         Args:
-            text: Texte du sous-titre
-            start_time_ms: Temps de début en millisecondes
-            duration_ms: Durée en millisecondes
+            text: Texte du sous-titre (nettoyé)
             video_width: Largeur de la vidéo
-            video_height: Hauteur de la vidéo
             config: Configuration optionnelle (override des valeurs par défaut)
+            highlight: Index du mot à surligner (mode mot à mot)
             
         Returns:
-            TextClip configuré
+            Tableau RGBA uint8 (hauteur, largeur, 4)
         """
-        # Fusionner config par défaut avec config personnalisée
         cfg = {**self.default_config, **(config or {})}
-        
-        # Créer le TextClip
-        txt_clip = TextClip(
-            text,
-            fontsize=cfg['fontsize'],
-            color=cfg['color'],
-            bg_color=cfg['bg_color'],
-            font=cfg['font'],
-            size=(video_width - cfg['margin'], None),
-            method='caption'
+        if highlight is not None:
+            cfg['highlight_word'] = highlight
+        # La police résolue fait partie de la clé: installer une police invalide les légendes rendues avec la police de secours
+        font_path = getattr(get_font(cfg['font'], int(cfg['fontsize'])), 'path', None)
+        return self.caption_cache.get_or_render(
+            text, video_width - cfg['margin'], cfg, self.rasterizer.render,
+            font_path=font_path if isinstance(font_path, str) else None
         )
-        
-        # Positionner en bas de l'écran
-        txt_clip = txt_clip.set_position(('center', video_height - cfg['bottom_offset']))
-        txt_clip = txt_clip.set_start(start_time_ms / 1000)
-        txt_clip = txt_clip.set_duration(duration_ms / 1000)
-        
-        return txt_clip
     
-    def create_subtitle_clips(
-        self, 
-        phrases: List[TimestampItem], 
-        video_width: int, 
+    def report_caption_cache(self):
+        """Afficher et cumuler le taux de succès du cache de légendes pour ce rendu"""
+        stats = self.caption_cache.get_stats()
+        if stats['hits'] or stats['misses']:
+            print(f"🗃️ Cache des légendes: {stats['hits']} succès, {stats['misses']} rastérisées ({stats['hit_rate']:.0%})")
+        self.caption_cache.record_stats()
+    
+    def _ass_color(self, color: str) -> str:
+        """Couleur nommée ou #RRGGBB → couleur ASS (&HAABBGGRR)"""
+        named = {'white': 'FFFFFF', 'black': '000000', 'yellow': 'FFFF00', 'red': 'FF0000'}
+        rgb = named.get(color.lower(), color.lstrip('#')).upper()
+        return f"&H00{rgb[4:6]}{rgb[2:4]}{rgb[0:2]}"
+    
+    def _ass_time(self, time_ms: float) -> str:
+        """Millisecondes → temps ASS (H:MM:SS.cc)"""
+        centiseconds = int(round(time_ms / 10))
+        hours, rest = divmod(centiseconds, 360000)
+        minutes, rest = divmod(rest, 6000)
+        seconds, centiseconds = divmod(rest, 100)
+        return f"{hours}:{minutes:02d}:{seconds:02d}.{centiseconds:02d}"
+    
+    def build_ass(
+        self,
+        phrases: List[TimestampItem],
+        video_width: int,
         video_height: int,
         config: dict = None
-    ) -> List[TextClip]:
+    ) -> str:
         """
-        Créer tous les clips de sous-titres pour une liste de phrases
+        Générer un fichier ASS reproduisant la mise en page des légendes rastérisées
+        (texte centré sur fond noir, largeur vidéo - margin, haut du bloc à bottom_offset du bas)
         
         Args:
-            phrases: Liste des phrases avec timestamps
-            video_width: Largeur de la vidéo
+            phrases: Phrases avec timestamps
+            video_width: Largeur de la vidéo (PlayResX: les unités ASS sont des pixels)
             video_height: Hauteur de la vidéo
             config: Configuration optionnelle
             
         Returns:
-            Liste de TextClip
+            Contenu du fichier .ass
         """
-        subtitle_clips = []
+        cfg = {**self.default_config, **(config or {})}
         
-        for phrase in phrases:
-            # Nettoyer le texte
-            clean_text = self.clean_text(phrase.text)
+        # 'DejaVu-Sans-Bold' (nom ImageMagick) → famille 'DejaVu Sans' en gras
+        font = cfg['font']
+        bold = font.endswith('-Bold')
+        family = font[:-len('-Bold')] if bold else font
+        family = family.replace('-', ' ')
+        
+        # La taille ASS est la hauteur de ligne, ImageMagick utilise la taille d'em (~1.16 em pour DejaVu)
+        fontsize = round(cfg['fontsize'] * ASS_FONT_SCALE)
+        side_margin = cfg['margin'] // 2
+        
+        lines = [
+            "[Script Info]",
+            "ScriptType: v4.00+",
+            f"PlayResX: {video_width}",
+            f"PlayResY: {video_height}",
+            "WrapStyle: 2",  # Pas de retour à la ligne libass: les coupures \\N viennent de la mise en page Pillow
+            "ScaledBorderAndShadow: yes",
+            "",
+            "[V4+ Styles]",
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+            "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+            "Alignment, MarginL, MarginR, MarginV, Encoding",
+            # BorderStyle 3: boîte opaque (couleur de contour) comme bg_color; Alignment 8: ancré en haut au centre
+            f"Style: Default,{family},{fontsize},{self._ass_color(cfg['color'])},{self._ass_color(cfg['color'])},"
+            f"{self._ass_color(cfg['bg_color'])},{self._ass_color(cfg['bg_color'])},{-1 if bold else 0},0,0,0,100,100,0,0,"
+            f"3,{cfg['stroke_width']},0,8,{side_margin},{side_margin},{video_height - cfg['bottom_offset']},1",
+            "",
+            "[Events]",
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+        ]
+        
+        def escape(text: str) -> str:
+            # Pas de blocs d'override ni de séquences d'échappement venant du texte
+            return text.replace('{', '(').replace('}', ')').replace('\\', '/')
+        
+        def dialogue(start_ms: float, end_ms: float, text: str):
+            lines.append(f"Dialogue: 0,{self._ass_time(start_ms)},{self._ass_time(end_ms)},Default,,0,0,0,,{text}")
+        
+        highlight, base = self._ass_color(cfg['highlight_color']), self._ass_color(cfg['color'])
+        
+        def caption_text(layout, current: Optional[int] = None) -> str:
+            # Mêmes lignes que la légende rastérisée (moviepy/stream), le mot courant en couleur de surlignage
+            return "\\N".join(
+                " ".join(
+                    f"{{\\1c{highlight}}}{escape(fragment)}{{\\1c{base}}}" if word_index == current else escape(fragment)
+                    for word_index, fragment in line
+                )
+                for line in layout
+            )
+        
+        for phrase in self.prepare_caption_phrases(phrases, cfg):
+            layout = self.rasterizer.caption_layout(phrase.text, video_width - cfg['margin'], cfg)
+            if not phrase.words:
+                dialogue(phrase.start_time_ms, phrase.end_time_ms, caption_text(layout))
+                continue
+            # Mot à mot: un événement par mot
+            starts = [max(start, phrase.start_time_ms) for _, start, _ in phrase.words]
+            if starts[0] > phrase.start_time_ms:
+                dialogue(phrase.start_time_ms, starts[0], caption_text(layout))
+            for index, start in enumerate(starts):
+                end = starts[index + 1] if index + 1 < len(starts) else phrase.end_time_ms
+                if end <= start:
+                    continue
+                dialogue(start, end, caption_text(layout, index))
+        
+        return "\n".join(lines) + "\n"
+    
+    def _srt_time(self, time_ms: float) -> str:
+        """Millisecondes → temps SRT (HH:MM:SS,mmm)"""
+        milliseconds = int(round(time_ms))
+        hours, rest = divmod(milliseconds, 3600000)
+        minutes, rest = divmod(rest, 60000)
+        seconds, milliseconds = divmod(rest, 1000)
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+    
+    def build_srt(self, phrases: List[TimestampItem]) -> str:
+        """
+        Générer un fichier SRT propre (texte nettoyé, légendes numérotées dans l'ordre)
+        
+        Args:
+            phrases: Phrases avec timestamps
             
-            # Ne créer un sous-titre que si du texte reste
+        Returns:
+            Contenu du fichier .srt
+        """
+        blocks = []
+        for phrase in sorted(phrases, key=lambda phrase: phrase.start_time_ms):
+            clean_text = self.clean_text(phrase.text)
             if not clean_text:
                 continue
-            
-            # Créer le clip
-            txt_clip = self.create_subtitle_clip(
-                text=clean_text,
-                start_time_ms=phrase.start_time_ms,
-                duration_ms=(phrase.end_time_ms - phrase.start_time_ms),
-                video_width=video_width,
-                video_height=video_height,
-                config=config
+            blocks.append(
+                f"{len(blocks) + 1}\n"
+                f"{self._srt_time(phrase.start_time_ms)} --> {self._srt_time(phrase.end_time_ms)}\n"
+                f"{clean_text}\n"
             )
+        return "\n".join(blocks)
+    
+    def write_subtitle_files(
+        self,
+        phrases: List[TimestampItem],
+        video_path: str,
+        video_width: int,
+        video_height: int,
+        config: dict = None
+    ) -> Dict[str, str]:
+        """
+        Écrire les sous-titres à côté de la vidéo: .srt (piste YouTube) et .ass (style de default_config)
+        
+        Args:
+            phrases: Phrases avec timestamps
+            video_path: Chemin de la vidéo (les fichiers prennent le même nom)
+            video_width: Largeur de la vidéo
+            video_height: Hauteur de la vidéo
+            config: Configuration optionnelle
             
-            subtitle_clips.append(txt_clip)
+        Returns:
+            {"srt": chemin, "ass": chemin}, vide s'il n'y a aucune légende
+        """
+        srt_content = self.build_srt(phrases)
+        if not srt_content:
+            return {}
         
-        print(f"📝 {len(subtitle_clips)} sous-titres créés (marqueurs ElevenLabs nettoyés)")
-        return subtitle_clips
+        base_path = os.path.splitext(video_path)[0]
+        paths = {"srt": f"{base_path}.srt", "ass": f"{base_path}.ass"}
+        contents = {
+            "srt": srt_content,
+            "ass": self.build_ass(phrases, video_width, video_height, config),
+        }
+        for kind, path in paths.items():
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(contents[kind])
+        print(f"📝 Sous-titres exportés: {paths['srt']}, {paths['ass']}")
+        return paths
     
+    async def get_subtitle_phrases(self, idea_id: str) -> List[TimestampItem]:
+        """
+        Charger les phrases à sous-titrer pour une idée
+        
+        Args:
+            idea_id: ID de l'idée
+            
+        Returns:
+            Liste des TimestampItem, vide si les sous-titres sont désactivés ou absents
+        """
+        # Vérifier si les sous-titres sont désactivés
+        if not self.subtitles_enabled:
+            print("📝 Sous-titres désactivés (SUBTITLES_ENABLED=false)")
+            return []
+        
+        timestamps_collection = get_timestamps_collection()
+        existing_timestamp = await timestamps_collection.find_one({"idea_id": idea_id}, {"_id": 0})
+        
+        if not existing_timestamp:
+            print(f"❌ Aucun timestamp trouvé pour l'idée {idea_id}")
+            return []
+        
+        print(f"✅ Timestamps existants trouvés pour l'idée {idea_id}")
+        return [TimestampItem(**item) for item in existing_timestamp["timestamps"]]
     
-    async def add_subtitles_to_video(
+    def apply_subtitles(
         self,
         final_video,
-        idea_id: str,
+        phrases: List[TimestampItem],
         config: dict = None
     ):
         """
-        Ajouter les sous-titres à une vidéo finale en centralisant toute la logique
+        Incruster des sous-titres dans une vidéo (sans accès à la base, utilisable dans un process de rendu)
         
         Args:
             final_video: Vidéo finale (MoviePy VideoClip)
-            idea_id: ID de l'idée
+            phrases: Phrases avec timestamps
             config: Configuration optionnelle pour les sous-titres
             
         Returns:
-            Vidéo avec sous-titres ajoutés si activés, vidéo originale sinon
+            Vidéo avec sous-titres si des phrases sont fournies, vidéo originale sinon
         """
-        # Vérifier si les sous-titres sont désactivés
-        if not self.subtitles_enabled:
-            print("📝 Sous-titres désactivés (SUBTITLES_ENABLED=false)")
+        if not phrases:
             return final_video
         
         try:
-            # Vérifier si les timestamps existent déjà
-            timestamps_collection = get_timestamps_collection()
-            existing_timestamp = await timestamps_collection.find_one({"idea_id": idea_id}, {"_id": 0})
-            
-            if not existing_timestamp:
-                print(f"❌ Aucun timestamp trouvé pour l'idée {idea_id}")
-                return final_video
-            
-            print(f"✅ Timestamps existants trouvés pour l'idée {idea_id}")
-            
-            # Créer les clips de sous-titres à partir des timestamps
+            # Une seule couche de légendes (index d'intervalles), pas un clip par phrase
             print(f"📝 Génération des sous-titres pour la vidéo...")
-            subtitle_clips = self.create_subtitle_clips(
-                existing_timestamp["timestamps"],
-                int(final_video.w),
-                int(final_video.h),
-                config
-            )
+            overlay = CaptionOverlayClip(final_video, phrases, config, subtitle_service=self)
             
-            if subtitle_clips:
-                from moviepy.editor import CompositeVideoClip
-                final_video_with_subtitles = CompositeVideoClip([final_video] + subtitle_clips)
-                print(f"✅ {len(subtitle_clips)} sous-titres ajoutés à la vidéo")
-                return final_video_with_subtitles
+            if overlay.caption_count():
+                print(f"✅ {overlay.caption_count()} sous-titres ajoutés à la vidéo")
+                return overlay
             else:
                 print("📝 Aucun sous-titre généré (phrases vides ou nettoyées)")
                 return final_video
@@ -217,6 +373,31 @@ class SubtitleService:
             print(f"❌ Erreur lors de l'ajout des sous-titres: {str(e)}")
             return final_video
     
+    async def add_subtitles_to_video(
+        self,
+        final_video,
+        idea_id: str,
+        config: dict = None
+    ):
+        """
+        Ajouter les sous-titres à une vidéo finale en centralisant toute la logique
+        
+        Args:
+            final_video: Vidéo finale (MoviePy VideoClip)
+            idea_id: ID de l'idée
+            config: Configuration optionnelle pour les sous-titres
+            
+        Returns:
+            Vidéo avec sous-titres ajoutés si activés, vidéo originale sinon
+        """
+        try:
+            phrases = await self.get_subtitle_phrases(idea_id)
+        except Exception as e:
+            print(f"❌ Erreur lors de l'ajout des sous-titres: {str(e)}")
+            return final_video
+        
+        return self.apply_subtitles(final_video, phrases, config)
+    
     async def process_subtitles_for_idea(
         self,
         idea_id: str,
@@ -262,3 +443,161 @@ class SubtitleService:
         except Exception as e:
             print(f"❌ Erreur lors du traitement des sous-titres pour l'idée {idea_id}: {str(e)}")
             return False
+
+class CaptionTrack:
+    """
+    Couche de sous-titres pour un rendu image par image
+    
+    Une légende n'est rastérisée qu'à son apparition et libérée à sa fin:
+    seules les légendes actives occupent de la mémoire, quelle que soit la
+    durée de la vidéo. Les images doivent être demandées dans l'ordre.
+    
+    En mode mot à mot, une légende n'est rastérisée à nouveau qu'au changement
+    de mot surligné (frontières de mots trouvées par bisection).
+    """
+    
+    def __init__(self, phrases: List[TimestampItem], video_width: int, video_height: int,
+                 config: dict = None, subtitle_service: SubtitleService = None):
+        self.subtitle_service = subtitle_service or SubtitleService()
+        self.video_width = video_width
+        self.video_height = video_height
+        self.config = config
+        self.phrases = self.subtitle_service.prepare_caption_phrases(phrases, config)
+        self.word_starts = [[start for _, start, _ in phrase.words] for phrase in self.phrases]
+        self._next = 0  # Prochaine phrase à faire apparaître
+        self._active: Dict[int, tuple] = {}  # index → (mot surligné, (rgb, alpha, x, y))
+        self.materialized = 0
+    
+    def highlight_index(self, index: int, time_ms: float) -> Optional[int]:
+        """Mot surligné de la phrase `index` à `time_ms` (le dernier commencé), None hors mode mot à mot"""
+        index = bisect_right(self.word_starts[index], time_ms) - 1
+        return index if index >= 0 else None
+    
+    def _materialize(self, phrase: TimestampItem, highlight: Optional[int] = None) -> tuple:
+        """
+        Rastériser une légende et précalculer son mélange: RGB prémultiplié par
+        l'alpha, alpha inverse et position (coupée aux bords de la vidéo)
+        """
+        rgba = self.subtitle_service.rasterize_caption(phrase.text, self.video_width, self.config, highlight=highlight)
+        alpha = rgba[..., 3:].astype(np.float32) / 255
+        premultiplied = rgba[..., :3].astype(np.float32) * alpha
+        self.materialized += 1
+        
+        cfg = {**self.subtitle_service.default_config, **(self.config or {})}
+        x = (self.video_width - rgba.shape[1]) // 2
+        y = self.video_height - cfg['bottom_offset']
+        # Partie visible seulement (une légende longue peut dépasser du bas de l'image)
+        left, top = max(0, -x), max(0, -y)
+        right = min(rgba.shape[1], self.video_width - x)
+        bottom = min(rgba.shape[0], self.video_height - y)
+        return premultiplied[top:bottom, left:right], 1 - alpha[top:bottom, left:right], x + left, y + top
+    
+    @staticmethod
+    def blend(frame: np.ndarray, caption: tuple):
+        """Mélange alpha limité à la boîte de la légende (le reste de l'image n'est pas touché)"""
+        premultiplied, inverse_alpha, x, y = caption
+        height, width = inverse_alpha.shape[:2]
+        region = frame[y:y + height, x:x + width]
+        region[:] = (region * inverse_alpha + premultiplied).astype(np.uint8)
+    
+    def active_count(self) -> int:
+        return len(self._active)
+    
+    def _activate(self, index: int, time_ms: float):
+        highlight = self.highlight_index(index, time_ms)
+        try:
+            self._active[index] = (highlight, self._materialize(self.phrases[index], highlight))
+        except Exception as e:
+            print(f"❌ Erreur lors de la création du sous-titre: {str(e)}")
+            self._active.pop(index, None)
+    
+    def composite(self, frame: np.ndarray, t: float) -> np.ndarray:
+        """Incruster les légendes actives à `t` secondes (le cadre n'est copié que s'il y en a)"""
+        time_ms = t * 1000
+        while self._next < len(self.phrases) and self.phrases[self._next].start_time_ms <= time_ms:
+            if self.phrases[self._next].end_time_ms > time_ms:
+                self._activate(self._next, time_ms)
+            self._next += 1
+        for index in [index for index in self._active if self.phrases[index].end_time_ms <= time_ms]:
+            del self._active[index]
+        # Mot à mot: nouvelle image seulement quand le mot surligné change
+        for index, (highlight, _) in list(self._active.items()):
+            if self.word_starts[index] and self.highlight_index(index, time_ms) != highlight:
+                self._activate(index, time_ms)
+        
+        if not self._active:
+            return frame
+        frame = frame.copy()
+        for _, caption in self._active.values():
+            self.blend(frame, caption)
+        return frame
+
+
+class CaptionOverlayClip(VideoClip):
+    """
+    Vidéo MoviePy avec une couche de légendes
+    
+    Remplace CompositeVideoClip([vidéo] + un ImageClip par phrase), qui parcourt
+    tous les clips à chaque image: les débuts des phrases sont triés et la
+    légende active est trouvée par bisection (O(log n) par image), puis mélangée
+    dans sa seule boîte avec un masque précalculé. L'accès aux images peut être
+    aléatoire; seules les dernières légendes rastérisées restent en mémoire.
+    En mode mot à mot, la légende est redessinée à chaque frontière de mot.
+    """
+    
+    # Légendes gardées en mémoire (la légende courante et sa voisine suffisent à un rendu séquentiel)
+    MAX_MATERIALIZED = 2
+    
+    def __init__(self, clip, phrases: List[TimestampItem], config: dict = None,
+                 subtitle_service: SubtitleService = None):
+        self.track = CaptionTrack(phrases, int(clip.w), int(clip.h), config, subtitle_service)
+        self.starts = [phrase.start_time_ms for phrase in self.track.phrases]
+        self.clip = clip
+        self._materialized: Dict[tuple, Optional[tuple]] = {}  # (phrase, mot surligné) → légende
+        # make_frame posé après l'init: VideoClip décoderait sinon une image pour connaître la taille
+        super().__init__(duration=clip.duration)
+        self.make_frame = self._make_frame
+        self.size = clip.size
+        self.fps = getattr(clip, "fps", None)
+        self.audio = clip.audio
+        self.mask = clip.mask
+    
+    def caption_count(self) -> int:
+        return len(self.track.phrases)
+    
+    def active_index(self, t: float) -> Optional[int]:
+        """Index de la légende affichée à `t` secondes (la dernière commencée), None entre deux légendes"""
+        time_ms = t * 1000
+        index = bisect_right(self.starts, time_ms) - 1
+        if index < 0 or self.track.phrases[index].end_time_ms <= time_ms:
+            return None
+        return index
+    
+    def _caption(self, index: int, highlight: Optional[int]) -> Optional[tuple]:
+        key = (index, highlight)
+        if key not in self._materialized:
+            try:
+                caption = self.track._materialize(self.track.phrases[index], highlight)
+            except Exception as e:
+                print(f"❌ Erreur lors de la création du sous-titre: {str(e)}")
+                caption = None
+            while len(self._materialized) >= self.MAX_MATERIALIZED:
+                del self._materialized[next(iter(self._materialized))]
+            self._materialized[key] = caption
+        return self._materialized[key]
+    
+    def close(self):
+        self.clip.close()
+        super().close()
+    
+    def _make_frame(self, t: float) -> np.ndarray:
+        frame = self.clip.get_frame(t)
+        index = self.active_index(t)
+        if index is None:
+            return frame
+        caption = self._caption(index, self.track.highlight_index(index, t * 1000))
+        if caption is None:
+            return frame
+        frame = np.array(frame, dtype=np.uint8)
+        CaptionTrack.blend(frame, caption)
+        return frame
@@ -0,0 +1,128 @@
+"""
+Cache des templates vidéo normalisés
+
+Chaque template est transcodé une seule fois par VideoType dans un format
+canonique: résolution et fps de la cible, GOP fixe et fermé, sans audio.
+Le résultat est indexé par le hash du fichier source. Un template canonique
+peut ensuite être bouclé et coupé en copie de flux (sans décodage) quand
+aucun sous-titre n'est incrusté.
+"""
+import hashlib
+import os
+import subprocess
+from typing import Dict, List, Tuple
+from models import VideoType
+from services.resource_config_service import ResourceConfigService
+
+# Hash des sources déjà lues dans ce process: (chemin, taille, mtime) → sha256
+_source_hashes: Dict[Tuple[str, int, float], str] = {}
+
+
+def _parse_size(value: str) -> Tuple[int, int]:
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+class TemplateCacheService:
+    """Ingestion et résolution des templates canoniques"""
+
+    def __init__(self):
+        self.resource_config = ResourceConfigService()
+        self.cache_dir = os.path.join(self.resource_config.get_template_dir(), ".cache")
+        self.enabled = os.getenv("TEMPLATE_CACHE_ENABLED", "true").lower() == "true"
+        self.fps = int(os.getenv("RENDER_FPS", "24"))
+        self.sizes = {
+            VideoType.SHORT: _parse_size(os.getenv("SHORT_VIDEO_SIZE", "1080x1920")),  # 9:16
+            VideoType.NORMAL: _parse_size(os.getenv("NORMAL_VIDEO_SIZE", "1920x1080")),  # 16:9
+        }
+
+    def get_profile(self, video_type: VideoType) -> Dict[str, int]:
+        """Format canonique d'un VideoType: taille, fps et GOP (une image clé par seconde)"""
+        width, height = self.sizes[VideoType(video_type)]
+        return {"width": width, "height": height, "fps": self.fps, "gop": self.fps}
+
+    def hash_source(self, path: str) -> str:
+        """sha256 du template source (mémorisé tant que le fichier ne change pas)"""
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime)
+        if key not in _source_hashes:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            _source_hashes[key] = digest.hexdigest()
+        return _source_hashes[key]
+
+    def canonical_path(self, source_path: str, video_type: VideoType) -> str:
+        """Chemin du template canonique (le profil fait partie du nom: changer la cible invalide le cache)"""
+        profile = self.get_profile(video_type)
+        name = f"{self.hash_source(source_path)[:24]}-{profile['width']}x{profile['height']}-{profile['fps']}fps.mp4"
+        return os.path.join(self.cache_dir, VideoType(video_type).value, name)
+
+    def ensure_canonical(self, source_path: str, video_type: VideoType) -> str:
+        """
+        Retourner le template canonique, en le transcodant s'il n'est pas encore en cache
+        (appel bloquant: à exécuter dans le pool de rendu ou un thread)
+        """
+        output_path = self.canonical_path(source_path, video_type)
+        if os.path.exists(output_path):
+            return output_path
+
+        from services.render_service import get_ffmpeg_binary
+
+        profile = self.get_profile(video_type)
+        width, height, gop = profile["width"], profile["height"], profile["gop"]
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        partial_path = f"{output_path}.{os.getpid()}.partial.mp4"
+
+        print(f"🧰 Normalizing template {os.path.basename(source_path)} → {width}x{height}@{profile['fps']}fps ({VideoType(video_type).value})")
+        command = [
+            get_ffmpeg_binary(), "-y", "-hide_banner", "-loglevel", "error",
+            "-i", source_path,
+            # Remplir la cible (recadrage centré) sans déformer l'image
+            "-vf", f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height},setsar=1",
+            "-r", str(profile["fps"]),
+            "-an",
+            "-c:v", "libx264", "-preset", "medium", "-crf", "18", "-pix_fmt", "yuv420p",
+            # GOP fixe et fermé: chaque boucle du template commence sur une image clé
+            "-g", str(gop), "-keyint_min", str(gop), "-sc_threshold", "0", "-flags", "+cgop",
+            "-movflags", "+faststart",
+            partial_path,
+        ]
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise RuntimeError(f"Template normalization failed for {source_path}: {result.stderr.strip()[-2000:]}")
+
+        # Renommage atomique: un autre process de rendu ne voit jamais un fichier incomplet
+        os.replace(partial_path, output_path)
+        return output_path
+
+    def resolve(self, source_path: str, video_type: VideoType) -> str:
+        """Template à utiliser pour un rendu (source brute si le cache est désactivé)"""
+        if not self.enabled:
+            return source_path
+        return self.ensure_canonical(source_path, video_type)
+
+    def ingest_all(self) -> List[str]:
+        """
+        Transcoder les templates sélectionnables pour chaque VideoType (étape d'ingestion):
+        seuls les templates au format de la cible, tous s'il n'y en a aucun
+        """
+        from services.template_index_service import TemplateIndexService
+
+        template_index = TemplateIndexService()
+        canonical = []
+        for video_type in VideoType:
+            for source_path in template_index.get_candidates(video_type):
+                try:
+                    canonical.append(self.ensure_canonical(source_path, video_type))
+                except Exception as e:
+                    print(f"❌ {e}")
+        print(f"✅ {len(canonical)} canonical template(s) ready in {self.cache_dir}")
+        return canonical
+
+
+if __name__ == "__main__":
+    TemplateCacheService().ingest_all()
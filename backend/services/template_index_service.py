@@ -0,0 +1,181 @@
+"""
+Index persistant des templates vidéo
+
+Les métadonnées de chaque template source (résolution, fps, durée, codec,
+format) sont sondées une seule fois et stockées dans template_dir/.cache/index.json.
+L'index est rafraîchi quand le répertoire ou un fichier change (taille, mtime):
+seuls les fichiers nouveaux ou modifiés sont sondés à nouveau.
+
+Les templates sont regroupés par orientation: la sélection pour un VideoType
+est un tirage direct parmi les templates déjà au bon format (9:16 pour un
+short, 16:9 pour une vidéo normale), sans recadrage image par image.
+"""
+import json
+import os
+import random
+import time
+from typing import Dict, List, Optional
+from models import VideoType
+from services.resource_config_service import ResourceConfigService
+from services.template_cache_service import TemplateCacheService
+
+INDEX_VERSION = 1
+
+# Index chargés dans ce process: chemin de l'index → état (entrées, groupes, date du dernier contrôle)
+_loaded_indexes: Dict[str, Dict] = {}
+
+
+def classify_orientation(width: int, height: int) -> str:
+    """Orientation d'une image: portrait, landscape ou square (tolérance de 10%)"""
+    ratio = width / height
+    if ratio > 1.1:
+        return "landscape"
+    if ratio < 0.9:
+        return "portrait"
+    return "square"
+
+
+class TemplateIndexService:
+    """Sondage, persistance et sélection des templates par format"""
+
+    def __init__(self):
+        self.resource_config = ResourceConfigService()
+        self.template_cache = TemplateCacheService()
+        self.template_dir = self.resource_config.get_template_dir()
+        self.index_path = os.path.join(self.template_dir, ".cache", "index.json")
+        # Contrôle complet (stat de chaque fichier) au plus toutes les N secondes;
+        # un ajout ou une suppression change la mtime du répertoire et force le contrôle
+        self.refresh_seconds = float(os.getenv("TEMPLATE_INDEX_REFRESH_SECONDS", "300"))
+
+    def get_target_orientation(self, video_type: VideoType) -> str:
+        """Orientation attendue pour un VideoType (d'après SHORT_VIDEO_SIZE / NORMAL_VIDEO_SIZE)"""
+        profile = self.template_cache.get_profile(video_type)
+        return classify_orientation(profile["width"], profile["height"])
+
+    def _directory_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.template_dir).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self) -> Dict[str, Dict]:
+        """Entrées persistées (index absent, illisible ou d'une autre version: index vide)"""
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+        if data.get("version") != INDEX_VERSION:
+            return {}
+        return data.get("templates", {})
+
+    def _save(self, entries: Dict[str, Dict]):
+        """Écriture atomique: un autre process ne lit jamais un index incomplet"""
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        partial_path = f"{self.index_path}.{os.getpid()}.partial"
+        with open(partial_path, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "templates": entries}, f, indent=2)
+        os.replace(partial_path, self.index_path)
+
+    def _probe(self, path: str, stat: os.stat_result) -> Dict:
+        """Métadonnées d'un template source"""
+        from services.media_probe_service import probe_media
+
+        media = probe_media(path)
+        if not media["width"] or not media["height"]:
+            raise ValueError(f"No video stream in template: {path}")
+        return {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "width": media["width"],
+            "height": media["height"],
+            "fps": media["fps"],
+            "duration": media["duration"],
+            "codec": media["codec"],
+            "aspect": round(media["width"] / media["height"], 4),
+            "orientation": classify_orientation(media["width"], media["height"]),
+        }
+
+    def _scan(self, entries: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Synchroniser les entrées avec le répertoire: sonder les fichiers nouveaux ou modifiés"""
+        scanned = {}
+        probed = 0
+        for path in self.resource_config.get_template_files():
+            name = os.path.basename(path)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entry = entries.get(name)
+            if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                scanned[name] = entry
+                continue
+            try:
+                scanned[name] = self._probe(path, stat)
+                probed += 1
+            except Exception as e:
+                print(f"❌ Template ignored ({name}): {e}")
+        if probed or scanned.keys() != entries.keys():
+            print(f"🗂️ Template index updated: {len(scanned)} template(s), {probed} probed")
+        return scanned
+
+    def refresh(self, force: bool = False) -> Dict[str, Dict]:
+        """
+        Index à jour des templates (nom de fichier → métadonnées)
+
+        Le contrôle des fichiers n'est refait que si la mtime du répertoire a changé,
+        si TEMPLATE_INDEX_REFRESH_SECONDS est écoulé ou si `force` est vrai.
+        """
+        directory_mtime = self._directory_mtime()
+        state = _loaded_indexes.get(self.index_path)
+        if (
+            state and not force
+            and state["directory_mtime"] == directory_mtime
+            and time.monotonic() - state["checked_at"] < self.refresh_seconds
+        ):
+            return state["entries"]
+
+        persisted = state["entries"] if state else self._load()
+        entries = self._scan(persisted)
+        if entries != persisted or not os.path.exists(self.index_path):
+            self._save(entries)
+
+        groups: Dict[str, List[str]] = {}
+        for name, entry in sorted(entries.items()):
+            groups.setdefault(entry["orientation"], []).append(os.path.join(self.template_dir, name))
+        _loaded_indexes[self.index_path] = {
+            "directory_mtime": directory_mtime,
+            "checked_at": time.monotonic(),
+            "entries": entries,
+            "groups": groups,
+        }
+        return entries
+
+    def get_entry(self, template_path: str) -> Optional[Dict]:
+        """Métadonnées indexées d'un template (None s'il n'est pas dans l'index)"""
+        return self.refresh().get(os.path.basename(template_path))
+
+    def get_candidates(self, video_type: VideoType) -> List[str]:
+        """
+        Templates au format du VideoType; tous les templates si aucun ne correspond
+        (ils seront alors recadrés à la normalisation)
+        """
+        self.refresh()
+        groups = _loaded_indexes[self.index_path]["groups"]
+        candidates = groups.get(self.get_target_orientation(video_type))
+        if candidates:
+            return candidates
+        return [path for paths in groups.values() for path in paths]
+
+    def select(self, video_type: VideoType) -> str:
+        """Tirer un template au format du VideoType"""
+        candidates = self.get_candidates(video_type)
+        if not candidates:
+            raise ValueError("No video templates found")
+        return random.choice(candidates)
+
+
+if __name__ == "__main__":
+    service = TemplateIndexService()
+    for name, entry in service.refresh(force=True).items():
+        print(f"{name}: {entry['width']}x{entry['height']} {entry['fps']}fps {entry['duration']:.1f}s {entry['codec']} ({entry['orientation']})")
@@ -1,13 +1,13 @@
 import os
-import random
-from typing import Dict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 from database import get_videos_collection
-from models import Video, VideoType, IdeaStatus
+from models import Video, VideoType, IdeaStatus, TimestampItem
 from slugify import slugify
-from moviepy.editor import VideoFileClip, AudioFileClip,  CompositeVideoClip
-from pydub import AudioSegment
 from services.subtitle_service import SubtitleService
 from services.resource_config_service import ResourceConfigService
+from services.template_index_service import TemplateIndexService
+from services.queue_service import LeaseLostError
+from services.render_service import RenderSpec, render_in_pool, get_encoder_threads, get_render_backend, probe_media
 
 class VideoService:
     """
@@ -18,23 +18,44 @@ class VideoService:
         self.REACT_APP_BACKEND_URL = os.getenv("REACT_APP_BACKEND_URL", "http://localhost:8001")
         self.resource_config = ResourceConfigService()
         self.subtitle_service = SubtitleService()  # Service de sous-titres
+        self.template_index = TemplateIndexService()  # Templates par format
+        # Aperçu rapide pour relecture, rendu final après approbation ou planification
+        # Aperçus optionnels: sans RENDER_PREVIEW_ENABLED=true, chaque job produit directement le rendu final
+        self.preview_enabled = os.getenv("RENDER_PREVIEW_ENABLED", "false").lower() == "true"
+        self.preview_height = int(os.getenv("PREVIEW_HEIGHT", "540"))
+        self.preview_fps = int(os.getenv("PREVIEW_FPS", "12"))
+        self.background_cache_enabled = os.getenv("BACKGROUND_CACHE_ENABLED", "true").lower() == "true"
+        # Fond vidéo: template bouclé, ou diaporama Ken Burns des images générées de l'idée
+        self.visual_mode = os.getenv("VIDEO_VISUAL_MODE", "template").lower()
+        # Preset x264 du rendu final: l'encodage borne le débit (diaporama compris), pas la synthèse des images
+        self.render_preset = os.getenv("RENDER_PRESET", "medium")
     
     def get_video_directory(self, idea_id: str, title: str) -> str:
         """Obtenir le répertoire pour une vidéo"""
         directories = self.resource_config.get_idea_directories(idea_id, title)
         return directories["video_directory"]
     
-    def _select_random_template(self) -> str:
-        """Sélectionner un template vidéo aléatoire"""
-        templates = self.resource_config.get_template_files()
-        
-        if not templates:
-            raise ValueError("No video templates found")
-        
-        selected = random.choice(templates)
+    def _select_random_template(self, video_type: VideoType) -> str:
+        """Sélectionner un template vidéo aléatoire au format du VideoType (via l'index des templates)"""
+        selected = self.template_index.select(video_type)
         print(f"Selected template: {os.path.basename(selected)}")
         return selected
     
+    def _select_template(self, latest_video: Optional[Dict], video_type: VideoType) -> str:
+        """Réutiliser le template de la vidéo précédente (son fond bouclé est en cache), sinon en tirer un"""
+        previous = (latest_video or {}).get("template_path")
+        if previous and os.path.exists(previous):
+            print(f"Reusing template: {os.path.basename(previous)}")
+            return previous
+        return self._select_random_template(video_type)
+    
+    def _get_slideshow_images(self, idea: Dict, image_dir: str) -> List[str]:
+        """Images générées de l'idée pour le diaporama (vide en mode template)"""
+        if self.visual_mode != "slideshow":
+            return []
+        # Chemins relatifs résolus dans le répertoire d'images de l'idée
+        return [os.path.join(image_dir, path) for path in idea.get("generated_images") or []]
+    
     def _get_combined_audio_path(self, audio_dir: str) -> str:
         """Obtenir le chemin de l'audio concaténé"""
         combined_audio_path = os.path.join(audio_dir, "combined_audio.mp3")
@@ -42,23 +63,57 @@ class VideoService:
             raise ValueError(f"Combined audio file not found: {combined_audio_path}")
         return combined_audio_path
     
+    async def _get_latest_video(self, idea_id: str) -> Optional[Dict]:
+        """Dernière vidéo générée pour une idée"""
+        return await get_videos_collection().find_one(
+            {"idea_id": idea_id},
+            {"_id": 0},
+            sort=[("created_at", -1)]
+        )
+    
+    async def _load_subtitles(self, idea_id: str) -> List[TimestampItem]:
+        """Phrases à sous-titrer; une erreur de lecture donne une vidéo sans sous-titres plutôt qu'un rendu échoué"""
+        try:
+            return await self.subtitle_service.get_subtitle_phrases(idea_id)
+        except Exception as e:
+            print(f"⚠️ Sous-titres indisponibles, rendu sans sous-titres: {str(e)}")
+            return []
+    
+    def _get_render_target(self, latest: Optional[Dict]) -> Tuple[str, Optional[Dict]]:
+        """
+        Qualité du prochain rendu d'une idée et vidéo aperçu à remplacer
+        
+        Returns:
+            ("final", aperçu à remplacer ou None) si la dernière vidéo est approuvée
+            ou planifiée (ou si les aperçus sont désactivés), sinon ("preview", None)
+        """
+        if latest and (latest.get("approved") or latest.get("is_scheduled")):
+            return "final", latest if latest.get("render_quality") == "preview" else None
+        if not self.preview_enabled:
+            return "final", None
+        return "preview", None
+    
     async def generate_video(
         self,
-        script_id: str
+        script_id: str,
+        still_owner: Optional[Callable[[], Awaitable[bool]]] = None
     ) -> Video:
         """
         Générer la vidéo finale avec audio et sous-titres
         
         Args:
             script_id: ID du script dans MongoDB
+            still_owner: Vérifie, après le rendu, que le job détient toujours son bail
+                (sinon rien n'est publié: le job a été repris par un autre worker)
             
         Returns:
             Objet Video créé
             
         Cette méthode:
         1. Récupère le script et l'idée depuis MongoDB
-        2. Génère la vidéo avec audio et sous-titres
-        3. Retourne l'objet Video (non sauvegardé en DB)
+        2. Génère la vidéo avec audio et sous-titres: aperçu rapide (540p, ultrafast)
+           tant que la vidéo n'est ni approuvée ni planifiée, rendu final sinon
+        3. Sauvegarde l'objet Video (le rendu final remplace l'aperçu en gardant son ID)
         """
         try:
             from database import get_scripts_collection, get_ideas_collection
@@ -92,74 +147,67 @@ class VideoService:
             directories = self.resource_config.get_idea_directories(idea_id, title)
             audio_dir = directories["audio_directory"]
             
-            # Sélectionner un template
-            print("📹 Sélection d'un template vidéo aléatoire...")
-            template_path = self._select_random_template()
+            # Sélectionner un template (celui de la vidéo précédente pour une régénération)
+            print("📹 Sélection d'un template vidéo...")
+            latest_video = await self._get_latest_video(idea_id)
+            template_path = self._select_template(latest_video, video_type)
             
             # Utiliser l'audio déjà concaténé
             print("🎵 Utilisation de l'audio concaténé...")
             combined_audio_path = self._get_combined_audio_path(audio_dir)
             
-            # Obtenir la durée de l'audio concaténé
-            audio_clip = AudioFileClip(combined_audio_path)
-            audio_duration_sec = audio_clip.duration
-            audio_duration_ms = int(audio_duration_sec * 1000)
-            audio_clip.close()
-            
-            print(f"✅ Audio concaténé utilisé: {audio_duration_sec:.2f}s")
-            
-            # Charger le template vidéo
-            print("📽️ Chargement du template vidéo...")
-            video_clip = VideoFileClip(template_path)
-            
-            # Boucler la vidéo pour correspondre à la durée audio
-            audio_duration_sec = audio_duration_ms / 1000
-            if video_clip.duration < audio_duration_sec:
-                print(f"🔄 Bouclage de la vidéo (durée template: {video_clip.duration:.2f}s → {audio_duration_sec:.2f}s)")
-                n_loops = int(audio_duration_sec / video_clip.duration) + 1
-                video_clip = video_clip.loop(n=n_loops)
-            
-            # Couper à la durée exacte
-            video_clip = video_clip.subclip(0, audio_duration_sec)
-            
-            # Charger l'audio
-            print("🎧 Ajout de l'audio à la vidéo...")
-            audio_clip = AudioFileClip(combined_audio_path)
+            # Charger les sous-titres (le rendu lui-même n'accède pas à la base)
+            print("📝 Chargement des sous-titres via le service centralisé...")
+            subtitles = await self._load_subtitles(idea_id)
+            subtitle_config = self.subtitle_service.get_caption_config(video_type)
             
-            # Ajouter l'audio à la vidéo
-            final_video = video_clip.set_audio(audio_clip)
-            
-            # Ajouter les sous-titres via le service centralisé
-            print("📝 Ajout des sous-titres via le service centralisé...")
-            final_video = await self.subtitle_service.add_subtitles_to_video(
-                final_video=final_video,
-                idea_id=idea_id
-            )
+            # Aperçu ou rendu final
+            render_quality, preview_video = self._get_render_target(latest_video)
             
             # Chemin de sortie
-            output_path = os.path.join(video_dir, f"{slugify(title)}.mp4")
-            
-            # Exporter la vidéo
-            print("⏳ Exportation de la vidéo (cela peut prendre plusieurs minutes)...")
-            print("   Codec: libx264 | Audio: aac | FPS: 24 | Preset: medium")
-            final_video.write_videofile(
-                output_path,
-                codec='libx264',
-                audio_codec='aac',
-                fps=24,
-                preset='medium',
-                threads=4,
-                logger=None
-            )
+            suffix = ".preview.mp4" if render_quality == "preview" else ".mp4"
+            output_path = os.path.join(video_dir, f"{slugify(title)}{suffix}")
             
-            # Fermer les clips
-            final_video.close()
-            if audio_clip:
-                audio_clip.close()
+            # Rendu dans le pool de process: la boucle asyncio reste disponible
+            spec = RenderSpec(
+                template_path=template_path,
+                audio_path=combined_audio_path,
+                output_path=output_path,
+                subtitles=subtitles,
+                subtitle_config=subtitle_config,
+                preset=self.render_preset,
+                threads=get_encoder_threads(),
+                backend=get_render_backend(),
+                video_type=video_type,
+                background_cache=self.background_cache_enabled,
+                images=self._get_slideshow_images(idea, directories["image_directory"])
+            )
+            if render_quality == "preview":
+                print(f"👀 Rendu aperçu ({self.preview_height}p, {self.preview_fps} fps, ultrafast)")
+                spec = spec.model_copy(update={
+                    "preset": "ultrafast",
+                    "fps": self.preview_fps,
+                    "max_height": self.preview_height
+                })
+            audio_duration_sec = await render_in_pool(spec)
+            if still_owner and not await still_owner():
+                raise LeaseLostError(f"Lease lost while rendering {output_path}")
             
             print(f"✅ Vidéo générée avec succès: {output_path}")
             print(f"📊 Durée finale: {audio_duration_sec:.2f}s")
             
+            # Exporter les sous-titres (.srt pour YouTube, .ass stylé) à la taille de la vidéo rendue;
+            # sans sous-titres, pas de fichiers: la vidéo n'a pas de piste de légendes à envoyer
+            subtitle_paths = {}
+            if subtitles:
+                try:
+                    media = probe_media(output_path)
+                    subtitle_paths = self.subtitle_service.write_subtitle_files(
+                        subtitles, output_path, media["width"], media["height"], subtitle_config
+                    )
+                except Exception as e:
+                    print(f"⚠️ Export des sous-titres impossible: {str(e)}")
+            
             # Créer l'URL accessible pour le frontend
             # Convertir /app/ressources/videos/slug/video.mp4 → /media/videos/slug/video.mp4
             relative_path = os.path.relpath(output_path, self.resource_config.get_resources_dir())
@@ -175,12 +223,28 @@ class VideoService:
                 video_path=video_url,  # URL accessible via /media
                 video_relative_path=output_path,
                 duration_seconds=audio_duration_sec,
-                youtube_description=script["youtube_description"]
+                youtube_description=script["youtube_description"],
+                template_path=template_path,
+                render_quality=render_quality,
+                subtitle_srt_path=subtitle_paths.get("srt"),
+                subtitle_ass_path=subtitle_paths.get("ass")
             )
             
             # Sauvegarder la vidéo
             videos_collection = get_videos_collection()
-            await videos_collection.insert_one(video.model_dump())
+            if preview_video:
+                # Le rendu final remplace l'aperçu: même ID, approbation et planification conservées
+                video = Video(**{**preview_video, **video.model_dump(include={
+                    "video_path", "video_relative_path", "duration_seconds", "template_path", "render_quality",
+                    "subtitle_srt_path", "subtitle_ass_path"
+                })})
+                await videos_collection.update_one({"id": video.id}, {"$set": video.model_dump()})
+                for key in ("video_relative_path", "subtitle_srt_path", "subtitle_ass_path"):
+                    preview_path = preview_video.get(key)
+                    if preview_path and preview_path != getattr(video, key) and os.path.exists(preview_path):
+                        os.remove(preview_path)
+            else:
+                await videos_collection.insert_one(video.model_dump())
              # Mettre à jour le statut de l'idée
             await ideas_collection.update_one(
                 {"id": idea_id},
@@ -0,0 +1,134 @@
+"""
+Registre des workers vidéo
+
+Chaque worker y annonce sa machine (cœurs, RAM), ses lanes et sa capacité par
+lane, puis publie ses compteurs d'étapes. Ajouter une machine de rendu
+(WORKER_LANES=render) augmente donc le débit de la lane render, et
+/api/queue/workers montre la contribution de chaque nœud.
+"""
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from models import WorkerNode
+from database import get_workers_collection
+from services.pipeline_stages import LANES, STAGE_LANES, get_available_memory_mb, get_total_memory_mb
+
+
+class WorkerRegistryService:
+    """Gestion du registre des workers et de leurs compteurs de débit"""
+
+    def __init__(self):
+        self.heartbeat_seconds = int(os.getenv("WORKER_HEARTBEAT_SECONDS", "15"))
+        self.retention_hours = int(os.getenv("WORKER_REGISTRY_RETENTION_HOURS", "24"))
+        self.workers_collection = get_workers_collection()
+
+    async def register(self, worker_id: str, capacity: Dict[str, int]) -> WorkerNode:
+        """Enregistrer (ou réenregistrer) un worker avec les ressources de sa machine"""
+        node = WorkerNode(
+            worker_id=worker_id,
+            hostname=socket.gethostname(),
+            pid=os.getpid(),
+            cpu_count=os.cpu_count() or 1,
+            memory_total_mb=get_total_memory_mb(),
+            memory_available_mb=get_available_memory_mb(),
+            lanes=[lane for lane in LANES if capacity.get(lane, 0) > 0],
+            capacity=capacity,
+            in_flight={lane: 0 for lane in LANES}
+        )
+        await self.workers_collection.replace_one({"worker_id": worker_id}, node.model_dump(), upsert=True)
+        print(f"🖥️ Worker {worker_id} registered: {node.cpu_count} cores, {node.memory_available_mb} MB free, lanes {node.lanes}")
+        return node
+
+    async def heartbeat(self, worker_id: str):
+        """Signaler que le worker est vivant et rafraîchir la RAM disponible"""
+        await self.workers_collection.update_one(
+            {"worker_id": worker_id},
+            {"$set": {
+                "last_heartbeat_at": datetime.now(),
+                "memory_available_mb": get_available_memory_mb()
+            }}
+        )
+
+    async def stage_started(self, worker_id: str, stage: str):
+        """Une étape a été réclamée par ce worker"""
+        await self.workers_collection.update_one(
+            {"worker_id": worker_id},
+            {"$inc": {f"in_flight.{STAGE_LANES[stage]}": 1}}
+        )
+
+    async def stage_finished(self, worker_id: str, stage: str, duration_seconds: float, success: bool):
+        """Une étape s'est terminée: libérer le slot et mettre à jour les compteurs de débit"""
+        counter = "stages_completed" if success else "stages_failed"
+        await self.workers_collection.update_one(
+            {"worker_id": worker_id},
+            {"$inc": {
+                f"in_flight.{STAGE_LANES[stage]}": -1,
+                f"{counter}.{stage}": 1,
+                f"stage_seconds.{stage}": duration_seconds
+            }}
+        )
+
+    async def unregister(self, worker_id: str):
+        """Marquer un worker comme arrêté (il reste visible jusqu'à la fin de la rétention)"""
+        await self.workers_collection.update_one(
+            {"worker_id": worker_id},
+            {"$set": {
+                "stopped_at": datetime.now(),
+                "in_flight": {lane: 0 for lane in LANES}
+            }}
+        )
+
+    def is_alive(self, node: WorkerNode, now: Optional[datetime] = None) -> bool:
+        """Un worker est vivant s'il a envoyé un heartbeat récemment et ne s'est pas arrêté"""
+        now = now or datetime.now()
+        timeout = timedelta(seconds=self.heartbeat_seconds * 3)
+        return node.stopped_at is None and now - node.last_heartbeat_at < timeout
+
+    def _throughput(self, node: WorkerNode, now: datetime) -> dict:
+        """Débit d'un worker depuis son démarrage"""
+        end = node.stopped_at or now
+        uptime_hours = max((end - node.started_at).total_seconds() / 3600, 1 / 3600)
+        return {
+            "uptime_hours": round(uptime_hours, 2),
+            "videos_per_hour": round(node.stages_completed.get("video", 0) / uptime_hours, 2),
+            "stages_per_hour": {
+                stage: round(count / uptime_hours, 2)
+                for stage, count in node.stages_completed.items()
+            },
+            "avg_stage_seconds": {
+                stage: round(seconds / (node.stages_completed.get(stage, 0) + node.stages_failed.get(stage, 0)), 1)
+                for stage, seconds in node.stage_seconds.items()
+                if node.stages_completed.get(stage, 0) + node.stages_failed.get(stage, 0)
+            }
+        }
+
+    async def list_workers(self) -> List[dict]:
+        """Workers vus pendant la période de rétention, avec leur état et leur débit"""
+        now = datetime.now()
+        since = now - timedelta(hours=self.retention_hours)
+        cursor = self.workers_collection.find(
+            {"last_heartbeat_at": {"$gte": since}},
+            {"_id": 0}
+        ).sort("started_at", 1)
+
+        workers = []
+        async for node_data in cursor:
+            node = WorkerNode(**node_data)
+            workers.append({
+                **node.model_dump(),
+                "alive": self.is_alive(node, now),
+                "throughput": self._throughput(node, now)
+            })
+        return workers
+
+    async def get_fleet_capacity(self) -> Dict[str, int]:
+        """Slots disponibles par lane sur l'ensemble des workers vivants"""
+        now = datetime.now()
+        since = now - timedelta(seconds=self.heartbeat_seconds * 3)
+        capacity = {lane: 0 for lane in LANES}
+        async for node_data in self.workers_collection.find({"last_heartbeat_at": {"$gte": since}, "stopped_at": None}, {"_id": 0}):
+            node = WorkerNode(**node_data)
+            for lane in LANES:
+                capacity[lane] += node.capacity.get(lane, 0)
+        return capacity
@@ -2,6 +2,7 @@ from datetime import datetime, timedelta
 from typing import List, Dict
 from database import get_videos_collection
 from helpers.datetime_utils import parse_iso_date
+from services.queue_service import QueueService
 import traceback
 
 class YoutubeSchedulingService:
@@ -12,6 +13,16 @@ class YoutubeSchedulingService:
     def __init__(self):
         pass
     
+    async def _refresh_queue_deadline(self, video: Dict):
+        """Répercuter la date de publication sur l'échéance d'un job en attente pour l'idée"""
+        if video.get("idea_id"):
+            await QueueService().refresh_job_deadline(video["idea_id"])
+    
+    async def _queue_final_render(self, video: Dict):
+        """Une vidéo planifiée encore en aperçu doit être rendue en qualité finale avant publication"""
+        if video.get("idea_id") and video.get("render_quality") == "preview":
+            await QueueService().request_final_render(video["idea_id"])
+    
     async def schedule_video(self, video_id: str, publish_date: str) -> Dict:
         """
         Planifier la publication d'une vidéo
@@ -49,6 +60,8 @@ class YoutubeSchedulingService:
                 raise ValueError(f"Failed to update video {video_id}")
             
             print(f"✅ Video {video_id} scheduled for {scheduled_date.isoformat()}")
+            await self._queue_final_render(video)
+            await self._refresh_queue_deadline(video)
             
             return {
                 "success": True,
@@ -96,6 +109,7 @@ class YoutubeSchedulingService:
                 raise ValueError(f"Failed to update video {video_id}")
             
             print(f"✅ Video {video_id} unscheduled")
+            await self._refresh_queue_deadline(video)
             
             return {
                 "success": True,
@@ -175,6 +189,9 @@ class YoutubeSchedulingService:
                     }
                 )
                 
+                await self._queue_final_render(video)
+                await self._refresh_queue_deadline(video)
+                
                 scheduled_count += 1
                 time_index += 1
                 
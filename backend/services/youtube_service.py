@@ -25,6 +25,9 @@ class YouTubeService:
             'https://www.googleapis.com/auth/youtube.readonly',
             'https://www.googleapis.com/auth/youtube.force-ssl'
         ]
+        # Piste de sous-titres envoyée avec la vidéo (scope youtube.force-ssl)
+        self.captions_enabled = os.getenv("YOUTUBE_CAPTIONS_ENABLED", "true").lower() == "true"
+        self.caption_language = os.getenv("YOUTUBE_CAPTION_LANGUAGE", "fr")
     
 
     def get_authorization_url(self) -> str:
@@ -249,6 +252,33 @@ class YouTubeService:
             print(f"❌ Error updating video metadata: {str(e)}")
             raise
     
+    def upload_captions(self, youtube, youtube_video_id: str, srt_path: str) -> str:
+        """
+        Envoyer un fichier .srt comme piste de sous-titres d'une vidéo YouTube
+        
+        Args:
+            youtube: Client YouTube API authentifié
+            youtube_video_id: ID de la vidéo sur YouTube
+            srt_path: Chemin du fichier .srt
+            
+        Returns:
+            ID de la piste de sous-titres
+        """
+        response = youtube.captions().insert(
+            part='snippet',
+            body={
+                'snippet': {
+                    'videoId': youtube_video_id,
+                    'language': self.caption_language,
+                    'name': '',
+                    'isDraft': False
+                }
+            },
+            media_body=MediaFileUpload(srt_path, mimetype='application/octet-stream', resumable=False)
+        ).execute()
+        print(f"✅ Captions uploaded for {youtube_video_id} ({self.caption_language})")
+        return response['id']
+    
     async def upload_video(
         self,
         video_id: str,
@@ -284,6 +314,9 @@ class YouTubeService:
             if not video.get("video_relative_path"):
                 raise ValueError(f"Video {video_id} has no file path")
             
+            if video.get("render_quality") == "preview":
+                raise ValueError(f"Video {video_id} is a preview render: approve it and wait for the final render before uploading")
+            
             # 2. Récupérer le script pour la description YouTube
             scripts_collection = get_scripts_collection()
             script = None
@@ -345,6 +378,14 @@ class YouTubeService:
             youtube_video_id = response['id']
             youtube_url = f"https://www.youtube.com/watch?v={youtube_video_id}"
             
+            # Piste de sous-titres (un échec n'annule pas l'upload de la vidéo)
+            srt_path = video.get("subtitle_srt_path")
+            if self.captions_enabled and srt_path and os.path.exists(srt_path) and os.path.getsize(srt_path) > 0:
+                try:
+                    self.upload_captions(youtube, youtube_video_id, srt_path)
+                except Exception as e:
+                    print(f"⚠️ Caption upload failed for {youtube_video_id}: {str(e)}")
+            
             # 5. Mettre à jour MongoDB avec les infos YouTube
             await videos_collection.update_one(
                 {"id": video_id},
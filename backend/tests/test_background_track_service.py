@@ -0,0 +1,95 @@
+import sys
+import os
+
+# Ajouter le répertoire backend au path pour les imports absolus
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import subprocess
+import pytest
+from unittest.mock import patch
+
+from models import VideoType
+
+
+def get_ffmpeg():
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+FFMPEG = get_ffmpeg()
+
+
+@pytest.fixture
+def template_env(tmp_path, monkeypatch):
+    """Répertoire de ressources temporaire avec un template 16:9"""
+    monkeypatch.setenv("RESOURCES_DIR", str(tmp_path))
+    monkeypatch.setenv("NORMAL_VIDEO_SIZE", "160x90")
+    monkeypatch.setenv("RENDER_FPS", "12")
+    template_dir = tmp_path / "video-template"
+    template_dir.mkdir()
+    source = str(template_dir / "template.mp4")
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", "testsrc=size=320x180:rate=30:duration=1",
+                    "-pix_fmt", "yuv420p", source], check=True)
+    return source
+
+
+def make_audio(path, duration):
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+                    str(path)], check=True)
+    return str(path)
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg non disponible")
+def test_regeneration_without_subtitles_only_remuxes_cached_background(template_env, tmp_path):
+    """
+    Teste que la régénération réutilise la piste de fond en cache et ne fait que multiplexer le nouvel audio
+    """
+    from services.render_service import RenderSpec, render_video, probe_media
+
+    spec = dict(template_path=template_env, backend="moviepy", video_type=VideoType.NORMAL, background_cache=True)
+    render_video(RenderSpec(audio_path=make_audio(tmp_path / "first.mp3", 2.5), output_path=str(tmp_path / "first.mp4"), **spec))
+
+    real_run = subprocess.run
+    commands = []
+
+    def record_run(command, *args, **kwargs):
+        commands.append(command)
+        return real_run(command, *args, **kwargs)
+
+    # Nouvelle voix de même durée: le fond n'est pas recréé
+    new_audio = make_audio(tmp_path / "second.mp3", 2.5)
+    with patch("services.background_track_service.subprocess.run", side_effect=AssertionError("background rebuilt")), \
+            patch("services.render_service.subprocess.run", side_effect=record_run):
+        duration = render_video(RenderSpec(audio_path=new_audio, output_path=str(tmp_path / "second.mp4"), **spec))
+
+    assert duration == pytest.approx(2.5, abs=0.1)
+    render_command = commands[-1]
+    assert render_command[render_command.index("-c:v") + 1] == "copy"
+    assert "-stream_loop" in render_command and ".cache/backgrounds" in render_command[render_command.index("-stream_loop") + 3]
+    media = probe_media(str(tmp_path / "second.mp4"))
+    assert (media["width"], media["height"]) == (160, 90)
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg non disponible")
+def test_background_keyed_by_duration_and_evicted_lru(template_env, tmp_path, monkeypatch):
+    """
+    Teste qu'une autre durée crée une autre piste et que les moins récentes sont évincées au-delà du plafond
+    """
+    from services.background_track_service import BackgroundTrackService
+    from services.template_cache_service import TemplateCacheService
+
+    canonical = TemplateCacheService().ensure_canonical(template_env, VideoType.NORMAL)
+    service = BackgroundTrackService()
+    first = service.ensure_background(canonical, 2.0, 12)
+    second = service.ensure_background(canonical, 3.0, 12)
+    assert first != second
+    assert service.ensure_background(canonical, 2.0, 12) == first
+
+    # Plafond inférieur à une piste: seule la piste qui vient d'être utilisée est conservée
+    os.utime(second, (1, 1))
+    service.max_bytes = os.path.getsize(first)
+    assert service.evict(keep=first) == [second]
+    assert os.path.exists(first) and not os.path.exists(second)
@@ -0,0 +1,145 @@
+import sys
+import os
+
+# Ajouter le répertoire backend au path pour les imports absolus
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+
+from services.caption_cache_service import CaptionCacheService
+
+
+@pytest.fixture
+def resources_dir(tmp_path, monkeypatch):
+    """Cache des légendes dans un répertoire de ressources temporaire"""
+    monkeypatch.setenv("RESOURCES_DIR", str(tmp_path))
+    monkeypatch.setenv("CAPTION_CACHE_ENABLED", "true")
+    return tmp_path
+
+
+CONFIG = {"font": "DejaVu-Sans-Bold", "fontsize": 50, "color": "white", "bg_color": "black",
+          "stroke_color": "black", "stroke_width": 2}
+
+
+def make_caption(seed, height=20, width=100):
+    return np.random.default_rng(seed).integers(0, 256, (height, width, 4), dtype=np.uint8)
+
+
+def test_second_lookup_is_served_from_cache(resources_dir):
+    """Une légende identique n'est rastérisée qu'une fois, même depuis une autre instance"""
+    render = MagicMock(return_value=make_caption(1))
+
+    first = CaptionCacheService().get_or_render("Memento mori", 100, CONFIG, render)
+    cache = CaptionCacheService()
+    second = cache.get_or_render("Memento mori", 100, CONFIG, render)
+
+    assert render.call_count == 1
+    assert np.array_equal(first, second)
+    assert cache.get_stats() == {"hits": 1, "misses": 0, "hit_rate": 1.0}
+
+
+def test_key_covers_text_and_style(resources_dir):
+    """Texte, largeur de boîte, couleurs, contour et police changent la clé"""
+    cache = CaptionCacheService()
+    base = cache.key("Memento mori", 100, CONFIG)
+
+    assert cache.key("Memento mori", 100, dict(CONFIG)) == base
+    assert cache.key("Amor fati", 100, CONFIG) != base
+    assert cache.key("Memento mori", 120, CONFIG) != base
+    assert cache.key("Memento mori", 100, CONFIG, font_path="/fonts/DejaVuSans-Bold.ttf") != base
+    for field, value in [("fontsize", 40), ("color", "yellow"), ("bg_color", "transparent"),
+                         ("stroke_color", "white"), ("stroke_width", 0), ("font", "Noto-Sans-Bold")]:
+        assert cache.key("Memento mori", 100, {**CONFIG, field: value}) != base
+
+
+def test_eviction_removes_least_recently_used(resources_dir, monkeypatch):
+    """Au-delà de CAPTION_CACHE_MAX_MB, les légendes les moins récemment lues sont supprimées"""
+    cache = CaptionCacheService()
+    cache.put(cache.key("a", 100, CONFIG), make_caption(1))
+    entry_size = cache.total_bytes()
+    cache.max_bytes = int(entry_size * 2.5)
+    cache.put(cache.key("b", 100, CONFIG), make_caption(2))
+    os.utime(cache.path(cache.key("a", 100, CONFIG)), (1, 1))
+    os.utime(cache.path(cache.key("b", 100, CONFIG)), (2, 2))
+    cache.get(cache.key("a", 100, CONFIG))  # "a" redevient la plus récente
+
+    cache.put(cache.key("c", 100, CONFIG), make_caption(3))
+
+    assert os.path.exists(cache.path(cache.key("a", 100, CONFIG)))
+    assert not os.path.exists(cache.path(cache.key("b", 100, CONFIG)))
+    assert os.path.exists(cache.path(cache.key("c", 100, CONFIG)))
+
+
+def test_corrupt_entry_is_rendered_again(resources_dir):
+    """Une entrée illisible est supprimée et la légende rastérisée à nouveau"""
+    cache = CaptionCacheService()
+    key = cache.key("Memento mori", 100, CONFIG)
+    os.makedirs(os.path.dirname(cache.path(key)))
+    with open(cache.path(key), "wb") as f:
+        f.write(b"not a png")
+    render = MagicMock(return_value=make_caption(1))
+
+    rgba = cache.get_or_render("Memento mori", 100, CONFIG, render)
+
+    assert render.call_count == 1 and np.array_equal(rgba, make_caption(1))
+    assert cache.get(key) is not None
+
+
+def test_stats_accumulate_across_renders(resources_dir):
+    """Les compteurs de chaque rendu sont cumulés dans stats.json"""
+    render = MagicMock(side_effect=lambda text, width, config: make_caption(len(text)))
+    for _ in range(2):
+        cache = CaptionCacheService()
+        for text in ["a", "bb", "a"]:
+            cache.get_or_render(text, 100, CONFIG, render)
+        cache.record_stats()
+
+    totals = CaptionCacheService().get_totals()
+
+    assert (totals["hits"], totals["misses"]) == (4, 2)
+    assert totals["hit_rate"] == pytest.approx(4 / 6, abs=1e-4)
+    assert totals["entries"] == 2
+
+
+def test_disabled_cache_always_renders(resources_dir, monkeypatch):
+    """CAPTION_CACHE_ENABLED=false: rastérisation directe, rien n'est écrit"""
+    monkeypatch.setenv("CAPTION_CACHE_ENABLED", "false")
+    render = MagicMock(return_value=make_caption(1))
+    cache = CaptionCacheService()
+
+    cache.get_or_render("Memento mori", 100, CONFIG, render)
+    cache.get_or_render("Memento mori", 100, CONFIG, render)
+
+    assert render.call_count == 2
+    assert not os.path.exists(cache.cache_dir)
+
+
+def test_subtitle_service_reuses_cached_captions(resources_dir):
+    """SubtitleService.rasterize_caption passe par le cache"""
+    from services.subtitle_service import SubtitleService
+
+    service = SubtitleService()
+    first = service.rasterize_caption("Ce qui dépend de nous", 400)
+    second = SubtitleService().rasterize_caption("Ce qui dépend de nous", 400)
+
+    assert np.array_equal(first, second)
+    assert service.caption_cache.get_stats()["misses"] == 1
+
+
+def test_module_imports_without_fcntl(resources_dir, monkeypatch):
+    """Sans fcntl (Windows), le module s'importe et les statistiques sont cumulées"""
+    import importlib.util
+    import services.caption_cache_service as module
+
+    monkeypatch.setitem(sys.modules, "fcntl", None)
+    spec = importlib.util.spec_from_file_location("caption_cache_service_without_fcntl", module.__file__)
+    portable = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(portable)
+
+    assert portable.fcntl is None
+    cache = portable.CaptionCacheService()
+    cache.get_or_render("Memento mori", 100, CONFIG, MagicMock(return_value=make_caption(1)))
+    cache.record_stats()
+    assert cache.get_totals()["misses"] == 1
@@ -0,0 +1,100 @@
+import sys
+import os
+
+# Ajouter le répertoire backend au path pour les imports absolus
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from services.caption_raster_service import CaptionRasterService, get_font
+from services.subtitle_service import SubtitleService
+
+
+def test_caption_box_matches_default_layout():
+    """Boîte opaque de la largeur utile (largeur vidéo - margin), texte blanc sur fond noir"""
+    service = SubtitleService()
+
+    rgba = service.rasterize_caption("Ce qui dépend de nous", 1080)
+
+    assert rgba.dtype == np.uint8 and rgba.shape[2] == 4
+    assert rgba.shape[1] == 1080 - service.default_config["margin"]
+    assert rgba[..., 3].min() == 255
+    assert rgba[..., :3].max() == 255 and rgba[0, 0, :3].tolist() == [0, 0, 0]
+
+
+def test_long_text_wraps_within_box():
+    """Le texte revient à la ligne au mot sans dépasser la boîte; chaque ligne ajoute une hauteur de ligne"""
+    service = SubtitleService()
+    config = {**service.default_config, "stroke_width": 0}
+    rasterizer = CaptionRasterService()
+    font = get_font(config["font"], config["fontsize"])
+    text = "La sagesse est la seule liberté et la vertu le seul bonheur véritable pour l'homme"
+
+    lines = rasterizer.wrap(text, font, 400)
+    rgba = rasterizer.render(text, 400, config)
+
+    assert len(lines) > 1 and " ".join(lines) == text
+    assert all(font.getlength(line) <= 400 for line in lines)
+    ascent, descent = font.getmetrics()
+    assert rgba.shape[0] == len(lines) * (ascent + descent)
+
+
+def test_word_wider_than_box_is_split():
+    """Un mot plus large que la boîte est coupé entre deux caractères"""
+    font = get_font("DejaVu-Sans-Bold", 50)
+
+    lines = CaptionRasterService().wrap("Anticonstitutionnellement", font, 200)
+
+    assert len(lines) > 1 and "".join(lines) == "Anticonstitutionnellement"
+
+
+def test_transparent_background_with_stroke():
+    """Sans fond, seuls le texte et son contour sont opaques; le contour a sa couleur"""
+    service = SubtitleService()
+
+    rgba = service.rasterize_caption("Stoïque", 600, {"bg_color": "transparent", "stroke_color": "red", "stroke_width": 3})
+
+    alpha = rgba[..., 3]
+    assert alpha[0, 0] == 0 and alpha.max() == 255
+    red = (rgba[..., 0] > 200) & (rgba[..., 1] < 60) & (alpha == 255)
+    white = (rgba[..., :3].min(axis=2) > 200) & (alpha == 255)
+    assert red.any() and white.any()
+
+
+def test_subtitle_overlay_draws_caption_box_at_bottom():
+    """La couche de légendes mélange la boîte rastérisée en bas de l'image, pendant la phrase seulement"""
+    from moviepy.editor import ColorClip
+    from models import TimestampItem
+
+    service = SubtitleService()
+    background = ColorClip((600, 400), color=(0, 0, 255), duration=4)
+    phrases = [TimestampItem(text="Bonjour", start_time_ms=1000, end_time_ms=3000)]
+
+    overlay = service.apply_subtitles(background, phrases)
+
+    top, left = 400 - service.default_config["bottom_offset"], service.default_config["margin"] // 2
+    during, before = overlay.get_frame(2.0), overlay.get_frame(0.5)
+    assert tuple(during[top + 5, left + 1]) == (0, 0, 0)
+    assert tuple(during[top + 5, left - 1]) == (0, 0, 255)
+    assert tuple(during[top - 1, 300]) == (0, 0, 255)
+    assert tuple(before[top + 5, left + 1]) == (0, 0, 255)
+
+
+def test_highlighted_word_is_drawn_in_highlight_color(tmp_path, monkeypatch):
+    """Seul le mot surligné prend la couleur de surlignage; la mise en page ne change pas"""
+    monkeypatch.setenv("RESOURCES_DIR", str(tmp_path))
+    service = SubtitleService()
+    config = {"bg_color": "transparent", "stroke_width": 0, "highlight_color": "yellow"}
+
+    plain = service.rasterize_caption("Amor fati", 600, config)
+    first = service.rasterize_caption("Amor fati", 600, config, highlight=0)
+    second = service.rasterize_caption("Amor fati", 600, config, highlight=1)
+
+    def yellow_columns(rgba):
+        yellow = (rgba[..., 0] > 200) & (rgba[..., 1] > 200) & (rgba[..., 2] < 60) & (rgba[..., 3] > 200)
+        return np.nonzero(yellow.any(axis=0))[0]
+
+    assert plain.shape == first.shape == second.shape
+    assert len(yellow_columns(plain)) == 0
+    assert yellow_columns(first).max() < yellow_columns(second).min()
+    assert (first[..., 3] == plain[..., 3]).all()
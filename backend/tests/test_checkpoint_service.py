@@ -0,0 +1,155 @@
+import sys
+import os
+
+# Ajouter le répertoire backend au path pour les imports absolus
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from models import IdeaStatus, JobStatus, VideoJob
+from services.checkpoint_service import CheckpointService
+from workers.video_worker import VideoWorker
+
+
+def make_checkpoint_service(script=None, video=None):
+    """CheckpointService sur des collections en mémoire"""
+    stored = {}
+
+    async def replace_one(query, document, upsert=False):
+        stored[(query["idea_id"], query["stage"])] = document
+
+    async def find_one(query, projection=None):
+        return stored.get((query["idea_id"], query["stage"]))
+
+    checkpoints = MagicMock()
+    checkpoints.replace_one = AsyncMock(side_effect=replace_one)
+    checkpoints.find_one = AsyncMock(side_effect=find_one)
+    scripts = MagicMock()
+    scripts.find_one = AsyncMock(return_value=script)
+    videos = MagicMock()
+    videos.find_one = AsyncMock(return_value=video)
+
+    with patch("services.checkpoint_service.get_stage_checkpoints_collection", return_value=checkpoints):
+        service = CheckpointService()
+    patches = [
+        patch("services.checkpoint_service.get_scripts_collection", return_value=scripts),
+        patch("services.checkpoint_service.get_videos_collection", return_value=videos),
+    ]
+    for p in patches:
+        p.start()
+    return service, patches
+
+
+@pytest.mark.asyncio
+async def test_audio_checkpoint_detects_missing_or_modified_files(tmp_path):
+    """
+    Teste qu'un checkpoint audio n'est valide que si les fichiers enregistrés sont intacts
+    """
+    phrase_path = tmp_path / "phrase_0.mp3"
+    phrase_path.write_bytes(b"phrase audio")
+    (tmp_path / "combined_audio.mp3").write_bytes(b"combined audio")
+    script = {"idea_id": "idea_cp", "audio_phrases": [{"phrase_index": 0, "audio_path": str(phrase_path)}]}
+    service, patches = make_checkpoint_service(script=script)
+
+    try:
+        checkpoint = await service.save("idea_cp", "audio", job_id="job_cp", duration_seconds=12.5)
+        assert set(checkpoint.hashes) == {"phrase_0", "combined_audio"}
+        assert await service.verify("idea_cp", "audio")
+
+        phrase_path.write_bytes(b"truncated")
+        assert not await service.verify("idea_cp", "audio")
+
+        phrase_path.unlink()
+        assert not await service.verify("idea_cp", "audio")
+        assert not await service.verify("idea_cp", "video")
+    finally:
+        for p in patches:
+            p.stop()
+
+
+@pytest.mark.asyncio
+async def test_first_incomplete_stage_follows_verified_checkpoints():
+    """
+    Teste que la reprise se fait à la première étape sans checkpoint valide
+    """
+    script = {"idea_id": "idea_resume", "original_script": "Texte", "elevenlabs_adapted_script": None}
+    service, patches = make_checkpoint_service(script=script)
+
+    try:
+        await service.save("idea_resume", "script")
+        assert await service.first_incomplete_stage("idea_resume", ["script", "adapt", "audio"]) == "adapt"
+
+        # Le script a été réécrit en base depuis le checkpoint: il doit être refait
+        script["original_script"] = "Autre texte"
+        assert await service.first_incomplete_stage("idea_resume", ["script", "adapt"]) == "script"
+    finally:
+        for p in patches:
+            p.stop()
+
+
+@pytest.mark.asyncio
+async def test_worker_skips_checkpointed_stage():
+    """
+    Teste qu'une étape déjà checkpointée n'est pas relancée mais que le job avance
+    """
+    worker = VideoWorker()
+    worker.db = MagicMock()
+    worker.db.ideas.find_one = AsyncMock(return_value={"id": "idea_skip", "status": IdeaStatus.AUDIO_GENERATING.value})
+    worker.db.ideas.update_one = AsyncMock()
+    worker.queue_service = MagicMock()
+    worker.queue_service.advance_job = AsyncMock()
+    worker.queue_service.fail_job = AsyncMock()
+    worker.queue_service.renew_lease = AsyncMock(return_value=True)
+    worker.checkpoint_service = MagicMock()
+    worker.checkpoint_service.verify = AsyncMock(return_value=True)
+    worker.checkpoint_service.save = AsyncMock()
+    worker.run_audio_stage = AsyncMock()
+    job = VideoJob(idea_id="idea_skip", start_from="audio", stage="audio", end_stage="video", status=JobStatus.PROCESSING)
+
+    await worker.process_job(job)
+
+    worker.run_audio_stage.assert_not_called()
+    worker.checkpoint_service.save.assert_not_called()
+    worker.db.ideas.update_one.assert_awaited_with({"id": "idea_skip"}, {"$set": {"status": IdeaStatus.AUDIO_GENERATED}})
+    worker.queue_service.advance_job.assert_awaited_once_with(job.job_id, "video")
+
+
+@pytest.mark.asyncio
+async def test_redone_upstream_stage_invalidates_downstream_checkpoints():
+    """
+    Teste qu'une étape refaite en amont (retry) fait relancer l'étape suivante au lieu de la sauter
+    """
+    script = {"idea_id": "idea_chain", "original_script": "Texte",
+              "elevenlabs_adapted_script": "Texte adapté", "phrases": ["Texte adapté"]}
+    service, patches = make_checkpoint_service(script=script)
+
+    try:
+        await service.save("idea_chain", "script")
+        await service.save("idea_chain", "adapt")
+        assert await service.verify("idea_chain", "adapt")
+
+        # Le script est régénéré puis checkpointé: l'adaptation faite à partir de l'ancien n'est plus valide
+        script["original_script"] = "Nouveau texte"
+        await service.save("idea_chain", "script")
+        assert not await service.verify("idea_chain", "adapt")
+
+        worker = VideoWorker()
+        worker.db = MagicMock()
+        worker.db.ideas.find_one = AsyncMock(return_value={"id": "idea_chain", "status": IdeaStatus.SCRIPT_GENERATED.value})
+        worker.db.ideas.update_one = AsyncMock()
+        worker.queue_service = MagicMock()
+        worker.queue_service.advance_job = AsyncMock()
+        worker.queue_service.fail_job = AsyncMock()
+        worker.queue_service.renew_lease = AsyncMock(return_value=True)
+        worker.checkpoint_service = service
+        worker.run_adapt_stage = AsyncMock()
+        job = VideoJob(idea_id="idea_chain", stage="adapt", end_stage="video", status=JobStatus.PROCESSING)
+
+        await worker.process_job(job)
+
+        worker.run_adapt_stage.assert_awaited_once_with("idea_chain")
+        assert await service.verify("idea_chain", "adapt")
+    finally:
+        for p in patches:
+            p.stop()
@@ -0,0 +1,68 @@
+import sys
+import os
+
+# Ajouter le répertoire backend au path pour les imports absolus
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+
+from services.job_dispatcher import JobDispatcher, notify_local_dispatchers, _local_dispatchers
+
+
+def make_dispatcher(min_interval=0.01, max_interval=0.04):
+    dispatcher = JobDispatcher(MagicMock())
+    dispatcher.min_poll_interval = min_interval
+    dispatcher.max_poll_interval = max_interval
+    dispatcher.reset_backoff("llm")
+    dispatcher.change_streams_available = False
+    return dispatcher
+
+
+@pytest.mark.asyncio
+async def test_polling_backoff_doubles_until_max_and_resets():
+    """
+    Teste que, sans change stream, l'intervalle de polling d'une lane double jusqu'au maximum
+    """
+    dispatcher = make_dispatcher()
+
+    for expected in (0.02, 0.04, 0.04):
+        await dispatcher.wait_for_work("llm")
+        assert dispatcher.poll_interval("llm") == pytest.approx(expected)
+
+    # Les autres lanes gardent leur propre intervalle
+    assert dispatcher.poll_interval("render") == pytest.approx(0.01)
+
+    dispatcher.reset_backoff("llm")
+    assert dispatcher.poll_interval("llm") == pytest.approx(0.01)
+
+
+@pytest.mark.asyncio
+async def test_notify_wakes_waiting_worker_immediately():
+    """
+    Teste qu'un ajout de job dans le même process réveille le dispatcher sans attendre le timeout
+    """
+    dispatcher = make_dispatcher(min_interval=10, max_interval=10)
+    _local_dispatchers.add(dispatcher)
+    try:
+        waiter = asyncio.create_task(dispatcher.wait_for_work("render"))
+        await asyncio.sleep(0)
+        notify_local_dispatchers()
+        await asyncio.wait_for(waiter, timeout=1)
+    finally:
+        _local_dispatchers.discard(dispatcher)
+
+
+@pytest.mark.asyncio
+async def test_notification_before_first_wait_is_kept():
+    """
+    Teste qu'un job notifié avant la première attente d'une lane la réveille quand même
+    """
+    dispatcher = make_dispatcher(min_interval=10, max_interval=10)
+    _local_dispatchers.add(dispatcher)
+    try:
+        notify_local_dispatchers()
+        await asyncio.wait_for(dispatcher.wait_for_work("tts"), timeout=1)
+    finally:
+        _local_dispatchers.discard(dispatcher)
@@ -0,0 +1,91 @@
+import sys
+import os
+
+# Ajouter le répertoire backend au path pour les imports absolus
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import subprocess
+import pytest
+from unittest.mock import patch
+
+from services import media_probe_service
+from services.media_probe_service import get_duration_ms, probe_media, probe_mp3
+
+
+def get_ffmpeg():
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+FFMPEG = get_ffmpeg()
+
+
+def make_mp3(path, duration, *args):
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+                    *args, str(path)], check=True)
+    return str(path)
+
+
+def decoded_duration(path, sample_rate, channels):
+    """Durée obtenue en décodant tout le fichier (référence)"""
+    raw = subprocess.run([FFMPEG, "-loglevel", "error", "-i", path, "-f", "s16le", "-"], capture_output=True, check=True).stdout
+    return len(raw) / 2 / channels / sample_rate
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg non disponible")
+@pytest.mark.parametrize("args, channels", [
+    ([], 1),  # En-tête Info et tag LAME: délai et remplissage retirés
+    (["-write_xing", "0"], 1),  # Sans en-tête: parcours des trames
+    (["-ac", "2", "-ar", "22050", "-b:a", "64k"], 2),  # MPEG 2, 576 échantillons par trame
+    (["-id3v2_version", "3", "-metadata", "title=Stoïcisme"], 1),  # Tag ID3v2 en tête
+])
+def test_mp3_duration_matches_decoding(tmp_path, args, channels):
+    """La durée lue dans les en-têtes est celle du décodage, à l'échantillon près"""
+    path = make_mp3(tmp_path / "phrase.mp3", 2.3, *args)
+
+    info = probe_mp3(path)
+
+    assert info["audio_codec"] == "mp3"
+    assert info["duration"] == pytest.approx(decoded_duration(path, info["sample_rate"], channels), abs=1e-6)
+
+
+def test_non_mp3_is_not_parsed_as_mp3(tmp_path):
+    """Un fichier qui n'est pas un MP3 est laissé à ffmpeg"""
+    path = tmp_path / "fake.mp3"
+    path.write_bytes(b"not an mp3 file at all" * 10)
+
+    assert probe_mp3(str(path)) is None
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg non disponible")
+def test_probe_is_memoized_by_mtime_and_size(tmp_path):
+    """Un fichier inchangé n'est sondé qu'une fois; modifié, il est sondé à nouveau"""
+    path = str(tmp_path / "template.mp4")
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", "testsrc=size=160x90:rate=25:duration=1",
+                    "-pix_fmt", "yuv420p", path], check=True)
+
+    with patch.object(media_probe_service.subprocess, "run", wraps=subprocess.run) as run:
+        first = probe_media(path)
+        second = probe_media(path)
+        assert run.call_count == 1
+
+        subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", "testsrc=size=320x180:rate=25:duration=2",
+                        "-pix_fmt", "yuv420p", path], check=True)
+        third = probe_media(path)
+
+    assert first == second
+    assert (first["width"], first["fps"], first["codec"]) == (160, 25, "h264")
+    assert third["width"] == 320 and third["duration"] == pytest.approx(2.0, abs=0.05)
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg non disponible")
+def test_duration_ms_reads_headers_only(tmp_path):
+    """La durée en millisecondes (ElevenLabs) ne lance aucun décodage"""
+    path = make_mp3(tmp_path / "phrase.mp3", 1.5)
+
+    with patch.object(media_probe_service.subprocess, "run") as run:
+        assert get_duration_ms(path) == 1500
+    run.assert_not_called()
@@ -5,7 +5,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 import pytest
-from unittest.mock import AsyncMock, patch
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
 from datetime import datetime, timedelta
 
 from models import IdeaStatus, JobStatus, VideoJob, VideoIdea, Script, AudioGeneration, Video
@@ -41,10 +41,11 @@ def mock_db_collections():
 @pytest.fixture
 def mock_services():
     """Fixture pour mocker les services externes"""
-    with patch('backend.services.script_service.ScriptService', new_callable=AsyncMock) as mock_script_service, \
-         patch('backend.services.audio_service.AudioService', new_callable=AsyncMock) as mock_audio_service, \
-         patch('backend.services.video_service.VideoService', new_callable=AsyncMock) as mock_video_service, \
-         patch('backend.agents.script_adapter_agent.ScriptAdapterAgent', new_callable=AsyncMock) as mock_adapter_agent:
+    # Les services sont instanciés par les étapes du worker: les remplacer là où il les importe
+    with patch('services.script_service.ScriptService', new_callable=AsyncMock) as mock_script_service, \
+         patch('workers.video_worker.AudioService', new_callable=MagicMock) as mock_audio_service, \
+         patch('workers.video_worker.VideoService', new_callable=MagicMock) as mock_video_service, \
+         patch('workers.video_worker.ScriptAdapterAgent', new_callable=MagicMock) as mock_adapter_agent:
         
         # S'assurer que les méthodes sont des AsyncMock si elles sont awaitable
         mock_script_service.return_value.generate_script = AsyncMock()
@@ -78,6 +79,8 @@ def video_worker(mock_db_collections, mock_services):
     # Mock des méthodes de QueueService utilisées par le worker
     worker.queue_service.complete_job = AsyncMock()
     worker.queue_service.fail_job = AsyncMock()
+    worker.queue_service.advance_job = AsyncMock()
+    worker.queue_service.renew_lease = AsyncMock(return_value=True)
 
     # Patch global des fonctions de base de données pour tous les services
     with patch('backend.database.db', worker.db), \
@@ -91,6 +94,22 @@ def video_worker(mock_db_collections, mock_services):
         yield worker
 
 
+async def run_job_stages(worker, job):
+    """
+    Exécuter toutes les étapes d'un job comme la queue le ferait: après chaque
+    advance_job, le job est repris à l'étape suivante. Retourne les étapes exécutées.
+    """
+    stages = []
+    while True:
+        worker.queue_service.advance_job.reset_mock()
+        await worker.process_job(job)
+        if not worker.queue_service.advance_job.await_count:
+            return stages
+        following_stage = worker.queue_service.advance_job.await_args.args[1]
+        stages.append(following_stage)
+        job = job.model_copy(update={"stage": following_stage})
+
+
 @pytest.mark.asyncio
 async def test_regenerate_script_only(video_worker, mock_db_collections, mock_services):
     """
@@ -110,7 +129,7 @@ async def test_regenerate_script_only(video_worker, mock_db_collections, mock_se
         status=IdeaStatus.AUDIO_GENERATED, # Supposons que l'audio était déjà généré
         script_id="old_script_id"
     )
-    mock_db_collections["ideas"].find_one.side_effect = [idea.model_dump(), idea.model_dump()] # Pour les deux appels dans process_job
+    mock_db_collections["ideas"].find_one.return_value = idea.model_dump()  # Un appel par étape
 
     # Préparer le script existant
     old_script = Script(
@@ -135,7 +154,7 @@ async def test_regenerate_script_only(video_worker, mock_db_collections, mock_se
     )
 
     # Act
-    await video_worker.process_job(regeneration_job)
+    await run_job_stages(video_worker, regeneration_job)
 
     # Assert
     # 1. Vérifier que generate_script a été appelé
@@ -181,7 +200,7 @@ async def test_regenerate_audio_only(video_worker, mock_db_collections, mock_ser
         status=IdeaStatus.VIDEO_GENERATED, # Supposons que la vidéo était déjà générée
         script_id="existing_script_id"
     )
-    mock_db_collections["ideas"].find_one.side_effect = [idea.model_dump(), idea.model_dump()]
+    mock_db_collections["ideas"].find_one.return_value = idea.model_dump()  # Un appel par étape
 
     # Préparer le script existant
     existing_script = Script(
@@ -210,7 +229,7 @@ async def test_regenerate_audio_only(video_worker, mock_db_collections, mock_ser
     )
 
     # Act
-    await video_worker.process_job(regeneration_job)
+    await run_job_stages(video_worker, regeneration_job)
 
     # Assert
     # 1. Vérifier que generate_script n'a PAS été appelé
@@ -267,7 +286,7 @@ async def test_regenerate_video_only(video_worker, mock_db_collections, mock_ser
         status=IdeaStatus.AUDIO_GENERATED,
         script_id=script_id
     )
-    mock_db_collections["ideas"].find_one.side_effect = [idea.model_dump(), idea.model_dump()]
+    mock_db_collections["ideas"].find_one.return_value = idea.model_dump()  # Un appel par étape
 
     # Préparer le script existant (audio déjà généré implique script existe)
     existing_script = Script(
@@ -296,11 +315,11 @@ async def test_regenerate_video_only(video_worker, mock_db_collections, mock_ser
     )
 
     # Act
-    await video_worker.process_job(regeneration_job)
+    await run_job_stages(video_worker, regeneration_job)
 
     # Assert
     # 1. Vérifier que generate_video a été appelé
-    mock_services["video"].generate_video.assert_called_once_with(script_id=script_id)
+    mock_services["video"].generate_video.assert_called_once_with(script_id=script_id, still_owner=ANY)
 
     # 2. Vérifier que les étapes précédentes n'ont PAS été appelées
     mock_services["script"].generate_script.assert_not_called()
@@ -344,7 +363,7 @@ async def test_full_pipeline_resumption_from_audio(video_worker, mock_db_collect
         status=IdeaStatus.SCRIPT_GENERATED, # Le script est déjà généré
         script_id=script_id
     )
-    mock_db_collections["ideas"].find_one.side_effect = [idea.model_dump(), idea.model_dump(), idea.model_dump(), idea.model_dump()] # Plusieurs appels
+    mock_db_collections["ideas"].find_one.return_value = idea.model_dump()  # Un appel par étape
 
     # Préparer le script existant
     existing_script = Script(
@@ -367,21 +386,23 @@ async def test_full_pipeline_resumption_from_audio(video_worker, mock_db_collect
         job_id=job_id,
         idea_id=idea_id,
         start_from="script", # C'est le start_from initial, mais le worker va le reprendre
+        stage="script", # Étape donnée à la mise en queue (ou par backfill_job_stages aux anciens jobs)
         is_regeneration=False,
         status=JobStatus.PROCESSING
     )
 
     # Act
-    await video_worker.process_job(pipeline_job)
+    stages = await run_job_stages(video_worker, pipeline_job)
 
     # Assert
     # 1. generate_script ne doit PAS être appelé car le statut initial est SCRIPT_GENERATED
     mock_services["script"].generate_script.assert_not_called()
+    assert stages == ["audio", "video"]  # Reprise à l'étape adapt, puis audio et video
 
     # 2. adapt_script, complete_audio_generation_with_timestamps et generate_video DOIVENT être appelés
     mock_services["adapter"].adapt_script.assert_called_once_with(initial_script_content)
     mock_services["audio"].complete_audio_generation_with_timestamps.assert_called_once_with(script_id)
-    mock_services["video"].generate_video.assert_called_once_with(script_id=script_id)
+    mock_services["video"].generate_video.assert_called_once_with(script_id=script_id, still_owner=ANY)
 
     # 3. Vérifier les mises à jour de statut
     mock_db_collections["ideas"].update_one.assert_any_call(
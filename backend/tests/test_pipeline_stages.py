@@ -0,0 +1,98 @@
+import sys
+import os
+
+# Ajouter le répertoire backend au path pour les imports absolus
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from models import IdeaStatus, JobStatus, VideoJob, VideoIdea, Script
+from services.pipeline_stages import resolve_stages, next_stage, lane_stages, get_lane_limits
+from workers.video_worker import VideoWorker
+
+
+def test_resolve_stages():
+    """
+    Teste le découpage d'un job en étapes selon son point de départ
+    """
+    assert resolve_stages("script") == ("script", "video")
+    assert resolve_stages("audio") == ("adapt", "video")
+    assert resolve_stages("video") == ("video", "video")
+    assert resolve_stages("script", is_regeneration=True) == ("script", "script")
+    assert resolve_stages("audio", is_regeneration=True) == ("adapt", "audio")
+    assert resolve_stages("video", is_regeneration=True) == ("video", "video")
+
+    with pytest.raises(ValueError):
+        resolve_stages("upload", is_regeneration=True)
+
+
+def test_next_stage_and_lanes():
+    """
+    Teste l'enchaînement des étapes et leur répartition dans les lanes
+    """
+    assert next_stage("script", "video") == "adapt"
+    assert next_stage("adapt", "audio") == "audio"
+    assert next_stage("audio", "audio") is None
+    assert next_stage("video", "video") is None
+
+    assert lane_stages("llm") == ["script", "adapt"]
+    assert lane_stages("tts") == ["audio"]
+    assert lane_stages("render") == ["video"]
+
+
+def test_worker_lanes_disable_other_lanes(monkeypatch):
+    """
+    Teste qu'un nœud limité à la lane render n'a aucun slot pour les autres lanes
+    """
+    monkeypatch.setenv("WORKER_LANES", "render")
+    monkeypatch.setenv("RENDER_LANE_CONCURRENCY", "4")
+
+    assert get_lane_limits() == {"llm": 0, "tts": 0, "render": 4}
+
+    monkeypatch.setenv("WORKER_LANES", "render,gpu")
+    with pytest.raises(ValueError):
+        get_lane_limits()
+
+
+def test_render_lane_limited_by_free_memory(monkeypatch):
+    """
+    Teste que la lane render ne dépasse pas la RAM libre par défaut
+    """
+    monkeypatch.delenv("RENDER_LANE_CONCURRENCY", raising=False)
+    monkeypatch.setenv("RENDER_MEMORY_MB", "1000")
+    monkeypatch.setattr(os, "cpu_count", lambda: 16)
+    monkeypatch.setattr("services.pipeline_stages.get_available_memory_mb", lambda: 3500)
+
+    assert get_lane_limits()["render"] == 3
+
+
+@pytest.mark.asyncio
+async def test_stage_completion_moves_job_to_next_stage():
+    """
+    Teste qu'une étape terminée remet le job en queue pour l'étape suivante au lieu de le compléter
+    """
+    idea = VideoIdea(id="idea_adapt", title="Test", status=IdeaStatus.SCRIPT_GENERATED)
+    script = Script(id="script_adapt", idea_id="idea_adapt", title="Test", original_script="Texte original")
+
+    worker = VideoWorker()
+    worker.db = MagicMock()
+    worker.db.ideas.find_one = AsyncMock(return_value=idea.model_dump())
+    worker.db.ideas.update_one = AsyncMock()
+    worker.db.scripts.find_one = AsyncMock(return_value=script.model_dump())
+    worker.db.scripts.update_one = AsyncMock()
+    worker.queue_service = MagicMock()
+    worker.queue_service.advance_job = AsyncMock()
+    worker.queue_service.complete_job = AsyncMock()
+    worker.queue_service.fail_job = AsyncMock()
+
+    job = VideoJob(idea_id="idea_adapt", start_from="audio", stage="adapt", end_stage="video", status=JobStatus.PROCESSING)
+
+    with patch("workers.video_worker.ScriptAdapterAgent") as adapter_cls:
+        adapter_cls.return_value.adapt_script = AsyncMock(return_value=("Texte adapté", ["phrase"]))
+        await worker.process_job(job)
+
+    adapter_cls.return_value.adapt_script.assert_called_once_with("Texte original")
+    worker.queue_service.advance_job.assert_called_once_with(job.job_id, "audio")
+    worker.queue_service.complete_job.assert_not_called()
+    worker.queue_service.fail_job.assert_not_called()
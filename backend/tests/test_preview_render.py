@@ -0,0 +1,106 @@
+import sys
+import os
+
+# Ajouter le répertoire backend au path pour les imports absolus
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from models import VideoJob, JobStatus, VideoType
+from services.queue_service import QueueService
+from services.video_service import VideoService
+
+
+def make_video_service(preview_enabled=True):
+    """Créer un VideoService avec ou sans aperçus"""
+    service = VideoService()
+    service.preview_enabled = preview_enabled
+    return service
+
+
+@pytest.mark.parametrize("latest_video, expected", [
+    (None, "preview"),
+    ({"id": "v1", "render_quality": "preview", "approved": False, "is_scheduled": False}, "preview"),
+    ({"id": "v1", "render_quality": "final", "approved": False, "is_scheduled": False}, "preview"),
+    ({"id": "v1", "render_quality": "preview", "approved": True, "is_scheduled": False}, "final"),
+    ({"id": "v1", "render_quality": "preview", "approved": False, "is_scheduled": True}, "final"),
+])
+def test_render_target_depends_on_approval(latest_video, expected):
+    """
+    Teste qu'un aperçu est rendu tant que la vidéo n'est ni approuvée ni planifiée
+    """
+    quality, preview_video = make_video_service()._get_render_target(latest_video)
+
+    assert quality == expected
+    # Seul un aperçu approuvé/planifié est remplacé par le rendu final
+    if expected == "final":
+        assert preview_video == latest_video
+    else:
+        assert preview_video is None
+
+
+def test_render_target_is_final_when_previews_disabled():
+    """
+    Teste que RENDER_PREVIEW_ENABLED=false conserve le rendu final direct
+    """
+    assert make_video_service(preview_enabled=False)._get_render_target(None) == ("final", None)
+
+
+def test_previews_are_opt_in(monkeypatch):
+    """
+    Teste que sans RENDER_PREVIEW_ENABLED les jobs produisent toujours le rendu final
+    """
+    monkeypatch.delenv("RENDER_PREVIEW_ENABLED", raising=False)
+    service = VideoService()
+
+    assert service.preview_enabled is False
+    assert service._get_render_target(None) == ("final", None)
+
+
+def test_regeneration_reuses_previous_template(tmp_path):
+    """
+    Teste que la régénération garde le template de la vidéo précédente (et donc son fond en cache)
+    """
+    service = make_video_service()
+    previous = tmp_path / "previous.mp4"
+    previous.write_bytes(b"template")
+    service._select_random_template = MagicMock(return_value="random.mp4")
+
+    assert service._select_template({"template_path": str(previous)}, VideoType.SHORT) == str(previous)
+    assert service._select_template({"template_path": str(tmp_path / "deleted.mp4")}, VideoType.SHORT) == "random.mp4"
+    assert service._select_template(None, VideoType.SHORT) == "random.mp4"
+
+
+@pytest.mark.asyncio
+async def test_request_final_render_queues_video_regeneration():
+    """
+    Teste que le rendu final est mis en queue comme une régénération de l'étape video
+    """
+    service = QueueService.__new__(QueueService)
+    service.queue_collection = MagicMock()
+    service.queue_collection.find_one = AsyncMock(return_value=None)
+    queued = VideoJob(idea_id="idea_1", stage="video", end_stage="video")
+    service.add_job = AsyncMock(return_value=queued)
+
+    job = await service.request_final_render("idea_1")
+
+    assert job is queued
+    service.add_job.assert_awaited_once_with("idea_1", start_from="video", is_regeneration=True)
+
+
+@pytest.mark.asyncio
+async def test_request_final_render_keeps_active_job():
+    """
+    Teste qu'un job déjà actif pour l'idée n'est pas remplacé (son étape video rendra en final)
+    """
+    service = QueueService.__new__(QueueService)
+    active = VideoJob(idea_id="idea_1", stage="audio", end_stage="video", status=JobStatus.PROCESSING)
+    service.queue_collection = MagicMock()
+    service.queue_collection.find_one = AsyncMock(return_value=active.model_dump())
+    service.add_job = AsyncMock()
+
+    job = await service.request_final_render("idea_1")
+
+    assert job.job_id == active.job_id
+    service.add_job.assert_not_awaited()
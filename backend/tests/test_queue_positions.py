@@ -0,0 +1,222 @@
+import sys
+import os
+
+# Ajouter le répertoire backend au path pour les imports absolus
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from models import JobStatus, VideoJob
+from services.queue_service import QueueService
+
+
+class FakeCursor:
+    """Curseur Motor minimal (itération asynchrone, sort, to_list)"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            self.rows.sort(key=lambda row: row.get(field), reverse=direction == -1)
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for row in self.rows:
+            yield row
+
+    async def to_list(self, length=None):
+        return self.rows[:length]
+
+
+def as_stored(document):
+    """Copie d'un document telle que MongoDB la relit (dates BSON à la milliseconde)"""
+    return {
+        key: value.replace(microsecond=value.microsecond // 1000 * 1000) if isinstance(value, datetime) else value
+        for key, value in document.items()
+    }
+
+
+def matches(document, query):
+    """Évaluation minimale d'un filtre MongoDB (égalité, $lt, $gt, $or)"""
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(matches(document, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = document.get(field)
+            if "$lt" in condition and not value < condition["$lt"]:
+                return False
+            if "$gt" in condition and not value > condition["$gt"]:
+                return False
+        elif document.get(field) != condition:
+            return False
+    return True
+
+
+def make_queue_service(monkeypatch, mode="priority"):
+    """QueueService sur une collection simulée"""
+    monkeypatch.setenv("QUEUE_SCHEDULING_MODE", mode)
+    with patch("services.queue_service.get_queue_collection", return_value=MagicMock()), \
+         patch("services.queue_service.get_ideas_collection", return_value=MagicMock()):
+        return QueueService()
+
+
+@pytest.mark.asyncio
+async def test_batch_positions_match_queue_order(monkeypatch):
+    """
+    Teste que les positions calculées en batch suivent priority DESC, created_at ASC
+    """
+    service = make_queue_service(monkeypatch)
+    base = datetime(2026, 1, 10, 12, 0)
+    jobs = [
+        VideoJob(idea_id="old_low", priority=0, created_at=base, status=JobStatus.QUEUED),
+        VideoJob(idea_id="new_high", priority=5, created_at=base + timedelta(minutes=5), status=JobStatus.QUEUED),
+        VideoJob(idea_id="new_low", priority=0, created_at=base + timedelta(minutes=10), status=JobStatus.QUEUED),
+        VideoJob(idea_id="running", priority=9, created_at=base, status=JobStatus.PROCESSING),
+    ]
+    queued = [job.model_dump() for job in jobs if job.status == JobStatus.QUEUED]
+
+    async def count_documents(query):
+        return sum(1 for document in queued if matches(document, query))
+
+    service.queue_collection.count_documents = AsyncMock(side_effect=count_documents)
+    service.queue_collection.find = MagicMock(return_value=FakeCursor(queued))
+
+    # Petit lot: un comptage par job sur l'index, sans lire toute la queue
+    positions = await service.get_queue_positions(jobs)
+
+    assert positions == {"new_high": 1, "old_low": 2, "new_low": 3}
+    assert service.queue_collection.count_documents.await_count == 3
+    service.queue_collection.find.assert_not_called()
+
+    # Au-delà du seuil: une seule lecture de la queue pour toutes les idées
+    service.position_count_max_jobs = 2
+    positions = await service.get_queue_positions(jobs)
+
+    assert positions == {"new_high": 1, "old_low": 2, "new_low": 3}
+    service.queue_collection.find.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_queue_stats_from_single_facet(monkeypatch):
+    """
+    Teste que les statistiques sont lues dans une seule agrégation $facet
+    """
+    service = make_queue_service(monkeypatch)
+    facets = {
+        "by_status": [{"_id": "queued", "count": 7}, {"_id": "processing", "count": 2}],
+        "processing_by_stage": [{"_id": "script", "count": 1}, {"_id": "video", "count": 1}],
+        "completed_today": [{"count": 4}],
+        "latency": [{"count": 6, "avg_ms": 1234.4, "max_ms": 5000}],
+        "deadlines_at_risk": []
+    }
+    service.queue_collection.aggregate = MagicMock(return_value=FakeCursor([facets]))
+    service.queue_collection.count_documents = AsyncMock()
+    registry = MagicMock()
+    registry.get_fleet_capacity = AsyncMock(return_value={"llm": 8, "tts": 1, "render": 1})
+
+    with patch("services.queue_service.WorkerRegistryService", return_value=registry):
+        stats = await service.get_queue_stats()
+
+    assert stats["queued"] == 7
+    assert stats["processing"] == 2
+    assert stats["completed_today"] == 4
+    assert stats["deadlines_at_risk"] == 0
+    # Slots par lane: les jobs en cours ne sont comptés que dans la lane de leur étape
+    assert stats["lanes"] == {
+        "llm": {"capacity": 8, "processing": 1, "available_slots": 7},
+        "tts": {"capacity": 1, "processing": 0, "available_slots": 1},
+        "render": {"capacity": 1, "processing": 1, "available_slots": 0},
+    }
+    assert stats["max_concurrent"] == 1
+    assert stats["available_slots"] == 0
+    assert stats["queue_latency"] == {"count": 6, "avg_ms": 1234, "max_ms": 5000}
+    service.queue_collection.aggregate.assert_called_once()
+    service.queue_collection.count_documents.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_add_jobs_batches_queue_writes(monkeypatch):
+    """
+    Teste que la mise en queue groupée déduplique en une requête et écrit en un insert_many / update_many
+    """
+    service = make_queue_service(monkeypatch)
+    ideas = [
+        {"id": "idea_new", "status": "pending"},
+        {"id": "idea_audio", "status": "audio_generated"},
+        {"id": "idea_queued", "status": "queued"},
+    ]
+    existing = VideoJob(idea_id="idea_queued", stage="script", status=JobStatus.QUEUED)
+    stored = [as_stored(existing.model_dump())]
+
+    async def insert_many(documents):
+        stored.extend(as_stored(document) for document in documents)
+
+    def find(query, projection=None):
+        if "idea_id" in query:  # Déduplication: jobs déjà en queue pour les idées demandées
+            return FakeCursor([as_stored(existing.model_dump())])
+        # Lecture des positions (au-delà de QUEUE_POSITION_COUNT_MAX_JOBS): jobs en queue tels que MongoDB les relit
+        return FakeCursor([document for document in stored if matches(document, query)])
+
+    service.ideas_collection.find = MagicMock(return_value=FakeCursor(ideas))
+    service.ideas_collection.update_many = AsyncMock()
+    service.queue_collection.find = MagicMock(side_effect=find)
+    service.queue_collection.count_documents = AsyncMock(
+        side_effect=lambda query: sum(1 for document in stored if matches(document, query))
+    )
+    service.queue_collection.insert_many = AsyncMock(side_effect=insert_many)
+    service.get_idea_deadlines = AsyncMock(return_value={})
+    service.estimate_stage_seconds = AsyncMock(return_value={"script": 60, "adapt": 30, "audio": 180, "video": 300})
+
+    result = await service.add_jobs([("idea_new", 5), ("idea_audio", 0), ("idea_queued", 0), ("idea_missing", 0)])
+
+    assert result["created"] == ["idea_new", "idea_audio"]
+    assert result["existing"] == ["idea_queued"]
+    assert result["not_found"] == ["idea_missing"]
+    assert result["jobs"]["idea_audio"].stage == "video"
+    assert result["jobs"]["idea_new"].priority == 5
+
+    inserted = service.queue_collection.insert_many.await_args.args[0]
+    assert [job["idea_id"] for job in inserted] == ["idea_new", "idea_audio"]
+    service.ideas_collection.update_many.assert_awaited_once()
+    assert service.ideas_collection.update_many.await_args.args[0] == {"id": {"$in": ["idea_new", "idea_audio"]}}
+    # Le nouveau job de priorité 5 passe devant le job déjà en queue, le nouveau job de priorité 0 le suit
+    assert result["positions"] == {"idea_new": 1, "idea_queued": 2, "idea_audio": 3}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["priority", "edf"])
+async def test_new_job_position_counts_only_jobs_ahead(monkeypatch, mode):
+    """
+    Teste que le job retourné par add_job trie comme sa copie stockée (dates à la milliseconde):
+    il ne se compte pas lui-même parmi les jobs qui le précèdent
+    """
+    service = make_queue_service(monkeypatch, mode)
+    stored = [as_stored(VideoJob(idea_id="older", stage="script", status=JobStatus.QUEUED,
+                                 created_at=datetime(2026, 1, 10, 12, 0), schedule_key=datetime(2026, 1, 11, 12, 0)).model_dump())]
+
+    async def insert_one(document):
+        stored.append(as_stored(document))
+
+    async def count_documents(query):
+        return sum(1 for document in stored if matches(document, query))
+
+    service.queue_collection.find_one = AsyncMock(return_value=None)
+    service.queue_collection.insert_one = AsyncMock(side_effect=insert_one)
+    service.queue_collection.count_documents = AsyncMock(side_effect=count_documents)
+    service.ideas_collection.find_one = AsyncMock(return_value={"id": "idea_new", "status": "pending"})
+    service.ideas_collection.update_one = AsyncMock()
+    service.get_idea_deadline = AsyncMock(return_value=None)
+    service.estimate_stage_seconds = AsyncMock(return_value={"script": 60, "adapt": 30, "audio": 180, "video": 300})
+
+    job = await service.add_job("idea_new")
+
+    assert job.created_at == stored[-1]["created_at"]
+    assert job.schedule_key == stored[-1]["schedule_key"]
+    assert await service.get_queue_position("idea_new", job) == 2
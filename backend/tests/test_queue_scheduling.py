@@ -0,0 +1,87 @@
+import sys
+import os
+
+# Ajouter le répertoire backend au path pour les imports absolus
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from services.queue_service import QueueService, DEFAULT_STAGE_SECONDS
+
+
+def make_queue_service(monkeypatch, mode="edf"):
+    """QueueService en mode EDF sur des collections simulées"""
+    monkeypatch.setenv("QUEUE_SCHEDULING_MODE", mode)
+    monkeypatch.setenv("QUEUE_AGING_HOURS", "24")
+    monkeypatch.setenv("QUEUE_PRIORITY_BOOST_MINUTES", "60")
+    with patch("services.queue_service.get_queue_collection", return_value=MagicMock()), \
+         patch("services.queue_service.get_ideas_collection", return_value=MagicMock()):
+        return QueueService()
+
+
+def test_edf_orders_by_latest_start_time(monkeypatch):
+    """
+    Teste que le tri EDF place d'abord la vidéo dont la publication est la plus proche
+    """
+    service = make_queue_service(monkeypatch)
+    now = datetime(2026, 1, 10, 12, 0)
+
+    due_soon = service.compute_schedule_key(now + timedelta(hours=2), now, 0, 600)
+    unscheduled = service.compute_schedule_key(None, now - timedelta(hours=3), 0, 600)
+    due_next_week = service.compute_schedule_key(now + timedelta(days=7), now - timedelta(hours=1), 0, 600)
+
+    assert due_soon == now + timedelta(hours=2) - timedelta(seconds=600)
+    assert sorted([due_next_week, unscheduled, due_soon]) == [due_soon, unscheduled, due_next_week]
+    assert service._queue_sort() == [("schedule_key", 1), ("created_at", 1)]
+
+
+def test_aging_and_priority_prevent_starvation(monkeypatch):
+    """
+    Teste qu'un vieux job sans échéance passe devant une échéance lointaine et que la priorité avance la clé
+    """
+    service = make_queue_service(monkeypatch)
+    now = datetime(2026, 1, 10, 12, 0)
+
+    old_unscheduled = service.compute_schedule_key(None, now - timedelta(days=2), 0, 600)
+    due_tomorrow = service.compute_schedule_key(now + timedelta(days=1), now, 0, 600)
+    assert old_unscheduled < due_tomorrow
+
+    boosted = service.compute_schedule_key(None, now, 2, 600)
+    assert boosted == now + timedelta(hours=24) - timedelta(minutes=120)
+
+
+@pytest.mark.asyncio
+async def test_estimates_use_stage_history(monkeypatch):
+    """
+    Teste que la durée estimée des étapes vient de l'historique des checkpoints
+    """
+    service = make_queue_service(monkeypatch)
+
+    class Cursor:
+        def __init__(self, rows):
+            self.rows = rows
+
+        def __aiter__(self):
+            return self._iterate()
+
+        async def _iterate(self):
+            for row in self.rows:
+                yield row
+
+    checkpoints = MagicMock()
+    checkpoints.aggregate = MagicMock(return_value=Cursor([{"_id": "video", "avg_seconds": 900.0}]))
+
+    with patch("services.queue_service.get_stage_checkpoints_collection", return_value=checkpoints):
+        fields = await service._schedule_fields(None, datetime(2026, 1, 10), 0, "audio", "video")
+
+    assert fields["estimated_seconds"] == DEFAULT_STAGE_SECONDS["audio"] + 900.0
+
+
+def test_priority_mode_keeps_legacy_order(monkeypatch):
+    """
+    Teste que le mode par défaut conserve le tri priorité puis ancienneté
+    """
+    service = make_queue_service(monkeypatch, mode="priority")
+    assert service._queue_sort() == [("priority", -1), ("created_at", 1)]
@@ -0,0 +1,274 @@
+import sys
+import os
+
+# Ajouter le répertoire backend au path pour les imports absolus
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import subprocess
+import pytest
+
+from services.pipeline_stages import get_descendant_pids
+from services.render_service import RenderSpec, _run_in_pool, render_in_pool, shutdown_render_executor
+
+
+def get_ffmpeg():
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+FFMPEG = get_ffmpeg()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg non disponible")
+async def test_render_runs_in_process_pool_without_blocking_loop(tmp_path):
+    """
+    Teste que le rendu s'exécute dans le pool de process et que la boucle asyncio reste réactive
+    """
+    template_path = str(tmp_path / "template.mp4")
+    audio_path = str(tmp_path / "audio.mp3")
+    output_path = str(tmp_path / "output.mp4")
+
+    # Template d'1s bouclé sur 2s d'audio
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", "testsrc=size=160x90:rate=24:duration=1",
+                    "-pix_fmt", "yuv420p", template_path], check=True)
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", "sine=frequency=440:duration=2",
+                    audio_path], check=True)
+
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker_task = asyncio.create_task(ticker())
+    try:
+        duration = await render_in_pool(RenderSpec(
+            template_path=template_path,
+            audio_path=audio_path,
+            output_path=output_path,
+            preset="ultrafast"
+        ))
+    finally:
+        ticker_task.cancel()
+        shutdown_render_executor()
+
+    assert duration == pytest.approx(2.0, abs=0.1)
+    assert os.path.getsize(output_path) > 0
+    # La boucle a continué de tourner pendant le rendu
+    assert ticks > 5
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg non disponible")
+@pytest.mark.asyncio
+@pytest.mark.skipif(get_descendant_pids() is None, reason="/proc non disponible")
+async def test_cancelled_render_stops_its_processes():
+    """
+    Teste qu'un rendu annulé (bail perdu) arrête ses sous-process au lieu de continuer dans le pool
+    """
+    command = [sys.executable, "-c", "import time; time.sleep(60)  # render-cancel-test"]
+
+    def find_render_process():
+        for pid in get_descendant_pids() or []:
+            try:
+                with open(f"/proc/{pid}/cmdline", "rb") as f:
+                    if b"render-cancel-test" in f.read():
+                        return pid
+            except OSError:
+                pass
+        return None
+
+    task = asyncio.create_task(_run_in_pool(subprocess.run, command))
+    try:
+        render_pid = None
+        for _ in range(300):
+            await asyncio.sleep(0.05)
+            render_pid = find_render_process()
+            if render_pid:
+                break
+        assert render_pid, "le sous-process de rendu n'a pas démarré"
+
+        started = asyncio.get_running_loop().time()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # Le sous-process est tué et la tâche du pool s'est terminée avant de rendre la main
+        assert asyncio.get_running_loop().time() - started < 5
+        assert find_render_process() is None
+    finally:
+        shutdown_render_executor()
+
+
+def test_ffmpeg_backend_loops_template_and_burns_subtitles(tmp_path):
+    """
+    Teste que le moteur ffmpeg boucle le template sur la durée de l'audio et incruste les sous-titres
+    """
+    import imageio_ffmpeg
+    from models import TimestampItem
+    from services.render_service import render_video, probe_media
+
+    template_path = str(tmp_path / "template.mp4")
+    audio_path = str(tmp_path / "audio.mp3")
+    output_path = str(tmp_path / "output.mp4")
+
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", "color=c=blue:size=320x240:rate=24:duration=1",
+                    "-pix_fmt", "yuv420p", template_path], check=True)
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", "sine=frequency=440:duration=2.5",
+                    audio_path], check=True)
+
+    duration = render_video(RenderSpec(
+        template_path=template_path,
+        audio_path=audio_path,
+        output_path=output_path,
+        subtitles=[TimestampItem(text="Memento mori [calm]", start_time_ms=0, end_time_ms=1000)],
+        subtitle_config={"fontsize": 20, "bottom_offset": 100},
+        preset="ultrafast",
+        backend="ffmpeg"
+    ))
+
+    assert duration == pytest.approx(2.5, abs=0.1)
+    assert probe_media(output_path)["duration"] == pytest.approx(2.5, abs=0.15)
+
+    # Première image: bloc de sous-titre (texte blanc sur fond noir) sous le haut du bloc, au centre
+    reader = imageio_ffmpeg.read_frames(output_path)
+    meta = next(reader)
+    width, height = meta["size"]
+    first_frame = next(reader)
+    reader.close()
+    row = height - 100 + 8
+    pixels = [first_frame[(row * width + x) * 3:(row * width + x) * 3 + 3] for x in range(width // 4, 3 * width // 4)]
+    assert any(p[0] > 200 and p[1] > 200 and p[2] > 200 for p in pixels)
+    assert any(p[0] < 40 and p[1] < 40 and p[2] < 40 for p in pixels)
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg non disponible")
+def test_ffmpeg_preview_render_is_downscaled(tmp_path):
+    """
+    Teste qu'un rendu d'aperçu est réduit à la hauteur demandée, au fps réduit
+    """
+    from services.render_service import render_video, probe_media
+
+    template_path = str(tmp_path / "template.mp4")
+    audio_path = str(tmp_path / "audio.mp3")
+    output_path = str(tmp_path / "output.preview.mp4")
+
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", "testsrc=size=640x360:rate=24:duration=1",
+                    "-pix_fmt", "yuv420p", template_path], check=True)
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", "sine=frequency=440:duration=1.5",
+                    audio_path], check=True)
+
+    render_video(RenderSpec(
+        template_path=template_path,
+        audio_path=audio_path,
+        output_path=output_path,
+        fps=12,
+        preset="ultrafast",
+        backend="ffmpeg",
+        max_height=180
+    ))
+
+    media = probe_media(output_path)
+    assert (media["width"], media["height"]) == (320, 180)
+    assert media["duration"] == pytest.approx(1.5, abs=0.15)
+
+
+def test_segment_bounds_and_subtitles_cover_timeline_exactly():
+    """
+    Teste que les segments couvrent toutes les images sans trou ni chevauchement
+    et que les sous-titres à cheval sur une jonction sont coupés et recalés
+    """
+    from models import TimestampItem
+    from services.render_service import segment_bounds, segment_subtitles
+
+    bounds = segment_bounds(241, 3)
+    assert bounds == [(0, 80), (80, 80), (160, 81)]
+    assert sum(frames for _, frames in bounds) == 241
+
+    subtitles = [
+        TimestampItem(text="avant", start_time_ms=0, end_time_ms=1000),
+        TimestampItem(text="jonction", start_time_ms=3000, end_time_ms=4000),
+    ]
+    subset = segment_subtitles(subtitles, 3333, 6666)
+    assert [(s.text, s.start_time_ms, s.end_time_ms) for s in subset] == [("jonction", 0, 667)]
+
+    # Les mots sont recalés, tous conservés: le texte de la légende ne change pas à la jonction
+    worded = TimestampItem(text="à cheval", start_time_ms=3000, end_time_ms=4000,
+                           words=[("à", 3000, 3400), ("cheval", 3400, 4000)])
+    subset = segment_subtitles([worded], 3333, 6666)
+    assert subset[0].words == [("à", -333, 67), ("cheval", 67, 667)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg non disponible")
+async def test_segmented_render_matches_single_render(tmp_path, monkeypatch):
+    """
+    Teste qu'un rendu par segments a le même nombre d'images, la même durée
+    et la même phase de boucle du template que le rendu d'un seul tenant
+    """
+    import imageio_ffmpeg
+    import numpy as np
+    from models import TimestampItem
+    from services.render_service import render_video, probe_media
+
+    monkeypatch.setenv("RENDER_SEGMENTS", "3")
+    monkeypatch.setenv("RENDER_SEGMENT_MIN_SECONDS", "1")
+    template_path = str(tmp_path / "template.mp4")
+    audio_path = str(tmp_path / "audio.mp3")
+
+    # Template de 1.5s: les jonctions (3.33s, 6.67s) tombent au milieu d'une boucle
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", "testsrc=size=160x90:rate=24:duration=1.5",
+                    "-pix_fmt", "yuv420p", template_path], check=True)
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", "sine=frequency=440:duration=10",
+                    audio_path], check=True)
+
+    base = dict(
+        template_path=template_path,
+        audio_path=audio_path,
+        subtitles=[TimestampItem(text="jonction", start_time_ms=3000, end_time_ms=4000)],
+        subtitle_config={"fontsize": 12},
+        preset="ultrafast",
+        backend="ffmpeg"
+    )
+    try:
+        await render_in_pool(RenderSpec(output_path=str(tmp_path / "segmented.mp4"), **base))
+    finally:
+        shutdown_render_executor()
+    render_video(RenderSpec(output_path=str(tmp_path / "single.mp4"), **base))
+
+    def read_gray(path):
+        reader = imageio_ffmpeg.read_frames(path, pix_fmt="gray", bpp=1)
+        next(reader)
+        return [np.frombuffer(frame, np.uint8).astype(int) for frame in reader]
+
+    segmented = read_gray(str(tmp_path / "segmented.mp4"))
+    single = read_gray(str(tmp_path / "single.mp4"))
+    assert len(segmented) == len(single)
+    assert probe_media(str(tmp_path / "segmented.mp4"))["duration"] == pytest.approx(
+        probe_media(str(tmp_path / "single.mp4"))["duration"], abs=0.05
+    )
+    # Seules des différences d'encodage subsistent (une erreur de phase décalerait toute l'image)
+    assert max(np.abs(a - b).mean() for a, b in zip(segmented, single)) < 10
+
+
+def test_segmented_render_is_opt_in(monkeypatch, tmp_path):
+    """
+    Teste que, sans RENDER_SEGMENTS, une vidéo longue est rendue d'un seul tenant
+    """
+    from unittest.mock import patch
+    from services import render_service
+
+    monkeypatch.delenv("RENDER_SEGMENTS", raising=False)
+    monkeypatch.setenv("RENDER_SEGMENT_MIN_SECONDS", "1")
+    spec = RenderSpec(template_path="t.mp4", audio_path="a.mp3", output_path=str(tmp_path / "o.mp4"))
+
+    with patch.object(render_service, "probe_media", return_value={"duration": 600.0}):
+        assert render_service.get_render_segments() == 1
+        assert render_service.plan_render(spec).segments == []
+        monkeypatch.setenv("RENDER_SEGMENTS", "4")
+        assert len(render_service.plan_render(spec).segments) == 4
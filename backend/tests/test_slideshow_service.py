@@ -0,0 +1,126 @@
+import sys
+import os
+
+# Ajouter le répertoire backend au path pour les imports absolus
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import subprocess
+import pytest
+
+from models import TimestampItem, VideoType
+from services.slideshow_service import Slide, plan_slides, slide_spans
+
+
+def get_ffmpeg():
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+FFMPEG = get_ffmpeg()
+
+
+def phrase(start_ms, end_ms):
+    return TimestampItem(text="phrase", start_time_ms=start_ms, end_time_ms=end_ms)
+
+
+def test_slides_change_on_phrase_boundaries():
+    """Les phrases sont réparties en groupes contigus: chaque image commence avec une phrase"""
+    phrases = [phrase(i * 1000, i * 1000 + 900) for i in range(6)]
+
+    slides = plan_slides(["a.png", "b.png", "c.png"], phrases, 6.0, 24)
+
+    assert [(s.start_frame, s.end_frame) for s in slides] == [(0, 48), (48, 96), (96, 144)]
+
+
+def test_slides_split_duration_without_enough_phrases():
+    """Moins de phrases que d'images: durée partagée à parts égales"""
+    slides = plan_slides(["a.png", "b.png"], [phrase(0, 500)], 4.0, 10)
+
+    assert [(s.start_frame, s.end_frame) for s in slides] == [(0, 20), (20, 40)]
+
+
+def test_empty_slide_is_skipped_and_range_stays_contiguous():
+    """Deux images sur la même phrase: la première est ignorée, sans trou dans la chronologie"""
+    phrases = [phrase(0, 900), phrase(2000, 2500), phrase(2000, 2900), phrase(3000, 3500)]
+
+    slides = plan_slides(["a.png", "b.png", "c.png", "d.png"], phrases, 4.0, 10)
+
+    assert [s.path for s in slides] == ["a.png", "c.png", "d.png"]
+    assert slides[0].start_frame == 0 and slides[-1].end_frame == 40
+    assert all(a.end_frame == b.start_frame for a, b in zip(slides, slides[1:]))
+    assert all(s.end_frame > s.start_frame for s in slides)
+
+
+def test_crossfades_overlap_without_changing_total_frames():
+    """Les fondus chevauchent deux images; la somme des plages moins les fondus donne la durée"""
+    slides = [Slide(path="a", start_frame=0, end_frame=48), Slide(path="b", start_frame=48, end_frame=60)]
+
+    spans = slide_spans(slides, 24, crossfade=1.0)
+
+    # Fondu limité à la moitié de l'image la plus courte (6 images), centré sur l'image 48
+    assert spans == [(0, 51), (45, 15)]
+    assert spans[1][0] + spans[1][1] == 60
+
+
+@pytest.fixture
+def slideshow_env(tmp_path, monkeypatch):
+    """Petite résolution cible, deux images unies (rouge puis bleue) et 2s d'audio"""
+    monkeypatch.setenv("NORMAL_VIDEO_SIZE", "160x90")
+    monkeypatch.setenv("RENDER_FPS", "10")
+    images = []
+    for name, color in (("red.png", "red"), ("blue.png", "blue")):
+        path = str(tmp_path / name)
+        subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", f"color=c={color}:s=200x200",
+                        "-frames:v", "1", path], check=True)
+        images.append(path)
+    audio = str(tmp_path / "audio.mp3")
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", "sine=frequency=440:duration=2",
+                    audio], check=True)
+    return tmp_path, images, audio
+
+
+def read_frames(path):
+    import imageio_ffmpeg
+    reader = imageio_ffmpeg.read_frames(path)
+    meta = next(reader)
+    width, height = meta["size"]
+    return [(frame[0], frame[1], frame[2]) for frame in reader], width, height
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg non disponible")
+def test_slideshow_render_crossfades_images(slideshow_env):
+    """Le diaporama a la durée de l'audio, passe du rouge au bleu par un fondu"""
+    from services.render_service import RenderSpec, render_video
+
+    tmp_path, images, audio = slideshow_env
+    output = str(tmp_path / "out.mp4")
+    spec = RenderSpec(template_path="unused.mp4", audio_path=audio, output_path=output,
+                      images=images, video_type=VideoType.NORMAL, backend="stream")
+
+    render_video(spec)
+
+    frames, width, height = read_frames(output)
+    assert (width, height) == (160, 90)
+    assert len(frames) == 20
+    first, middle, last = frames[0], frames[10], frames[-1]
+    assert first[0] > 200 and first[2] < 60
+    assert last[2] > 200 and last[0] < 60
+    # Image 10: milieu du fondu entre les deux images
+    assert 60 < middle[0] < 200 and 60 < middle[2] < 200
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg non disponible")
+def test_missing_images_fall_back_to_template(slideshow_env):
+    """Sans image lisible, le rendu garde le template"""
+    from services.render_service import RenderSpec, _resolve_slides
+
+    tmp_path, _, audio = slideshow_env
+    spec = RenderSpec(template_path="template.mp4", audio_path=audio, output_path=str(tmp_path / "out.mp4"),
+                      images=[str(tmp_path / "missing.png")], video_type=VideoType.NORMAL)
+
+    resolved = _resolve_slides(spec, 2.0)
+
+    assert resolved.images == [] and resolved.slides == []
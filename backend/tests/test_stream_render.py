@@ -0,0 +1,303 @@
+import sys
+import os
+
+# Ajouter le répertoire backend au path pour les imports absolus
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import subprocess
+import time
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from models import TimestampItem
+from services.subtitle_service import CaptionTrack, SubtitleService
+
+
+def get_ffmpeg():
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+FFMPEG = get_ffmpeg()
+
+
+def fake_rasterize_caption(self, text, video_width, config=None, highlight=None):
+    """Légende factice: bloc blanc opaque de 10 px de haut sur la largeur utile"""
+    return np.full((10, video_width - 20, 4), 255, np.uint8)
+
+
+@pytest.fixture
+def fake_rasterizer():
+    with patch.object(SubtitleService, "rasterize_caption", fake_rasterize_caption):
+        yield
+
+
+def test_caption_track_materializes_only_active_captions(fake_rasterizer):
+    """
+    Teste qu'une légende n'est rastérisée qu'à son apparition, libérée à sa fin, et n'altère que sa boîte
+    """
+    phrases = [
+        TimestampItem(text="Première [calm]", start_time_ms=0, end_time_ms=1000),
+        TimestampItem(text="Seconde", start_time_ms=2000, end_time_ms=3000),
+        TimestampItem(text="[pause]", start_time_ms=3000, end_time_ms=4000),
+    ]
+    track = CaptionTrack(phrases, 80, 60, {"bottom_offset": 20})
+    frame = np.zeros((60, 80, 3), np.uint8)
+
+    assert track.materialized == 0
+    first = track.composite(frame, 0.5)
+    assert track.active_count() == 1 and track.materialized == 1
+    assert first[40:50, 10:70].min() == 255
+    assert first[:40].max() == 0 and first[50:].max() == 0
+
+    # Entre deux légendes: rien en mémoire, image inchangée (pas de copie)
+    assert track.composite(frame, 1.5) is frame
+    assert track.active_count() == 0
+
+    track.composite(frame, 2.5)
+    track.composite(frame, 3.5)
+    # Le marqueur seul est nettoyé: jamais rastérisé
+    assert track.materialized == 2
+
+
+def test_caption_overlay_finds_active_caption_by_bisection(fake_rasterizer):
+    """
+    Teste que la couche de légendes MoviePy trouve la légende active à tout instant (accès aléatoire)
+    et ne mélange que sa boîte
+    """
+    from moviepy.editor import ColorClip
+
+    phrases = [
+        TimestampItem(text="Seconde", start_time_ms=2000, end_time_ms=3000),
+        TimestampItem(text="Première", start_time_ms=0, end_time_ms=1000),
+        TimestampItem(text="[pause]", start_time_ms=3000, end_time_ms=4000),
+    ]
+    background = ColorClip((80, 60), color=(0, 0, 255), duration=4)
+    overlay = SubtitleService().apply_subtitles(background, phrases, {"bottom_offset": 20})
+
+    assert overlay.caption_count() == 2 and overlay.size == (80, 60) and overlay.duration == 4
+    assert [overlay.active_index(t) for t in (2.5, 0.5, 1.5, 3.5, 0)] == [1, 0, None, None, 0]
+
+    frame = overlay.get_frame(2.5)
+    assert frame[40:50, 10:70].min() == 255
+    assert frame[:40, :, 2].min() == 255 and frame[:40, :, :2].max() == 0
+    assert frame[40:50, :10].tolist() == background.get_frame(2.5)[40:50, :10].tolist()
+    assert overlay.get_frame(1.5).tolist() == background.get_frame(1.5).tolist()
+
+
+def test_caption_overlay_keeps_last_captions_only(fake_rasterizer):
+    """
+    Teste que seules les dernières légendes rastérisées restent en mémoire
+    """
+    from moviepy.editor import ColorClip
+
+    phrases = [TimestampItem(text=f"Phrase {i}", start_time_ms=i * 100, end_time_ms=(i + 1) * 100) for i in range(20)]
+    overlay = SubtitleService().apply_subtitles(ColorClip((80, 60), color=(0, 0, 0), duration=2), phrases)
+
+    for frame_index in range(48):
+        overlay.get_frame(frame_index / 24)
+
+    assert overlay.track.materialized == 20
+    assert len(overlay._materialized) <= overlay.MAX_MATERIALIZED
+
+
+def test_word_captions_redraw_only_on_word_boundaries():
+    """
+    Teste qu'en mode mot à mot une seule couche redessine la légende à chaque mot surligné, pas à chaque image
+    """
+    from moviepy.editor import ColorClip
+
+    rasterized = []
+
+    def record_rasterize_caption(self, text, video_width, config=None, highlight=None):
+        rasterized.append((text, highlight))
+        return np.full((10, video_width - 20, 4), 255, np.uint8)
+
+    words = [("Memento", 0, 400), ("[calm]", 400, 450), ("mori", 500, 1000)]
+    phrases = [
+        TimestampItem(text="Memento [calm] mori", start_time_ms=0, end_time_ms=1000, words=words),
+        TimestampItem(text="Sans mots", start_time_ms=1000, end_time_ms=2000),
+    ]
+    config = {"caption_mode": "words", "bottom_offset": 20}
+    with patch.object(SubtitleService, "rasterize_caption", record_rasterize_caption):
+        track = CaptionTrack(phrases, 80, 60, config)
+        frame = np.zeros((60, 80, 3), np.uint8)
+        for frame_index in range(48):
+            track.composite(frame, frame_index / 24)
+        assert rasterized == [("Memento mori", 0), ("Memento mori", 1), ("Sans mots", None)]
+
+        rasterized.clear()
+        overlay = SubtitleService().apply_subtitles(ColorClip((80, 60), color=(0, 0, 0), duration=2), phrases, config)
+        for frame_index in range(48):
+            overlay.get_frame(frame_index / 24)
+        assert rasterized == [("Memento mori", 0), ("Memento mori", 1), ("Sans mots", None)]
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg non disponible")
+def test_stream_backend_renders_exact_frames_with_captions(fake_rasterizer, tmp_path):
+    """
+    Teste que le rendu en flux produit toutes les images, l'audio, et incruste la légende active
+    """
+    import imageio_ffmpeg
+    from services.render_service import RenderSpec, render_video, probe_media
+
+    template_path = str(tmp_path / "template.mp4")
+    audio_path = str(tmp_path / "audio.mp3")
+    output_path = str(tmp_path / "output.mp4")
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", "color=c=blue:size=160x90:rate=24:duration=1",
+                    "-pix_fmt", "yuv420p", template_path], check=True)
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", "sine=frequency=440:duration=2.5",
+                    audio_path], check=True)
+
+    duration = render_video(RenderSpec(
+        template_path=template_path,
+        audio_path=audio_path,
+        output_path=output_path,
+        subtitles=[TimestampItem(text="Memento mori", start_time_ms=0, end_time_ms=1000)],
+        subtitle_config={"bottom_offset": 40},
+        preset="ultrafast",
+        backend="stream"
+    ))
+
+    assert duration == pytest.approx(2.5, abs=0.1)
+    assert probe_media(output_path)["duration"] == pytest.approx(2.5, abs=0.15)
+    assert "Audio:" in subprocess.run([FFMPEG, "-hide_banner", "-i", output_path], capture_output=True, text=True).stderr
+
+    reader = imageio_ffmpeg.read_frames(output_path)
+    width, height = next(reader)["size"]
+    frames = [np.frombuffer(frame, np.uint8).reshape(height, width, 3) for frame in reader]
+    assert len(frames) == round(duration * 24)
+    # Légende blanche pendant la première seconde seulement
+    assert frames[0][height - 35, width // 2].min() > 200
+    assert frames[-1][height - 35, width // 2].min() < 100
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg non disponible")
+def test_stream_render_failure_does_not_hang_after_decoder_exit(tmp_path, monkeypatch):
+    """
+    Teste qu'une erreur de composition sur les dernières images ne bloque pas le rendu
+    quand le décodeur a déjà fini et que le lecteur attend une place dans la file pleine
+    """
+    import threading
+    from services.render_service import RenderSpec, render_video
+
+    template_path = str(tmp_path / "template.mp4")
+    audio_path = str(tmp_path / "audio.mp3")
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", "color=c=blue:size=160x90:rate=24:duration=1",
+                    "-pix_fmt", "yuv420p", template_path], check=True)
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", "sine=frequency=440:duration=0.125",
+                    audio_path], check=True)
+    monkeypatch.setenv("RENDER_STREAM_BUFFER_FRAMES", "1")
+
+    def failing_composite(self, frame, t):
+        time.sleep(1)  # Le décodeur écrit ses dernières images et se termine
+        raise RuntimeError("composition impossible")
+
+    errors = []
+
+    def render():
+        try:
+            render_video(RenderSpec(template_path=template_path, audio_path=audio_path,
+                                    output_path=str(tmp_path / "output.mp4"), preset="ultrafast", backend="stream"))
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    with patch.object(CaptionTrack, "composite", failing_composite):
+        thread = threading.Thread(target=render, daemon=True)
+        thread.start()
+        thread.join(timeout=30)
+
+    assert not thread.is_alive()
+    assert errors == ["composition impossible"]
+
+
+@pytest.mark.asyncio
+async def test_memory_governor_queues_render_above_rss_ceiling(monkeypatch):
+    """
+    Teste qu'un rendu attend sous le plafond de RSS tant qu'un autre rendu occupe la mémoire
+    """
+    from services import render_service
+
+    monkeypatch.setenv("RENDER_RSS_CEILING_MB", "2000")
+    monkeypatch.setenv("RENDER_MEMORY_MB", "1000")
+    monkeypatch.setenv("RENDER_RSS_SETTLE_SECONDS", "0")
+    rss = {"mb": 1500}
+    monkeypatch.setattr(render_service, "get_process_tree_rss_mb", lambda: rss["mb"])
+    governor = render_service.RenderMemoryGovernor()
+    governor.poll_interval = 0.01
+    started = []
+
+    async def render(name, seconds):
+        async with governor.slot():
+            started.append(name)
+            await asyncio.sleep(seconds)
+            if name == "first":
+                rss["mb"] = 500  # Le premier rendu libère sa mémoire en se terminant
+
+    await asyncio.gather(render("first", 0.1), render("second", 0))
+
+    assert started == ["first", "second"]
+    assert governor.throttled == 1
+    assert governor.active == 0
+
+
+
+@pytest.mark.asyncio
+async def test_render_preparation_holds_a_governor_slot(monkeypatch):
+    """
+    Teste que la préparation du rendu (template canonique, piste de fond) est admise par le gouverneur
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from services import render_service
+
+    governor = render_service.RenderMemoryGovernor()
+    executor = ThreadPoolExecutor(max_workers=1)
+    active = {}
+
+    def plan_render(spec):
+        active["plan"] = governor.active
+        return render_service.RenderPlan(spec=spec, duration=1.0)
+
+    def render_video(spec):
+        active["render"] = governor.active
+        return 1.0
+
+    monkeypatch.setattr(render_service, "get_memory_governor", lambda: governor)
+    monkeypatch.setattr(render_service, "get_render_executor", lambda: executor)
+    monkeypatch.setattr(render_service, "plan_render", plan_render)
+    monkeypatch.setattr(render_service, "render_video", render_video)
+
+    spec = render_service.RenderSpec(template_path="t.mp4", audio_path="a.mp3", output_path="o.mp4")
+    assert await render_service.render_in_pool(spec) == 1.0
+    executor.shutdown()
+
+    assert active == {"plan": 1, "render": 1}
+    assert governor.active == 0
+
+
+def test_process_tree_rss_includes_children():
+    """
+    Teste que la RSS mesurée inclut les process enfants (pool de rendu, ffmpeg)
+    """
+    from services.pipeline_stages import get_process_tree_rss_mb
+
+    alone = get_process_tree_rss_mb()
+    if alone is None:
+        pytest.skip("/proc non disponible")
+    child = subprocess.Popen([sys.executable, "-c", "import time; data = bytearray(200 * 1024 * 1024); time.sleep(5)"])
+    try:
+        with_child = alone
+        for _ in range(100):
+            with_child = get_process_tree_rss_mb()
+            if with_child >= alone + 150:
+                break
+            time.sleep(0.05)
+        assert with_child >= alone + 150
+    finally:
+        child.kill()
+        child.wait()
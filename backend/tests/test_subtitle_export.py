@@ -0,0 +1,155 @@
+import sys
+import os
+
+# Ajouter le répertoire backend au path pour les imports absolus
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import MagicMock
+
+from models import TimestampItem
+from services.subtitle_service import SubtitleService
+
+
+PHRASES = [
+    TimestampItem(text="Seconde {phrase}", start_time_ms=2500, end_time_ms=3725),
+    TimestampItem(text="[pause]", start_time_ms=1500, end_time_ms=2000),
+    TimestampItem(text="Première [calm] phrase", start_time_ms=0, end_time_ms=1200),
+]
+
+
+def test_srt_is_clean_and_numbered_in_order():
+    """Le SRT contient le texte nettoyé, dans l'ordre, sans légende vide"""
+    srt = SubtitleService().build_srt(PHRASES)
+
+    assert srt == (
+        "1\n00:00:00,000 --> 00:00:01,200\nPremière phrase\n\n"
+        "2\n00:00:02,500 --> 00:00:03,725\nSeconde {phrase}\n"
+    )
+
+
+def test_subtitle_files_are_written_next_to_video(tmp_path):
+    """Les fichiers .srt et .ass prennent le nom de la vidéo et sont remplacés à chaque export"""
+    service = SubtitleService()
+    video_path = str(tmp_path / "video.mp4")
+
+    service.write_subtitle_files(PHRASES, video_path, 1080, 1920)
+    paths = service.write_subtitle_files(PHRASES, video_path, 1080, 1920)
+
+    assert paths == {"srt": str(tmp_path / "video.srt"), "ass": str(tmp_path / "video.ass")}
+    with open(paths["srt"], encoding="utf-8") as f:
+        assert f.read() == service.build_srt(PHRASES)
+    with open(paths["ass"], encoding="utf-8") as f:
+        ass = f.read()
+    assert "PlayResX: 1080" in ass and ass.count("Dialogue:") == 2
+    assert service.write_subtitle_files(PHRASES[1:2], video_path, 1080, 1920) == {}
+
+
+def test_transcription_overwrites_srt(tmp_path):
+    """Une nouvelle transcription remplace le .srt au lieu d'y ajouter les légendes en double"""
+    from services.assemblyai_service import AssemblyAIService
+
+    audio_path = str(tmp_path / "audio.mp3")
+    transcript = MagicMock(error=None)
+    transcript.export_subtitles_srt.return_value = "1\n00:00:00,000 --> 00:00:01,000\nMemento mori\n"
+    service = AssemblyAIService()
+    service.transcriber = MagicMock()
+    service.transcriber.transcribe.return_value = transcript
+
+    service._transcribe(audio_path)
+    _, srt_path = service._transcribe(audio_path)
+
+    with open(srt_path, encoding="utf-8") as f:
+        assert f.read() == transcript.export_subtitles_srt.return_value
+
+
+def test_captions_are_uploaded_as_youtube_track(tmp_path, monkeypatch):
+    """Le .srt est envoyé comme piste de sous-titres dans la langue configurée"""
+    from services.youtube_service import YouTubeService
+
+    monkeypatch.setenv("YOUTUBE_CAPTION_LANGUAGE", "fr")
+    srt_path = tmp_path / "video.srt"
+    srt_path.write_text(SubtitleService().build_srt(PHRASES), encoding="utf-8")
+    youtube = MagicMock()
+    youtube.captions.return_value.insert.return_value.execute.return_value = {"id": "caption-1"}
+
+    caption_id = YouTubeService().upload_captions(youtube, "yt-123", str(srt_path))
+
+    assert caption_id == "caption-1"
+    body = youtube.captions.return_value.insert.call_args.kwargs["body"]
+    assert body["snippet"]["videoId"] == "yt-123"
+    assert body["snippet"]["language"] == "fr"
+
+
+def test_ass_word_mode_highlights_current_word():
+    """Mode mot à mot: un événement ASS par mot, le mot courant en couleur de surlignage"""
+    phrase = TimestampItem(text="Memento mori", start_time_ms=0, end_time_ms=1500,
+                           words=[("Memento", 200, 700), ("mori", 800, 1400)])
+
+    ass = SubtitleService().build_ass([phrase], 1080, 1920, {"caption_mode": "words", "highlight_color": "yellow"})
+
+    dialogues = [line for line in ass.splitlines() if line.startswith("Dialogue:")]
+    assert dialogues == [
+        "Dialogue: 0,0:00:00.00,0:00:00.20,Default,,0,0,0,,Memento mori",
+        "Dialogue: 0,0:00:00.20,0:00:00.80,Default,,0,0,0,,{\\1c&H0000FFFF}Memento{\\1c&H00FFFFFF} mori",
+        "Dialogue: 0,0:00:00.80,0:00:01.50,Default,,0,0,0,,Memento {\\1c&H0000FFFF}mori{\\1c&H00FFFFFF}",
+    ]
+    # Mode phrase: les mots horodatés sont ignorés
+    assert SubtitleService().build_ass([phrase], 1080, 1920).count("Dialogue:") == 1
+
+
+def test_transcription_keeps_word_timestamps():
+    """Les mots de chaque phrase sont conservés en tableaux (texte, début, fin)"""
+    import asyncio
+    from services.assemblyai_service import AssemblyAIService
+
+    word = MagicMock(text="Memento", start=120, end=480)
+    utterance = MagicMock(text="Memento", start=120, end=480, confidence=0.9, words=[word])
+    service = AssemblyAIService()
+    service._transcribe = MagicMock(return_value=(MagicMock(utterances=[utterance]), "audio_fr.srt"))
+
+    document = asyncio.run(service.transcribe_and_get_timestamps("audio.mp3", "idea-1"))
+
+    assert document.timestamps[0].words == [("Memento", 120, 480)]
+    assert document.model_dump()["timestamps"][0]["words"] == [("Memento", 120, 480)]
+
+
+def test_ass_uses_rasterizer_line_breaks():
+    """Le fichier ASS coupe les lignes comme la légende rastérisée (libass ne recoupe pas)"""
+    from services.caption_raster_service import get_font
+
+    service = SubtitleService()
+    text = "Phrase numero 0 avec des mots"
+    config = {**service.default_config, "fontsize": 60}
+    box_width = 600 - config["margin"]
+    expected = service.rasterizer.wrap(text, get_font(config["font"], 60), box_width - 2 * config["stroke_width"])
+
+    ass = service.build_ass([TimestampItem(text=text, start_time_ms=0, end_time_ms=2000)], 600, 1000, {"fontsize": 60})
+
+    dialogue = next(line for line in ass.splitlines() if line.startswith("Dialogue:"))
+    assert len(expected) > 1
+    assert dialogue.split(",", 9)[9].split("\\N") == expected
+    assert "WrapStyle: 2" in ass
+
+
+def test_caption_modes_default_to_phrase(monkeypatch):
+    """Sans configuration, shorts et vidéos normales gardent les légendes par phrase"""
+    from models import VideoType
+
+    monkeypatch.delenv("SHORT_CAPTION_MODE", raising=False)
+    monkeypatch.delenv("NORMAL_CAPTION_MODE", raising=False)
+    service = SubtitleService()
+
+    assert service.get_caption_config(VideoType.SHORT) == {"caption_mode": "phrase"}
+    assert service.get_caption_config(VideoType.NORMAL) == {"caption_mode": "phrase"}
+
+
+def test_subtitle_load_failure_renders_without_subtitles():
+    """Une erreur de lecture des timestamps ne fait pas échouer le rendu: vidéo sans sous-titres"""
+    import asyncio
+    from unittest.mock import AsyncMock
+    from services.video_service import VideoService
+
+    service = VideoService()
+    service.subtitle_service.get_subtitle_phrases = AsyncMock(side_effect=ValueError("timestamps illisibles"))
+
+    assert asyncio.run(service._load_subtitles("idea-1")) == []
@@ -0,0 +1,101 @@
+import sys
+import os
+
+# Ajouter le répertoire backend au path pour les imports absolus
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import subprocess
+import pytest
+from unittest.mock import patch
+
+from models import VideoType
+
+
+def get_ffmpeg():
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+FFMPEG = get_ffmpeg()
+
+
+@pytest.fixture
+def template_env(tmp_path, monkeypatch):
+    """Répertoire de ressources temporaire avec un template 16:9 avec audio"""
+    monkeypatch.setenv("RESOURCES_DIR", str(tmp_path))
+    monkeypatch.setenv("SHORT_VIDEO_SIZE", "90x160")
+    monkeypatch.setenv("NORMAL_VIDEO_SIZE", "160x90")
+    monkeypatch.setenv("RENDER_FPS", "12")
+    template_dir = tmp_path / "video-template"
+    template_dir.mkdir()
+    source = str(template_dir / "template.mp4")
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error",
+                    "-f", "lavfi", "-i", "testsrc=size=320x180:rate=30:duration=1",
+                    "-f", "lavfi", "-i", "sine=frequency=440:duration=1",
+                    "-pix_fmt", "yuv420p", "-shortest", source], check=True)
+    return source
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg non disponible")
+def test_template_normalized_once_per_video_type(template_env):
+    """
+    Teste que le template est transcodé au format cible sans audio, puis servi depuis le cache
+    """
+    from services.template_cache_service import TemplateCacheService
+    from services.render_service import probe_media
+
+    service = TemplateCacheService()
+    short_path = service.ensure_canonical(template_env, VideoType.SHORT)
+
+    media = probe_media(short_path)
+    assert (media["width"], media["height"]) == (90, 160)
+    info = subprocess.run([FFMPEG, "-hide_banner", "-i", short_path], capture_output=True, text=True).stderr
+    assert "Audio:" not in info
+    assert "12 fps" in info
+
+    # Deuxième appel: aucun transcodage
+    with patch("services.template_cache_service.subprocess.run", side_effect=AssertionError("transcoded again")):
+        assert TemplateCacheService().ensure_canonical(template_env, VideoType.SHORT) == short_path
+
+    normal_path = service.ensure_canonical(template_env, VideoType.NORMAL)
+    assert normal_path != short_path
+    assert (probe_media(normal_path)["width"], probe_media(normal_path)["height"]) == (160, 90)
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg non disponible")
+def test_ffmpeg_render_stream_copies_canonical_template(template_env, tmp_path):
+    """
+    Teste qu'un rendu sans sous-titres boucle le template canonique en copie de flux
+    """
+    from services.render_service import RenderSpec, render_video, probe_media
+
+    audio_path = str(tmp_path / "audio.mp3")
+    output_path = str(tmp_path / "output.mp4")
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", "sine=frequency=440:duration=3.5",
+                    audio_path], check=True)
+
+    real_run = subprocess.run
+    commands = []
+
+    def record_run(command, *args, **kwargs):
+        commands.append(command)
+        return real_run(command, *args, **kwargs)
+
+    with patch("services.render_service.subprocess.run", side_effect=record_run):
+        duration = render_video(RenderSpec(
+            template_path=template_env,
+            audio_path=audio_path,
+            output_path=output_path,
+            backend="ffmpeg",
+            video_type=VideoType.SHORT
+        ))
+
+    assert duration == pytest.approx(3.5, abs=0.1)
+    render_command = commands[-1]
+    assert render_command[render_command.index("-c:v") + 1] == "copy"
+    media = probe_media(output_path)
+    assert (media["width"], media["height"]) == (90, 160)
+    assert media["duration"] == pytest.approx(3.5, abs=0.3)
@@ -0,0 +1,114 @@
+import sys
+import os
+
+# Ajouter le répertoire backend au path pour les imports absolus
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import subprocess
+import pytest
+from unittest.mock import patch
+
+from models import VideoType
+
+
+def get_ffmpeg():
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+FFMPEG = get_ffmpeg()
+
+
+def make_template(path, size, rate=30):
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-f", "lavfi", "-i", f"testsrc=size={size}:rate={rate}:duration=1",
+                    "-pix_fmt", "yuv420p", str(path)], check=True)
+    return str(path)
+
+
+@pytest.fixture
+def template_dir(tmp_path, monkeypatch):
+    """Répertoire de ressources temporaire avec un template 16:9 et un template 9:16"""
+    monkeypatch.setenv("RESOURCES_DIR", str(tmp_path))
+    monkeypatch.setenv("SHORT_VIDEO_SIZE", "90x160")
+    monkeypatch.setenv("NORMAL_VIDEO_SIZE", "160x90")
+    directory = tmp_path / "video-template"
+    directory.mkdir()
+    make_template(directory / "landscape.mp4", "320x180")
+    make_template(directory / "portrait.mp4", "180x320", rate=25)
+    return directory
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg non disponible")
+def test_index_probes_templates_and_persists_metadata(template_dir):
+    """Les métadonnées sondées sont écrites dans .cache/index.json"""
+    from services.template_index_service import TemplateIndexService
+
+    entries = TemplateIndexService().refresh(force=True)
+
+    assert entries["landscape.mp4"]["width"] == 320
+    assert entries["landscape.mp4"]["orientation"] == "landscape"
+    assert entries["portrait.mp4"]["fps"] == 25
+    assert entries["portrait.mp4"]["codec"] == "h264"
+    assert entries["portrait.mp4"]["orientation"] == "portrait"
+    assert entries["portrait.mp4"]["duration"] == pytest.approx(1.0, abs=0.1)
+
+    with open(template_dir / ".cache" / "index.json", encoding="utf-8") as f:
+        assert json.load(f)["templates"] == entries
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg non disponible")
+def test_selection_matches_video_type(template_dir):
+    """Un short tire un template 9:16, une vidéo normale un template 16:9"""
+    from services.template_index_service import TemplateIndexService
+
+    service = TemplateIndexService()
+    for _ in range(5):
+        assert service.select(VideoType.SHORT).endswith("portrait.mp4")
+        assert service.select(VideoType.NORMAL).endswith("landscape.mp4")
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg non disponible")
+def test_selection_falls_back_to_all_templates(template_dir):
+    """Sans template au bon format, tous les templates restent sélectionnables"""
+    from services.template_index_service import TemplateIndexService
+
+    os.remove(template_dir / "portrait.mp4")
+
+    assert TemplateIndexService().get_candidates(VideoType.SHORT) == [str(template_dir / "landscape.mp4")]
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg non disponible")
+def test_refresh_only_probes_changed_files(template_dir):
+    """Un index à jour n'est pas sondé à nouveau; un fichier remplacé ou ajouté l'est"""
+    from services import media_probe_service
+    from services.template_index_service import TemplateIndexService
+
+    TemplateIndexService().refresh(force=True)
+
+    with patch.object(media_probe_service, "probe_media", wraps=media_probe_service.probe_media) as probe:
+        TemplateIndexService().refresh(force=True)
+        assert probe.call_count == 0
+
+        make_template(template_dir / "landscape.mp4", "640x360")
+        make_template(template_dir / "second.mp4", "180x320")
+        entries = TemplateIndexService().refresh()
+
+    assert probe.call_count == 2
+    assert entries["landscape.mp4"]["width"] == 640
+    assert TemplateIndexService().get_candidates(VideoType.SHORT) == [
+        str(template_dir / "portrait.mp4"), str(template_dir / "second.mp4")
+    ]
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg non disponible")
+def test_ingestion_only_normalizes_matching_templates(template_dir):
+    """Chaque template n'est normalisé que pour les VideoType de son format"""
+    from services.template_cache_service import TemplateCacheService
+
+    canonical = TemplateCacheService().ingest_all()
+
+    assert sorted(os.path.basename(os.path.dirname(path)) for path in canonical) == ["normal", "short"]
@@ -0,0 +1,310 @@
+import sys
+import os
+
+# Ajouter le répertoire backend au path pour les imports absolus
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from models import IdeaStatus, VideoJob, JobStatus
+from services.queue_service import LeaseLostError
+from workers.video_worker import VideoWorker
+
+
+def make_worker(jobs, lane_limits):
+    """Créer un worker dont la queue renvoie les jobs fournis (filtrés par étape) puis None"""
+    worker = VideoWorker()
+    worker.poll_interval = 0.01
+    worker.lane_limits = lane_limits
+    worker.queue_service = MagicMock()
+    worker.queue_service.lease_seconds = 60
+    worker.queue_service.renew_lease = AsyncMock(return_value=True)
+    worker.queue_service.requeue_expired_leases = AsyncMock(return_value=0)
+    pending = list(jobs)
+
+    async def get_next_job(stages=None, worker_id=None):
+        for job in pending:
+            if stages is None or job.stage in stages:
+                pending.remove(job)
+                return job
+        return None
+
+    worker.queue_service.get_next_job = AsyncMock(side_effect=get_next_job)
+
+    async def wait_for_work(lane=None):
+        await asyncio.sleep(0.01)
+
+    worker.dispatcher = MagicMock()
+    worker.dispatcher.wait_for_work = AsyncMock(side_effect=wait_for_work)
+    worker.dispatcher.stop = AsyncMock()
+    return worker
+
+
+async def run_until_idle(worker, expected_jobs, timeout=2):
+    """Faire tourner la boucle jusqu'à ce que tous les jobs soient traités"""
+    loop_task = asyncio.create_task(worker.run())
+    deadline = asyncio.get_running_loop().time() + timeout
+    while len(worker.processed) < expected_jobs and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.01)
+    worker.running = False
+    await asyncio.wait_for(loop_task, timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_concurrently_up_to_lane_limit():
+    """
+    Teste que les jobs d'une lane s'exécutent en parallèle sans dépasser sa limite
+    """
+    jobs = [VideoJob(idea_id=f"idea_{i}", stage="script", status=JobStatus.PROCESSING) for i in range(5)]
+    worker = make_worker(jobs, {"llm": 3, "tts": 1, "render": 1})
+    worker.processed = []
+    in_flight = 0
+    peak = 0
+
+    async def fake_process_job(job):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        worker.processed.append(job.job_id)
+
+    worker.process_job = fake_process_job
+
+    await run_until_idle(worker, expected_jobs=len(jobs))
+
+    assert sorted(worker.processed) == sorted(job.job_id for job in jobs)
+    assert peak == 3
+    assert not worker.active_tasks
+
+
+@pytest.mark.asyncio
+async def test_render_lane_does_not_block_llm_lane():
+    """
+    Teste qu'un rendu long n'empêche pas les étapes LLM de s'exécuter
+    """
+    render_job = VideoJob(idea_id="idea_render", stage="video", status=JobStatus.PROCESSING)
+    llm_jobs = [VideoJob(idea_id=f"idea_llm_{i}", stage="script", status=JobStatus.PROCESSING) for i in range(3)]
+    worker = make_worker([render_job] + llm_jobs, {"llm": 1, "tts": 1, "render": 1})
+    worker.processed = []
+    render_release = asyncio.Event()
+
+    async def fake_process_job(job):
+        if job.stage == "video":
+            await render_release.wait()
+        worker.processed.append(job.job_id)
+        if len(worker.processed) == len(llm_jobs):
+            render_release.set()
+
+    worker.process_job = fake_process_job
+
+    await run_until_idle(worker, expected_jobs=4)
+
+    assert worker.processed[:3] == [job.job_id for job in llm_jobs]
+    assert worker.processed[3] == render_job.job_id
+
+
+@pytest.mark.asyncio
+async def test_failing_job_does_not_block_others():
+    """
+    Teste qu'une exception dans un job n'arrête pas la boucle et libère son slot
+    """
+    jobs = [VideoJob(idea_id=f"idea_{i}", stage="audio", status=JobStatus.PROCESSING) for i in range(3)]
+    worker = make_worker(jobs, {"llm": 1, "tts": 1, "render": 1})
+    worker.processed = []
+
+    async def fake_process_job(job):
+        worker.processed.append(job.job_id)
+        if job.idea_id == "idea_0":
+            raise RuntimeError("boom")
+
+    worker.process_job = fake_process_job
+
+    await run_until_idle(worker, expected_jobs=len(jobs))
+
+    assert worker.processed == [job.job_id for job in jobs]
+    assert not worker.active_tasks
+
+
+@pytest.mark.asyncio
+async def test_lost_lease_cancels_job_and_frees_slot():
+    """
+    Teste qu'un job dont le bail a été repris par un autre worker est arrêté et libère son slot
+    """
+    worker = make_worker([], {"llm": 1, "tts": 1, "render": 1})
+    worker.queue_service.lease_seconds = 0.03
+    worker.queue_service.renew_lease = AsyncMock(return_value=False)
+    job = VideoJob(idea_id="idea_lease", stage="video", status=JobStatus.PROCESSING)
+    finished = False
+
+    async def slow_process_job(job):
+        nonlocal finished
+        await asyncio.sleep(1)
+        finished = True
+
+    worker.process_job = slow_process_job
+    semaphore = asyncio.Semaphore(1)
+    await semaphore.acquire()
+
+    await asyncio.wait_for(worker._run_job(job, semaphore), timeout=0.5)
+
+    assert not finished
+    assert not semaphore.locked()
+    worker.queue_service.renew_lease.assert_called_with(job.job_id, worker.worker_id)
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_renews_lease_while_job_runs():
+    """
+    Teste que le heartbeat prolonge le bail pendant l'exécution du job
+    """
+    worker = make_worker([], {"llm": 1, "tts": 1, "render": 1})
+    worker.queue_service.lease_seconds = 0.03
+    job = VideoJob(idea_id="idea_heartbeat", stage="audio", status=JobStatus.PROCESSING)
+    finished = False
+
+    async def process_job(job):
+        nonlocal finished
+        await asyncio.sleep(0.1)
+        finished = True
+
+    worker.process_job = process_job
+    semaphore = asyncio.Semaphore(1)
+    await semaphore.acquire()
+
+    await worker._run_job(job, semaphore)
+
+    assert finished
+    assert worker.queue_service.renew_lease.await_count >= 2
+
+
+@pytest.mark.asyncio
+async def test_disabled_lane_is_not_claimed():
+    """
+    Teste qu'un nœud de rendu dédié ne réclame pas les étapes des lanes désactivées
+    """
+    jobs = [
+        VideoJob(idea_id="idea_script", stage="script", status=JobStatus.PROCESSING),
+        VideoJob(idea_id="idea_video", stage="video", status=JobStatus.PROCESSING),
+    ]
+    worker = make_worker(jobs, {"llm": 0, "tts": 0, "render": 2})
+    worker.processed = []
+
+    async def fake_process_job(job):
+        worker.processed.append(job.job_id)
+
+    worker.process_job = fake_process_job
+
+    await run_until_idle(worker, expected_jobs=1)
+    await asyncio.sleep(0.05)
+
+    assert worker.processed == [jobs[1].job_id]
+    for call in worker.queue_service.get_next_job.await_args_list:
+        assert call.kwargs["stages"] == ["video"]
+
+
+@pytest.mark.asyncio
+async def test_stage_outcome_reported_to_registry():
+    """
+    Teste que chaque étape est comptée en cours puis terminée (ou échouée) dans le registre
+    """
+    worker = make_worker([], {"llm": 1, "tts": 1, "render": 1})
+    worker.db = MagicMock()
+    worker.db.ideas.find_one = AsyncMock(return_value={"id": "idea_registry", "status": "queued"})
+    worker.db.ideas.update_one = AsyncMock()
+    worker.queue_service.advance_job = AsyncMock()
+    worker.queue_service.fail_job = AsyncMock()
+    worker.registry = MagicMock()
+    worker.registry.stage_started = AsyncMock()
+    worker.registry.stage_finished = AsyncMock()
+    worker.run_script_stage = AsyncMock()
+    job = VideoJob(idea_id="idea_registry", stage="script", end_stage="video", status=JobStatus.PROCESSING)
+
+    await worker.process_job(job)
+
+    worker.registry.stage_started.assert_awaited_once_with(worker.worker_id, "script")
+    args = worker.registry.stage_finished.await_args.args
+    assert args[0] == worker.worker_id and args[1] == "script" and args[3] is True
+
+    worker.run_script_stage = AsyncMock(side_effect=RuntimeError("LLM down"))
+    await worker.process_job(job)
+
+    assert worker.registry.stage_finished.await_args.args[3] is False
+    worker.queue_service.fail_job.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_lost_lease_does_not_publish_stage():
+    """
+    Teste qu'un job dont le bail a été perdu pendant l'étape n'est ni checkpointé, ni avancé, ni échoué
+    """
+    worker = make_worker([], {"llm": 1, "tts": 1, "render": 1})
+    worker.db = MagicMock()
+    worker.db.ideas.find_one = AsyncMock(return_value={"id": "idea_lease", "status": IdeaStatus.AUDIO_GENERATED.value})
+    worker.db.ideas.update_one = AsyncMock()
+    worker.queue_service.renew_lease = AsyncMock(return_value=False)
+    worker.queue_service.advance_job = AsyncMock()
+    worker.queue_service.complete_job = AsyncMock()
+    worker.queue_service.fail_job = AsyncMock()
+    worker.checkpoint_service = MagicMock()
+    worker.checkpoint_service.verify = AsyncMock(return_value=False)
+    worker.checkpoint_service.save = AsyncMock()
+    worker.run_script_stage = AsyncMock()
+    job = VideoJob(idea_id="idea_lease", stage="script", end_stage="video", start_from="script",
+                   is_regeneration=True, status=JobStatus.PROCESSING)
+
+    await worker.process_job(job)
+
+    worker.run_script_stage.assert_awaited_once()
+    worker.checkpoint_service.save.assert_not_called()
+    worker.queue_service.advance_job.assert_not_called()
+    worker.queue_service.fail_job.assert_not_called()
+
+    # Rendu terminé après la perte du bail: la vidéo n'est pas publiée et le job n'est pas mis en erreur
+    async def run_video_stage(idea_id, still_owner=None):
+        assert still_owner is not None and not await still_owner()
+        raise LeaseLostError("Lease lost while rendering")
+
+    worker.run_video_stage = run_video_stage
+    job = VideoJob(idea_id="idea_lease", stage="video", end_stage="video", start_from="video",
+                   is_regeneration=True, status=JobStatus.PROCESSING)
+
+    await worker.process_job(job)
+
+    worker.queue_service.complete_job.assert_not_called()
+    worker.queue_service.fail_job.assert_not_called()
+    worker.db.ideas.update_one.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_template_ingestion(monkeypatch, capsys):
+    """
+    Teste que la normalisation des templates est suivie, annulée par stop() et journalisée en cas d'échec
+    """
+    import workers.video_worker as video_worker
+    from concurrent.futures import ThreadPoolExecutor
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(video_worker, "get_render_executor", lambda: executor)
+    monkeypatch.setattr(video_worker, "shutdown_render_executor", MagicMock())
+    monkeypatch.setattr(video_worker, "ingest_templates", MagicMock(side_effect=RuntimeError("disk full")))
+    worker = make_worker([], {"llm": 1, "tts": 1, "render": 1})
+
+    await worker._ingest_templates()
+    assert "Template ingestion failed: disk full" in capsys.readouterr().out
+
+    started = asyncio.Event()
+
+    async def ingest():
+        started.set()
+        await asyncio.sleep(60)
+
+    worker.ingest_task = asyncio.create_task(ingest())
+    await started.wait()
+    await asyncio.wait_for(worker.stop(), timeout=1)
+
+    assert worker.ingest_task.cancelled()
+    video_worker.shutdown_render_executor.assert_called_once()
+    executor.shutdown()
@@ -5,6 +5,9 @@ S'exécute en continu et traite les jobs de la queue
 import asyncio
 import sys
 import os
+import socket
+import time
+import uuid
 
 
 # Ajouter le répertoire parent au path
@@ -20,11 +23,25 @@ load_dotenv()
 
 # Import après load_dotenv
 from models import IdeaStatus, JobStatus # Ajout de JobStatus
-from services.queue_service import QueueService
+from services.queue_service import LeaseLostError, QueueService
+from services.job_dispatcher import JobDispatcher
+from services.worker_registry_service import WorkerRegistryService
+from services.checkpoint_service import CheckpointService
+from services.pipeline_stages import (
+    LANES, PIPELINE_STAGES, PIPELINE_START_STAGES, get_lane_limits, lane_stages, next_stage, resolve_stages
+)
 from agents.script_adapter_agent import ScriptAdapterAgent
 from services.audio_service import AudioService
 from services.video_service import VideoService
 from services.script_service import ScriptService # Import du ScriptService
+from services.render_service import get_memory_governor, get_render_executor, ingest_templates, shutdown_render_executor
+
+# Statut de l'idée une fois l'étape terminée (l'adaptation n'a pas de statut propre)
+STAGE_DONE_STATUS = {
+    "script": IdeaStatus.SCRIPT_GENERATED,
+    "audio": IdeaStatus.AUDIO_GENERATED,
+    "video": IdeaStatus.VIDEO_GENERATED,
+}
 
 class VideoWorker:
     """Worker qui traite les jobs de génération vidéo"""
@@ -34,8 +51,16 @@ class VideoWorker:
         self.db = None
         self.db_client = None
         self.running = False
-        self.poll_interval = 5  # Vérifier la queue toutes les 5 secondes
+        self.poll_interval = 5  # Pause après une erreur de la boucle principale
+        self.dispatcher = None  # Réveille la boucle à l'arrivée d'un job (change stream / backoff)
         self.script_service = None # Ajout de script_service
+        self.lane_limits = get_lane_limits()  # Concurrence max par lane (llm, tts, render)
+        self.lane_semaphores = {}
+        self.active_tasks = set()  # Tâches asyncio des jobs en cours
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.registry = None  # Registre de la flotte (capacité et débit de ce nœud)
+        self.checkpoint_service = None  # Checkpoints des étapes déjà réalisées
+        self.ingest_task = None  # Normalisation des templates lancée au démarrage (annulée par stop)
     
     async def connect_to_mongo(self):
         """Connexion à MongoDB"""
@@ -82,174 +107,324 @@ class VideoWorker:
         }
         
         current_status = IdeaStatus(idea.get("status"))
-        next_step = status_to_step.get(current_status)
-        
-        if next_step:
-            print(f"📍 Reprise à partir du statut '{current_status.value}' → Démarrage à '{next_step}'")
-        return next_step
+        return status_to_step.get(current_status)
+    
+    async def _get_script(self, idea_id: str) -> dict:
+        """Récupérer le script d'une idée"""
+        script = await self.db.scripts.find_one({"idea_id": idea_id}, {"_id": 0})
+        if not script:
+            raise Exception(f"Script for idea {idea_id} not found")
+        return script
+    
+    async def run_script_stage(self, idea_id: str):
+        """Étape script (lane LLM): générer le script"""
+        print(f"📝 Generating script for idea {idea_id}")
+        await self.update_idea_status(idea_id, IdeaStatus.SCRIPT_GENERATING)
+        await self.script_service.generate_script(idea_id)
+        await self.update_idea_status(idea_id, IdeaStatus.SCRIPT_GENERATED)
+    
+    async def run_adapt_stage(self, idea_id: str):
+        """Étape adapt (lane LLM): adapter le script pour ElevenLabs"""
+        script = await self._get_script(idea_id)
+        print(f"🎭 Adapting script for idea {idea_id}")
+        await self.update_idea_status(idea_id, IdeaStatus.AUDIO_GENERATING)
+        adapter = ScriptAdapterAgent()
+        adapted_script, phrases = await adapter.adapt_script(script["original_script"])
+        await self.db.scripts.update_one(
+            {"id": script["id"]},
+            {"$set": {
+                "elevenlabs_adapted_script": adapted_script,
+                "phrases": phrases
+            }}
+        )
+    
+    async def run_audio_stage(self, idea_id: str):
+        """Étape audio (lane TTS): générer l'audio, le concaténer et obtenir les timestamps"""
+        script = await self._get_script(idea_id)
+        print(f"🔊 Generating audio for idea {idea_id}")
+        await self.update_idea_status(idea_id, IdeaStatus.AUDIO_GENERATING)
+        audio_service = AudioService()
+        await audio_service.complete_audio_generation_with_timestamps(script["id"])
+        await self.update_idea_status(idea_id, IdeaStatus.AUDIO_GENERATED)
+    
+    async def run_video_stage(self, idea_id: str, still_owner=None):
+        """Étape video (lane render): assembler la vidéo finale (publiée seulement si `still_owner()` le confirme)"""
+        script = await self._get_script(idea_id)
+        print(f"🎥 Generating video for idea {idea_id}")
+        await self.update_idea_status(idea_id, IdeaStatus.VIDEO_GENERATING)
+        video_service = VideoService()
+        await video_service.generate_video(script_id=script["id"], still_owner=still_owner)
+        await self.update_idea_status(idea_id, IdeaStatus.VIDEO_GENERATED)
     
     async def process_job(self, job):
-        """Traiter un job de génération vidéo"""
+        """
+        Traiter l'étape courante d'un job de génération vidéo
+        
+        Une fois l'étape terminée, le job est remis en queue pour l'étape suivante
+        (traitée par la lane correspondante) ou marqué comme complété.
+        """
         idea_id = job.idea_id
-        start_from = job.start_from
         is_regeneration = job.is_regeneration # Récupérer le flag de régénération
-        
-        print(f"🎬 Starting job {job.job_id} for idea {idea_id} (start_from: {start_from}, regeneration: {is_regeneration})")
+        first_stage, last_stage = resolve_stages(job.start_from, is_regeneration)
+        stage = job.stage or first_stage
+        end_stage = job.end_stage or last_stage
+        stage_started_at = None
+        succeeded = False
         
         try:
-            ideas_collection = self.db.ideas
-            scripts_collection = self.db.scripts
-            
             # Récupérer l'idée
-            idea = await ideas_collection.find_one({"id": idea_id}, {"_id": 0})
+            idea = await self.db.ideas.find_one({"id": idea_id}, {"_id": 0})
             if not idea:
                 raise Exception(f"Idea {idea_id} not found")
             
-            # --- Logique pour la régénération d'une seule étape ---
-            if is_regeneration:
-                print(f"🔄 Executing single-step regeneration for idea {idea_id}, step: {start_from}")
-                
-                if start_from == "script":
-                    await self.update_idea_status(idea_id, IdeaStatus.SCRIPT_GENERATING)
-                    await self.script_service.generate_script(idea_id)
-                    await self.update_idea_status(idea_id, IdeaStatus.SCRIPT_GENERATED) # Mettre à jour le statut après
-                
-                elif start_from == "audio":
-                    script = await scripts_collection.find_one({"idea_id": idea_id}, {"_id": 0})
-                    if not script:
-                        raise Exception(f"Script for idea {idea_id} not found, cannot regenerate audio.")
-                    script_id = script["id"]
-                    
-                    await self.update_idea_status(idea_id, IdeaStatus.AUDIO_GENERATING)
-                    adapter = ScriptAdapterAgent()
-                    adapted_script, phrases = await adapter.adapt_script(script["original_script"])
-                    await scripts_collection.update_one(
-                        {"id": script_id},
-                        {"$set": {
-                            "elevenlabs_adapted_script": adapted_script,
-                            "phrases": phrases
-                        }}
-                    )
-                    audio_service = AudioService()
-                    await audio_service.complete_audio_generation_with_timestamps(script_id)
-                    await self.update_idea_status(idea_id, IdeaStatus.AUDIO_GENERATED)
-
-                elif start_from == "video":
-                    script = await scripts_collection.find_one({"idea_id": idea_id}, {"_id": 0})
-                    if not script:
-                        raise Exception(f"Script for idea {idea_id} not found, cannot regenerate video.")
-                    script_id = script["id"]
-                    
-                    await self.update_idea_status(idea_id, IdeaStatus.VIDEO_GENERATING)
-                    video_service = VideoService()
-                    await video_service.generate_video(script_id=script_id)
-                    await self.update_idea_status(idea_id, IdeaStatus.VIDEO_GENERATED)
-                
-                else:
-                    raise Exception(f"Unsupported regeneration step: {start_from}")
-                
-                await self.queue_service.complete_job(job.job_id)
-                print(f"✅ Single-step regeneration job {job.job_id} for idea {idea_id} ({start_from}) completed successfully")
-                return # Finir le traitement ici pour la régénération d'une seule étape
-            # --- Fin de la logique de régénération d'une seule étape ---
-
-
-            # --- Logique du pipeline complet avec reprise intelligente ---
-            start_step = self.determine_start_step(idea)
+            if not is_regeneration and stage == first_stage:
+                # Job pas encore avancé: reprendre là où en est l'idée (elle a pu avancer depuis
+                # la mise en queue, et les jobs antérieurs aux étapes commencent tous à "script")
+                if idea.get("status") == IdeaStatus.VIDEO_GENERATED:
+                    print(f"✅ Idea {idea_id} already completed.")
+                    await self.queue_service.complete_job(job.job_id)
+                    return
+                # Statut sans étape associée (erreur d'un essai précédent): garder l'étape du job
+                start_step = self.determine_start_step(idea)
+                resume_stage = max(stage, PIPELINE_START_STAGES.get(start_step, stage), key=PIPELINE_STAGES.index)
+                if resume_stage != stage:
+                    print(f"📍 Reprise à partir du statut '{idea.get('status')}' → étape '{resume_stage}'")
+                    stage = resume_stage
             
-            if not start_step:
-                print(f"✅ Idea {idea_id} already completed.")
-                await self.queue_service.complete_job(job.job_id)
-                return
-
-            script_id = None
+            print(f"🎬 Starting job {job.job_id} for idea {idea_id} (stage: {stage}/{end_stage}, regeneration: {is_regeneration})")
+            await self._report_stage_started(stage)
+            stage_started_at = time.monotonic()
             
-            # Étape 1: Générer le script
-            if start_step == "script":
-                print(f"📝 Generating script for idea {idea_id}")
-                await self.update_idea_status(idea_id, IdeaStatus.SCRIPT_GENERATING)
-                await self.script_service.generate_script(idea_id)
-                # Le statut est mis à jour dans script_service
+            stage_runners = {
+                "script": self.run_script_stage,
+                "adapt": self.run_adapt_stage,
+                "audio": self.run_audio_stage,
+                # Le rendu ne publie la vidéo que si le job détient encore son bail
+                "video": lambda idea_id: self.run_video_stage(idea_id, still_owner=lambda: self._owns_lease(job)),
+            }
+            if stage not in stage_runners:
+                raise Exception(f"Unsupported stage: {stage}")
             
-            # Récupérer le script_id pour les étapes suivantes
-            script = await scripts_collection.find_one({"idea_id": idea_id}, {"_id": 0})
-            if not script:
-                raise Exception(f"Script for idea {idea_id} not found after generation step")
-            script_id = script["id"]
-
-            # Étape 2: Adapter le script et Générer l'audio
-            if start_step in ["script", "audio"]: # start_step sera "audio" si le script est déjà généré
-                print(f"🔊 Generating audio for idea {idea_id}")
-                await self.update_idea_status(idea_id, IdeaStatus.AUDIO_GENERATING)
-                
-                # Adapter le script
-                adapter = ScriptAdapterAgent()
-                adapted_script, phrases = await adapter.adapt_script(script["original_script"])
-                await scripts_collection.update_one(
-                    {"id": script_id},
-                    {"$set": {
-                        "elevenlabs_adapted_script": adapted_script,
-                        "phrases": phrases
-                    }}
-                )
-                
-                # Générer l'audio avec concaténation et timestamps
-                audio_service = AudioService()
-                audio_generation = await audio_service.complete_audio_generation_with_timestamps(script_id)
-                await self.update_idea_status(idea_id, IdeaStatus.AUDIO_GENERATED)
-
-            # Étape 3: Générer la vidéo
-            if start_step in ["script", "audio", "video"]: # start_step sera "video" si l'audio est déjà généré
-                print(f"🎥 Generating video for idea {idea_id}")
-                await self.update_idea_status(idea_id, IdeaStatus.VIDEO_GENERATING)
-                video_service = VideoService()
-                await video_service.generate_video(script_id=script_id)
-                await self.update_idea_status(idea_id, IdeaStatus.VIDEO_GENERATED)
+            checkpointed = await self._stage_checkpointed(idea_id, stage)
+            if checkpointed:
+                # Sorties déjà produites et vérifiées (retry, job repris): ne pas repayer l'étape
+                print(f"⏭️ Job {job.job_id}: stage '{stage}' already checkpointed, skipping")
+                if stage in STAGE_DONE_STATUS:
+                    await self.update_idea_status(idea_id, STAGE_DONE_STATUS[stage])
+            else:
+                await stage_runners[stage](idea_id)
+            if not await self._owns_lease(job):
+                # Job repris par un autre worker pendant l'étape: il lui revient de la valider
+                print(f"⚠️ Lease lost for job {job.job_id} during stage '{stage}', leaving it to its new owner")
+                return
+            if not checkpointed:
+                await self._save_checkpoint(job, stage, time.monotonic() - stage_started_at)
+            succeeded = True
             
-            # Job complété avec succès
-            await self.queue_service.complete_job(job.job_id)
-            print(f"✅ Job {job.job_id} completed successfully")
+            following_stage = next_stage(stage, end_stage)
+            if following_stage:
+                await self.queue_service.advance_job(job.job_id, following_stage)
+                print(f"✅ Job {job.job_id}: stage '{stage}' done, next: '{following_stage}'")
+            else:
+                # Job complété avec succès
+                await self.queue_service.complete_job(job.job_id)
+                print(f"✅ Job {job.job_id} completed successfully")
             
+        except LeaseLostError as e:
+            # Job repris par un autre worker: ni erreur ni échec, le nouveau propriétaire le termine
+            print(f"⚠️ Job {job.job_id}: {e}, leaving it to its new owner")
+        
         except Exception as e:
             error_msg = f"{str(e)}\\n{traceback.format_exc()}"
-            print(f"❌ Job {job.job_id} failed: {error_msg}")
+            print(f"❌ Job {job.job_id} failed at stage '{stage}': {error_msg}")
             
             # Mettre à jour l'idée avec l'erreur
             await self.update_idea_status(idea_id, IdeaStatus.ERROR, error_msg[:1000])
             
             # Marquer le job comme échoué
             await self.queue_service.fail_job(job.job_id, error_msg[:500])
-    
-    async def run(self):
-        """Boucle principale du worker"""
-        print("🚀 Video Worker started")
-        print(f"📊 Max concurrent jobs: {self.queue_service.max_concurrent}")
         
-        self.running = True
+        finally:
+            if stage_started_at is not None:
+                await self._report_stage_finished(stage, time.monotonic() - stage_started_at, succeeded)
+    
+    async def _stage_checkpointed(self, idea_id: str, stage: str) -> bool:
+        """Vérifier si l'étape a déjà un checkpoint valide"""
+        if not self.checkpoint_service:
+            return False
+        try:
+            return await self.checkpoint_service.verify(idea_id, stage)
+        except Exception as e:
+            print(f"⚠️ Checkpoint verification failed, running stage '{stage}': {e}")
+            return False
+    
+    async def _save_checkpoint(self, job, stage: str, duration_seconds: float):
+        """Enregistrer le checkpoint d'une étape réussie (un échec n'invalide pas l'étape)"""
+        if not self.checkpoint_service:
+            return
+        try:
+            await self.checkpoint_service.save(job.idea_id, stage, job_id=job.job_id, duration_seconds=duration_seconds)
+        except Exception as e:
+            print(f"⚠️ Could not checkpoint stage '{stage}' for idea {job.idea_id}: {e}")
+    
+    async def _report_stage_started(self, stage: str):
+        """Compter l'étape comme en cours dans le registre de la flotte"""
+        if not self.registry:
+            return
+        try:
+            await self.registry.stage_started(self.worker_id, stage)
+        except Exception as e:
+            print(f"⚠️ Worker registry update failed: {e}")
+    
+    async def _report_stage_finished(self, stage: str, duration_seconds: float, succeeded: bool):
+        """Publier la fin d'une étape (slot libéré, compteurs de débit)"""
+        if not self.registry:
+            return
+        try:
+            await self.registry.stage_finished(self.worker_id, stage, duration_seconds, succeeded)
+        except Exception as e:
+            print(f"⚠️ Worker registry update failed: {e}")
+    
+    async def _owns_lease(self, job) -> bool:
+        """Vérifier (en le prolongeant) que le bail du job appartient toujours à ce worker"""
+        try:
+            return await self.queue_service.renew_lease(job.job_id, self.worker_id)
+        except Exception as e:
+            # Base injoignable: ne pas jeter le travail fait, le heartbeat tranchera
+            print(f"⚠️ Lease check failed for job {job.job_id}: {e}")
+            return True
+    
+    async def _heartbeat(self, job, job_task: asyncio.Task):
+        """Prolonger le bail du job tant qu'il tourne; l'annuler si le bail a été perdu"""
+        interval = self.queue_service.lease_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                renewed = await self.queue_service.renew_lease(job.job_id, self.worker_id)
+            except Exception as e:
+                print(f"⚠️ Heartbeat failed for job {job.job_id}: {e}")
+                continue
+            if not renewed:
+                print(f"⚠️ Lease lost for job {job.job_id}, stopping it (it has been reclaimed)")
+                job_task.cancel()
+                return
+
+    async def _run_job(self, job, semaphore: asyncio.Semaphore):
+        """
+        Exécuter un job dans sa propre tâche, sous bail entretenu par un heartbeat.
+        Une erreur inattendue n'affecte ni la boucle de sa lane ni les autres jobs.
+        """
+        job_task = asyncio.create_task(self.process_job(job))
+        heartbeat_task = asyncio.create_task(self._heartbeat(job, job_task))
+        try:
+            await job_task
+        except asyncio.CancelledError:
+            if not heartbeat_task.done():
+                raise
+            # Annulé par le heartbeat: le job a été repris par un autre worker
+        except Exception as e:
+            print(f"❌ Unhandled error in job {job.job_id}: {e}")
+            traceback.print_exc()
+        finally:
+            heartbeat_task.cancel()
+            semaphore.release()
+
+    async def _reap_expired_leases(self):
+        """Remettre régulièrement en queue les jobs dont le worker est mort"""
+        interval = self.queue_service.lease_seconds / 2
+        while self.running:
+            try:
+                reclaimed = await self.queue_service.requeue_expired_leases()
+                if reclaimed:
+                    print(f"♻️ Reclaimed {reclaimed} job(s) with expired leases")
+            except Exception as e:
+                print(f"❌ Lease reaper error: {e}")
+            await asyncio.sleep(interval)
+
+    async def _registry_heartbeat(self):
+        """Signaler régulièrement au registre que ce nœud est vivant"""
+        while self.running:
+            await asyncio.sleep(self.registry.heartbeat_seconds)
+            try:
+                await self.registry.heartbeat(self.worker_id)
+            except Exception as e:
+                print(f"⚠️ Worker registry heartbeat failed: {e}")
+
+    async def _ingest_templates(self):
+        """Normaliser les templates en arrière-plan pour que les rendus trouvent le cache prêt"""
+        try:
+            loop = asyncio.get_running_loop()
+            # Transcodage: admis sous le plafond de RSS comme un rendu
+            async with get_memory_governor().slot():
+                await loop.run_in_executor(get_render_executor(), ingest_templates)
+        except asyncio.CancelledError:
+            print("🛑 Template ingestion cancelled")
+            raise
+        except Exception as e:
+            print(f"⚠️ Template ingestion failed: {e}")
+            traceback.print_exc()
+
+    def _spawn_job(self, job, semaphore: asyncio.Semaphore) -> asyncio.Task:
+        """Lancer un job en tâche de fond et le suivre jusqu'à sa fin"""
+        task = asyncio.create_task(self._run_job(job, semaphore), name=f"video-job-{job.job_id}-{job.stage}")
+        self.active_tasks.add(task)
+        task.add_done_callback(self.active_tasks.discard)
+        return task
+
+    async def _run_lane(self, lane: str):
+        """Boucle d'une lane: réclamer les jobs de ses étapes tant qu'un slot est libre"""
+        semaphore = self.lane_semaphores[lane]
+        stages = lane_stages(lane)
         
         while self.running:
+            # Attendre qu'un slot de la lane se libère avant de réclamer un job
+            await semaphore.acquire()
+            if not self.running:
+                semaphore.release()
+                break
             try:
-                # Vérifier si on peut traiter plus de jobs
-                if await self.queue_service.can_process_more():
-                    # Récupérer le prochain job
-                    job = await self.queue_service.get_next_job()
-                    
-                    if job:
-                        print(f"📥 Processing job: {job.job_id}")
-                        await self.process_job(job)
-                    else:
-                        # Pas de job disponible, attendre
-                        await asyncio.sleep(self.poll_interval)
-                else:
-                    # Limite atteinte, attendre
-                    stats = await self.queue_service.get_queue_stats()
-                    print(f"⏳ Max concurrent jobs reached ({stats['processing']}/{stats['max_concurrent']}). Waiting...")
-                    await asyncio.sleep(self.poll_interval)
-                    
+                # Récupérer le prochain job pour les étapes de cette lane
+                job = await self.queue_service.get_next_job(stages=stages, worker_id=self.worker_id)
             except Exception as e:
-                print(f"❌ Worker error: {e}")
+                semaphore.release()
+                print(f"❌ Worker error ({lane} lane): {e}")
                 traceback.print_exc()
                 await asyncio.sleep(self.poll_interval)
+                continue
+            
+            if job:
+                self.dispatcher.reset_backoff(lane)
+                print(f"📥 [{lane}] Processing job: {job.job_id} stage '{job.stage}' (waited {job.queue_latency_ms}ms in queue)")
+                # Le slot est libéré par _run_job à la fin de l'étape
+                self._spawn_job(job, semaphore)
+            else:
+                # Pas de job disponible, attendre un insert dans la queue
+                semaphore.release()
+                await self.dispatcher.wait_for_work(lane)
+
+    async def run(self):
+        """Boucle principale du worker: une boucle de claim par lane"""
+        print(f"🚀 Video Worker started ({self.worker_id})")
+        # Une lane sans slot (désactivée par WORKER_LANES) n'est pas réclamée par ce nœud
+        lanes = [lane for lane in LANES if self.lane_limits.get(lane, 0) > 0]
+        for lane in LANES:
+            if lane in lanes:
+                print(f"📊 Lane '{lane}' ({', '.join(lane_stages(lane))}): max {self.lane_limits[lane]} concurrent job(s)")
+            else:
+                print(f"⏸️ Lane '{lane}' disabled on this node")
+        
+        self.running = True
+        self.lane_semaphores = {lane: asyncio.Semaphore(self.lane_limits[lane]) for lane in lanes}
+        self.dispatcher.start()
+        background_tasks = [asyncio.create_task(self._reap_expired_leases())]
+        if self.registry:
+            background_tasks.append(asyncio.create_task(self._registry_heartbeat()))
+        
+        await asyncio.gather(*(self._run_lane(lane) for lane in lanes))
+        
+        for task in background_tasks:
+            task.cancel()
+        await self.dispatcher.stop()
     
     async def start(self):
         from services.script_service import ScriptService
@@ -265,6 +440,14 @@ class VideoWorker:
         
         self.queue_service = QueueService()
         self.script_service = ScriptService() # Initialiser ScriptService
+        self.dispatcher = JobDispatcher(self.queue_service.queue_collection)
+        await self.queue_service.ensure_indexes()
+        self.registry = WorkerRegistryService()
+        self.checkpoint_service = CheckpointService()
+        await self.registry.register(self.worker_id, self.lane_limits)
+        await self.queue_service.backfill_job_stages()
+        if self.lane_limits.get("render", 0) > 0:
+            self.ingest_task = asyncio.create_task(self._ingest_templates(), name="template-ingestion")
         
         await self.run()
     
@@ -272,6 +455,22 @@ class VideoWorker:
         """Arrêter le worker"""
         print("🛑 Stopping worker...")
         self.running = False
+        if self.dispatcher:
+            self.dispatcher.notify()
+        if self.active_tasks:
+            print(f"⏳ Cancelling {len(self.active_tasks)} in-flight job(s)...")
+            for task in list(self.active_tasks):
+                task.cancel()
+            await asyncio.gather(*self.active_tasks, return_exceptions=True)
+        if self.ingest_task and not self.ingest_task.done():
+            self.ingest_task.cancel()
+            await asyncio.gather(self.ingest_task, return_exceptions=True)
+        shutdown_render_executor()
+        if self.registry:
+            try:
+                await self.registry.unregister(self.worker_id)
+            except Exception as e:
+                print(f"⚠️ Worker registry update failed: {e}")
         if self.db_client:
             self.db_client.close()
 
@@ -49,6 +49,7 @@ export const videosApi = {
   listVideos: (statusFilter = null, sortBy = 'created_at', sortOrder = 'desc') => 
     api.get('/api/videos/', { params: { status_filter: statusFilter, sort_by: sortBy, sort_order: sortOrder } }),
   updateVideo: (id, data) => api.patch(`/api/videos/${id}`, data),
+  approveVideo: (id) => api.post(`/api/videos/${id}/approve`),
 };
 
 // YouTube API
@@ -94,6 +95,7 @@ export const pipelineApi = {
 export const queueApi = {
   getStats: () => api.get('/api/queue/stats'),
   getJobStatus: (ideaId) => api.get(`/api/queue/status/${ideaId}`),
+  getJobStatuses: (ideaIds) => api.post('/api/queue/positions', { idea_ids: ideaIds }),
   cancelJob: (ideaId) => api.post(`/api/queue/cancel/${ideaId}`),
 };
 
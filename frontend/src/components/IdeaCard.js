@@ -91,38 +91,11 @@ const ActionsDropdown = ({ onRegenerate }) => {
 };
 
 
-function IdeaCard({ idea, selected, onToggleSelect, onDelete, onStartPipeline, onEdit }) {
+// queueInfo est chargé par la page pour toutes les cartes en une seule requête
+function IdeaCard({ idea, queueInfo, selected, onToggleSelect, onDelete, onStartPipeline, onEdit }) {
   const navigate = useNavigate();
-  const [queueInfo, setQueueInfo] = useState(null);
   const [generatingImages, setGeneratingImages] = useState(false);
   const [imagesStatus, setImagesStatus] = useState(null);
-  
-  // Charger les informations de queue
-  useEffect(() => {
-    const loadQueueInfo = async () => {
-      if (idea.status === 'queued' || idea.status === 'processing' || 
-          idea.status === 'script_generating' || idea.status === 'audio_generating' || idea.status === 'video_generating') {
-        try {
-          const response = await queueApi.getJobStatus(idea.id);
-          setQueueInfo(response.data);
-        } catch (error) {
-          console.error('Error loading queue info:', error);
-        }
-      }
-    };
-    
-    loadQueueInfo();
-    
-    // Rafraîchir toutes les 5 secondes si en queue ou en cours de génération
-    const interval = setInterval(() => {
-      if (idea.status === 'queued' || idea.status === 'processing' || 
-          idea.status === 'script_generating' || idea.status === 'audio_generating' || idea.status === 'video_generating') {
-        loadQueueInfo();
-      }
-    }, 5000);
-    
-    return () => clearInterval(interval);
-  }, [idea.id, idea.status]);
 
   // Charger le statut des images
   useEffect(() => {
@@ -1,12 +1,14 @@
 import { CheckSquare, Loader, Plus, Search, Square } from 'lucide-react';
 import React, { useEffect, useState } from 'react';
-import { ideasApi, pipelineApi } from '../api';
+import { ideasApi, pipelineApi, queueApi } from '../api';
 import ConfirmModal from '../components/ConfirmModal';
 import EditIdeaModal from '../components/EditIdeaModal';
 import GenerateIdeasModal from '../components/GenerateIdeasModal';
 import IdeaCard from '../components/IdeaCard';
 import Toast from '../components/Toast';
 
+const ACTIVE_STATUSES = ['queued', 'processing', 'script_generating', 'audio_generating', 'video_generating'];
+
 function IdeasPage() {
   const [ideas, setIdeas] = useState([]);
   const [filteredIdeas, setFilteredIdeas] = useState([]);
@@ -20,6 +22,7 @@ function IdeasPage() {
   const [batchAction, setBatchAction] = useState('');
   const [processingBatch, setProcessingBatch] = useState(false);
   const [editingIdea, setEditingIdea] = useState(null);
+  const [queueStatuses, setQueueStatuses] = useState({});
 
   useEffect(() => {
     loadIdeas();
@@ -31,6 +34,28 @@ function IdeasPage() {
     filterIdeas();
   }, [searchQuery, ideas]);
 
+  // Statut de queue de toutes les idées en cours, en une seule requête toutes les 5 secondes
+  useEffect(() => {
+    const activeIds = ideas.filter(idea => ACTIVE_STATUSES.includes(idea.status)).map(idea => idea.id);
+    if (activeIds.length === 0) {
+      setQueueStatuses({});
+      return;
+    }
+
+    const loadQueueStatuses = async () => {
+      try {
+        const response = await queueApi.getJobStatuses(activeIds);
+        setQueueStatuses(response.data);
+      } catch (error) {
+        console.error('Error loading queue info:', error);
+      }
+    };
+
+    loadQueueStatuses();
+    const interval = setInterval(loadQueueStatuses, 5000);
+    return () => clearInterval(interval);
+  }, [ideas]);
+
   const loadIdeas = async () => {
     try {
       if (!loading) setLoading(true);
@@ -362,6 +387,7 @@ function IdeasPage() {
             <IdeaCard
               key={idea.id}
               idea={idea}
+              queueInfo={queueStatuses[idea.id]}
               selected={selectedIdeas.includes(idea.id)}
               onToggleSelect={() => toggleSelectIdea(idea.id)}
               onDelete={() => handleDeleteIdea(idea.id)}
@@ -1,6 +1,6 @@
 import {
   ArrowLeft,
-  Calendar, Clock,
+  Calendar, CheckCircle, Clock,
   Edit,
   ExternalLink,
   Loader,
@@ -22,6 +22,7 @@ function VideoDetailPage() {
   const [video, setVideo] = useState(null);
   const [loading, setLoading] = useState(true);
   const [uploading, setUploading] = useState(false);
+  const [approving, setApproving] = useState(false);
   const [showEditModal, setShowEditModal] = useState(false);
 
   useEffect(() => {
@@ -63,6 +64,22 @@ function VideoDetailPage() {
     }
   };
 
+  const handleApprove = async () => {
+    if (!window.confirm('Approuver cet aperçu et lancer le rendu final ?')) return;
+
+    try {
+      setApproving(true);
+      await videosApi.approveVideo(video.id);
+      alert('✅ Vidéo approuvée ! Le rendu final a été ajouté à la queue.');
+      await loadVideoDetails();
+    } catch (error) {
+      console.error('Error approving video:', error);
+      alert('Erreur lors de l\'approbation: ' + (error.response?.data?.detail || error.message));
+    } finally {
+      setApproving(false);
+    }
+  };
+
   const handleUnschedule = async () => {
     if (!window.confirm('Supprimer la planification de cette vidéo ?')) return;
     
@@ -177,6 +194,11 @@ function VideoDetailPage() {
             <h1 className="text-3xl font-bold text-gray-900 mb-2">{video.title}</h1>
             <div className="flex items-center space-x-3">
               {getStatusBadge()}
+              {video.render_quality === 'preview' && (
+                <span className="inline-flex items-center px-3 py-1 rounded-full text-sm font-medium bg-yellow-100 text-yellow-800">
+                  {video.approved || video.is_scheduled ? 'Aperçu · rendu final en cours' : 'Aperçu 540p'}
+                </span>
+              )}
               <span className="text-sm text-gray-500">
                 <Clock className="h-4 w-4 inline mr-1" />
                 {formatDuration(video.duration_seconds)}
@@ -197,7 +219,22 @@ function VideoDetailPage() {
               Modifier
             </button>
             
-            {!video.youtube_video_id && !video.is_scheduled && (
+            {video.render_quality === 'preview' && !video.approved && !video.is_scheduled && (
+              <button
+                onClick={handleApprove}
+                disabled={approving}
+                className="inline-flex items-center px-4 py-2 border border-transparent text-sm font-medium rounded-md text-white bg-green-600 hover:bg-green-700 disabled:opacity-50"
+              >
+                {approving ? (
+                  <Loader className="h-4 w-4 mr-2 animate-spin" />
+                ) : (
+                  <CheckCircle className="h-4 w-4 mr-2" />
+                )}
+                Approuver
+              </button>
+            )}
+            
+            {!video.youtube_video_id && !video.is_scheduled && video.render_quality !== 'preview' && (
               <button
                 onClick={handleUploadToYouTube}
                 disabled={uploading}